@@ -0,0 +1,57 @@
+"""Benchmarks of a single Ecosystem.evolve step and its phases."""
+
+import pickle
+
+import pytest
+
+from facs.base import checkpoint
+
+# phases of evolve, in the order in which they run. evolve interleaves the
+# first three per agent, here each runs for all agents in turn.
+PHASES = ["visits", "status", "vaccination", "location", "household", "transport"]
+
+
+def run_phase(eco, phase):
+    """Run one phase of Ecosystem.evolve."""
+    # pylint: disable=protected-access
+
+    if phase == "visits":
+        eco.clear_visits()
+        eco.plan_visits()
+    elif phase == "status":
+        eco.progress_conditions()
+    elif phase == "vaccination":
+        eco.vaccinate()
+    elif phase == "location":
+        eco._aggregate_loc_inf_minutes()
+        eco.compute_base_rates()
+        eco.evolve_locations()
+    elif phase == "household":
+        eco.evolve_households()
+    else:
+        eco.evolve_public_transport()
+
+
+@pytest.mark.parametrize("phase", PHASES)
+def test_evolve_phase(benchmark, warm_ecosystem, phase):
+    """Time one phase, starting from the state left by the phases before it."""
+
+    eco, state = warm_ecosystem
+
+    def setup():
+        checkpoint.set_state(eco, pickle.loads(state))
+        for previous in PHASES[: PHASES.index(phase)]:
+            run_phase(eco, previous)
+
+    benchmark.pedantic(run_phase, args=(eco, phase), setup=setup, rounds=5)
+
+
+def test_evolve_step(benchmark, warm_ecosystem):
+    """Time a complete evolve step."""
+
+    eco, state = warm_ecosystem
+
+    def setup():
+        checkpoint.set_state(eco, pickle.loads(state))
+
+    benchmark.pedantic(eco.evolve, setup=setup, rounds=5)
@@ -0,0 +1,46 @@
+"""Benchmark of the start-up cost of importing run.py."""
+
+import subprocess
+import sys
+
+from conftest import REPO_DIR
+
+IMPORT_BUDGET = 0.5  # maximum cumulative import time of run.py [s].
+
+# modules that only the backends and readers that need them may import.
+DEFERRED_MODULES = ["pandas", "mpi4py"]
+
+
+def get_import_time(module):
+    """
+    Return the cumulative import time of a module in a fresh interpreter [s],
+    as reported by python -X importtime, and the top level modules it loaded.
+    """
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print(*sorted(sys.modules))",
+        ],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    last = result.stderr.strip().splitlines()[-1]  # the module itself comes last.
+    cumulative = int(last.split("|")[1])
+    return cumulative * 1e-6, set(result.stdout.split())
+
+
+def test_import_run(benchmark):
+    """Time importing run.py, and check it against IMPORT_BUDGET."""
+
+    seconds, modules = benchmark.pedantic(
+        get_import_time, args=("run",), rounds=5, iterations=1
+    )
+
+    assert not modules & set(DEFERRED_MODULES)
+    assert seconds < IMPORT_BUDGET, f"importing run.py took {seconds:.3f} s"
@@ -0,0 +1,23 @@
+"""Benchmarks of the population synthesis and the nearest location search."""
+
+from conftest import new_ecosystem, read_buildings
+
+
+def test_population_synthesis(benchmark, location):
+    """Time reading the buildings and creating houses, households and agents."""
+
+    ecosystems = []
+
+    def setup():
+        ecosystems.append(new_ecosystem(location))
+        return (ecosystems[-1], location), {}
+
+    benchmark.pedantic(read_buildings, setup=setup, rounds=3)
+    assert ecosystems[-1].num_agents > 0
+
+
+def test_update_nearest_locations(benchmark, warm_ecosystem):
+    """Time the search of the nearest locations of every house."""
+
+    eco, _ = warm_ecosystem
+    benchmark.pedantic(eco.update_nearest_locations, rounds=3)
@@ -0,0 +1,27 @@
+"""Benchmark of a complete 100 day simulation of the test location."""
+
+import run
+
+from facs.base.utils import event_logger
+
+NUM_DAYS = 100
+
+
+def test_run_100_days(benchmark, workdir):
+    """Time run.py, including the input reading and the 20 day warm-up."""
+
+    args = run.parse_arguments(
+        [
+            "--location=test",
+            f"-t={NUM_DAYS}",
+            f"--output_dir={workdir}/out",
+            "--backend=serial",
+            "--seed=1",
+        ]
+    )
+
+    def simulate():
+        run.run_simulation(args)
+        event_logger.close()
+
+    benchmark.pedantic(simulate, rounds=1)
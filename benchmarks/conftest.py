@@ -0,0 +1,153 @@
+"""
+Fixtures for the benchmarks of the simulation hot paths.
+
+Every benchmark runs in a scratch directory whose covid_data directory links
+to the input files of the repository, so the relative paths used by FACS
+resolve and the output files (offices.csv, event logs) do not end up in the
+working tree. Besides the test location, a synthetic borough is generated by
+tiling test_buildings.csv on a grid of scale x scale copies.
+"""
+
+import csv
+import os
+import pickle
+
+from datetime import datetime
+
+import pytest
+
+from facs.base import checkpoint
+from facs.base.facs import Ecosystem
+from facs.base.random_streams import RandomStreams, set_streams
+from facs.readers import read_age_csv, read_building_csv, read_disease_yml
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DATA_DIR = os.path.join(REPO_DIR, "covid_data")
+
+LOCATIONS = ["test", "scaled"]
+SEED = 1
+DURATION = 1100  # same default simulation period as run.py.
+WARM_UP_DAYS = 10  # days evolved before the phase benchmarks, to get infections.
+STARTING_INFECTIONS = 10
+START_DATE = "1/3/2020"  # same default start date as run.py.
+
+
+def pytest_addoption(parser):
+    """Add the size of the synthetic borough."""
+
+    parser.addoption(
+        "--borough-scale",
+        action="store",
+        type=int,
+        default=3,
+        help="The synthetic borough tiles test_buildings.csv scale x scale times.",
+    )
+
+
+def write_scaled_buildings(source, target, scale):
+    """Write a copy of the source buildings tiled on a scale x scale grid."""
+
+    with open(source, encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [(r[0], float(r[1]), float(r[2]), r[3]) for r in reader]
+
+    xs = [r[1] for r in rows]
+    ys = [r[2] for r in rows]
+    width = max(xs) - min(xs)
+    height = max(ys) - min(ys)
+
+    with open(target, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(scale):
+            for j in range(scale):
+                for building, x, y, sqm in rows:
+                    writer.writerow([building, x + i * width, y + j * height, sqm])
+
+
+@pytest.fixture(scope="session")
+def workdir(tmp_path_factory, request):
+    """Return a scratch directory with the input data of both locations."""
+
+    path = tmp_path_factory.mktemp("bench")
+    data_dir = path / "covid_data"
+    data_dir.mkdir()
+    for name in os.listdir(SOURCE_DATA_DIR):
+        os.symlink(os.path.join(SOURCE_DATA_DIR, name), data_dir / name)
+
+    write_scaled_buildings(
+        os.path.join(SOURCE_DATA_DIR, "test_buildings.csv"),
+        data_dir / "scaled_buildings.csv",
+        request.config.getoption("--borough-scale"),
+    )
+    return path
+
+
+@pytest.fixture(autouse=True)
+def in_workdir(workdir, monkeypatch):
+    """Run every benchmark inside the scratch directory."""
+
+    monkeypatch.chdir(workdir)
+
+
+def new_ecosystem(location):
+    """Return a seeded ecosystem with the ages and disease of a location."""
+
+    set_streams(RandomStreams(SEED, 0))
+    eco = Ecosystem(DURATION, mode="serial")
+    eco.ages = read_age_csv.read_age_csv("covid_data/age-distr.csv", location)
+    eco.disease = read_disease_yml.read_disease_yml("covid_data/disease_covid19.yml")
+    eco.date = datetime.strptime(START_DATE, "%d/%m/%Y")
+    return eco
+
+
+def read_buildings(eco, location):
+    """Synthesise the population of a location, with the run.py defaults."""
+
+    read_building_csv.read_building_csv(
+        eco,
+        f"covid_data/{location}_buildings.csv",
+        "covid_data/building_types_map.yml",
+        house_ratio=2,
+        workspace=20,
+        office_size=2500,
+        household_size=2.6,
+        work_participation_rate=0.5,
+    )
+
+
+@pytest.fixture(scope="session")
+def built_ecosystems(workdir):
+    """Return a cache of (ecosystem, pickled state) after the warm-up, per location."""
+
+    return {}
+
+
+@pytest.fixture(params=LOCATIONS)
+def location(request):
+    """Return the name of a benchmarked location."""
+
+    return request.param
+
+
+@pytest.fixture
+def warm_ecosystem(location, built_ecosystems):
+    """
+    Return an ecosystem of the location that has evolved for WARM_UP_DAYS,
+    and the pickled state to reset it to before every benchmark round.
+    """
+
+    if location not in built_ecosystems:
+        eco = new_ecosystem(location)
+        read_buildings(eco, location)
+        eco.print_status(None, silent=True)
+        eco.add_infections(STARTING_INFECTIONS)
+        for _ in range(WARM_UP_DAYS):
+            eco.evolve()
+        built_ecosystems[location] = (eco, pickle.dumps(checkpoint.get_state(eco)))
+
+    eco, state = built_ecosystems[location]
+    checkpoint.set_state(eco, pickle.loads(state))
+    yield eco, state
+    set_streams(None)
@@ -0,0 +1,227 @@
+"""
+Module for checkpointing and restarting a simulation.
+
+Every rank pickles its own Ecosystem (houses, agents, locations, the
+measures state and the Config with the scaled needs), together with the
+random number generator states, the module level state that the measures
+and mutations keep, and the sizes of the output files. A restart truncates
+the output files back to those sizes, so a resumed run writes exactly the
+same output as an uninterrupted one.
+
+Snapshots hold the same state in memory, together with the contents of the
+output files, so that several scenarios can continue from one warm-up.
+"""
+
+from __future__ import annotations
+
+import glob
+import importlib
+import os
+import pickle
+import random
+import re
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .config import set_config
+from .random_streams import get_streams, set_streams
+from .utils import event_logger, out_files
+
+if TYPE_CHECKING:
+    from .facs import Ecosystem
+
+# 2: agents store status codes. 3: locations are pickled without visits.
+CHECKPOINT_VERSION = 3
+
+# attributes that belong to this process rather than to the simulation state.
+TRANSIENT_ATTRIBUTES = [
+    "mpi",
+    "border_exchange",
+    "num_threads",
+    "timers",
+    "profile",
+    "memory_report",
+]
+
+# module globals that change during a run: module -> attribute names.
+MODULE_STATE = {
+    "facs.readers.read_measures_yml": [
+        "__measure_mask_uptake",
+        "__measure_mask_uptake_shopping",
+        "__measure_social_distance",
+        "__measure_work_from_home",
+    ],
+    "facs.readers.read_vaccinations_yml": [
+        "__mutation_daily_change",
+        "__mutation_days_remaining",
+    ],
+}
+
+
+def get_checkpoint_file(directory: str, time: int, rank: int) -> str:
+    """Return the checkpoint file of a rank at a time step."""
+
+    return f"{directory}/checkpoint_{time}_{rank}.pkl"
+
+
+def get_module_state() -> dict:
+    """Return the values of the module globals listed in MODULE_STATE."""
+
+    return {
+        name: {attr: getattr(importlib.import_module(name), attr) for attr in attrs}
+        for name, attrs in MODULE_STATE.items()
+    }
+
+
+def set_module_state(state: dict):
+    """Set the module globals returned by get_module_state."""
+
+    for name, attrs in state.items():
+        module = importlib.import_module(name)
+        for attr, value in attrs.items():
+            setattr(module, attr, value)
+
+
+def get_state(e: Ecosystem) -> dict:
+    """Return the simulation state of this rank, without the output files."""
+
+    return {
+        "version": CHECKPOINT_VERSION,
+        "time": e.time,
+        "size": e.size,
+        "ecosystem": {
+            k: v for k, v in e.__dict__.items() if k not in TRANSIENT_ATTRIBUTES
+        },
+        "border_exchange": e.border_exchange is not None,
+        "np_random": np.random.get_state(),
+        "random": random.getstate(),
+        "streams": get_streams(),
+        "event_rng": event_logger.rng,
+        "modules": get_module_state(),
+    }
+
+
+def set_state(e: Ecosystem, state: dict):
+    """Restore a state returned by get_state into e."""
+
+    if state["version"] != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state['version']}.")
+    if state["size"] != e.size:
+        raise ValueError(
+            f"Checkpoint was written by {state['size']} ranks, not {e.size}."
+        )
+
+    # the validation points are kept, but sized for the duration of this run.
+    validation = e.validation
+    e.__dict__.update(state["ecosystem"])
+    n = min(validation.size, e.validation.size)
+    validation[:n] = e.validation[:n]
+    e.validation = validation
+    set_config(e.config)  # the agents use the needs scaled by the measures.
+    np.random.set_state(state["np_random"])
+    random.setstate(state["random"])
+    set_streams(state.get("streams"))
+    event_logger.rng = state["event_rng"]
+    set_module_state(state["modules"])
+
+    if state["border_exchange"]:
+        e.setup_border_exchange()
+
+
+def save_checkpoint(e: Ecosystem, directory: str):
+    """
+    Write the state of this rank at e.time to the checkpoint directory.
+    All ranks have to call this; the checkpoint of the previous time step is
+    only removed once every rank has written the new one.
+    """
+
+    if event_logger.output_format != "csv":
+        raise ValueError("Checkpoints can only resume csv event logs.")
+
+    os.makedirs(directory, exist_ok=True)
+    previous = glob.glob(f"{directory}/checkpoint_*_{e.rank}.pkl")
+
+    state = get_state(e)
+    state["files"] = out_files.get_sizes()
+
+    file_name = get_checkpoint_file(directory, e.time, e.rank)
+    with open(file_name + ".tmp", "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(file_name + ".tmp", file_name)
+
+    e.mpi.comm.Barrier()
+    for old_file in previous:
+        if old_file != file_name:
+            os.remove(old_file)
+
+
+def find_latest_checkpoint(directory: str, size: int) -> int | None:
+    """Return the latest time step with a checkpoint of all ranks, if any."""
+
+    ranks = {}  # time -> ranks with a checkpoint.
+    for file_name in glob.glob(f"{directory}/checkpoint_*_*.pkl"):
+        match = re.search(r"checkpoint_(-?\d+)_(\d+)\.pkl$", file_name)
+        if match:
+            ranks.setdefault(int(match.group(1)), set()).add(int(match.group(2)))
+
+    complete = [t for t, r in ranks.items() if r == set(range(size))]
+    return max(complete) if complete else None
+
+
+def load_checkpoint(e: Ecosystem, directory: str) -> int:
+    """
+    Restore the latest complete checkpoint into e, and return its time step.
+    e must have been created with the same number of ranks.
+    """
+
+    time = None
+    if e.rank == 0:
+        time = find_latest_checkpoint(directory, e.size)
+    time = e.mpi.comm.bcast(time, root=0)
+    if time is None:
+        raise FileNotFoundError(f"No complete checkpoint found in {directory}.")
+
+    with open(get_checkpoint_file(directory, time, e.rank), "rb") as f:
+        state = pickle.load(f)
+
+    set_state(e, state)
+    out_files.restore(state["files"])
+    return time
+
+
+def take_snapshot(e: Ecosystem, metadata: dict | None = None) -> bytes:
+    """
+    Return the state of this rank, with the contents of its output files, so
+    that several runs can continue from it (see restore_snapshot).
+    """
+
+    if event_logger.output_format != "csv":
+        raise ValueError("Snapshots can only continue csv event logs.")
+
+    state = get_state(e)
+    state["file_contents"] = out_files.get_contents()
+    state["metadata"] = metadata or {}
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore_snapshot(e: Ecosystem, snapshot: bytes, rename=None) -> dict:
+    """
+    Restore a snapshot into e and return its metadata.
+    The output files of the snapshot are written to
+    rename(file name, metadata), and the runs that follow append to them.
+    """
+
+    state = pickle.loads(snapshot)
+    set_state(e, state)
+
+    out_files.close()
+    sizes = {}
+    for file_name, contents in state["file_contents"].items():
+        new_name = file_name if rename is None else rename(file_name, state["metadata"])
+        with open(new_name, "w", encoding="utf-8") as f:
+            f.write(contents)
+            sizes[new_name] = f.tell()
+    out_files.restore(sizes)
+    return state["metadata"]
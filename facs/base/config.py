@@ -0,0 +1,138 @@
+"""
+Module for the input configuration shared by all parts of the model.
+
+A Config knows where the building types, needs, vaccination and default
+disease files are, and parses each of them once, on first use. Nothing is
+read at import time. The per-type parameters that the hot loops use are also
+available as small arrays indexed by the building type code. run.py
+activates a Config for its data directory with set_config; without one,
+get_config creates a Config for covid_data.
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+
+import numpy as np
+import yaml
+
+from facs.readers.read_disease_yml import read_disease_yml
+from .disease import Disease
+from .location_types import get_building_types, parse_building_types
+from .needs import Needs
+
+_active = None  # Config returned by get_config.
+
+
+class Config:
+    """Input files of a simulation, each parsed lazily and only once."""
+
+    def __init__(
+        self,
+        data_dir: str = "covid_data",
+        building_types_file: str | None = None,
+        needs_file: str | None = None,
+        vaccinations_file: str | None = None,
+        disease_file: str | None = None,
+    ):
+        # pylint: disable=too-many-arguments
+        self.data_dir = data_dir
+        self.building_types_file = (
+            building_types_file or f"{data_dir}/building_types_map.yml"
+        )
+        self.needs_file = needs_file or f"{data_dir}/needs.csv"
+        self.vaccinations_file = vaccinations_file or f"{data_dir}/vaccinations.yml"
+        self.disease_file = disease_file or f"{data_dir}/disease_covid19.yml"
+
+        self._needs = None
+        self._needs_table = None  # unscaled copy of the needs table.
+
+    @cached_property
+    def building_types_data(self) -> dict:
+        """Return the parameters of every building type, as in the YAML file."""
+
+        with open(self.building_types_file, encoding="utf-8") as f:
+            return yaml.safe_load(f)
+
+    @cached_property
+    def building_types_dict(self) -> dict[str, int]:
+        """Return the index of every building type."""
+
+        return get_building_types(parse_building_types(self.building_types_data))
+
+    @cached_property
+    def building_types(self) -> list[str]:
+        """Return the building types, in file order."""
+
+        return list(self.building_types_data)
+
+    def get_type_array(self, parameter: str, dtype: str) -> np.ndarray:
+        """Return a parameter of all building types, indexed by type code."""
+
+        values = np.zeros(len(self.building_types), dtype=dtype)
+        for name, code in self.building_types_dict.items():
+            values[code] = self.building_types_data[name][parameter]
+        return values
+
+    @cached_property
+    def neighbours(self) -> np.ndarray:
+        """Return the number of nearest locations kept per building type."""
+
+        return self.get_type_array("neighbours", "i8")
+
+    @cached_property
+    def fixed(self) -> np.ndarray:
+        """Return whether agents always visit the same location of a type."""
+
+        return self.get_type_array("fixed", "?")
+
+    @cached_property
+    def weighted(self) -> np.ndarray:
+        """Return whether visits to a type are weighted by the location size."""
+
+        return self.get_type_array("weighted", "?")
+
+    @cached_property
+    def vaccinations(self) -> dict:
+        """Return the vaccination parameters."""
+
+        with open(self.vaccinations_file, encoding="utf-8") as f:
+            return yaml.safe_load(f)
+
+    @cached_property
+    def disease(self) -> Disease:
+        """Return the default disease, which sets the initial immunity."""
+
+        return read_disease_yml(self.disease_file)
+
+    @property
+    def needs(self) -> Needs:
+        """Return the needs of the population, which measures may scale."""
+
+        if self._needs is None:
+            self._needs = Needs(self.needs_file, self.building_types)
+            self._needs_table = self._needs.needs.copy()
+        return self._needs
+
+    def reset_needs(self):
+        """Undo all scaling of the needs, without reading the file again."""
+
+        if self._needs is not None:
+            self._needs.needs = self._needs_table.copy()
+            self._needs.update_table()
+
+
+def set_config(config: Config | None):
+    """Activate a configuration; None reverts to the default one."""
+
+    global _active  # pylint: disable=global-statement
+    _active = config
+
+
+def get_config() -> Config:
+    """Return the active configuration, creating the default one if needed."""
+
+    global _active  # pylint: disable=global-statement
+    if _active is None:
+        _active = Config()
+    return _active
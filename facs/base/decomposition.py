@@ -0,0 +1,154 @@
+"""Module for spatial domain decomposition of houses and locations."""
+
+from __future__ import annotations
+
+import numpy as np
+
+CURVE_ORDER = 16  # grid of 2**16 x 2**16 cells for the space-filling curve.
+
+
+def hilbert_keys(x, y, order: int = CURVE_ORDER) -> np.ndarray:
+    """
+    Return the Hilbert curve index of each (x, y) coordinate.
+
+    Coordinates are scaled onto a 2**order by 2**order grid spanning their
+    bounding box, so points that are close in space get close keys.
+    """
+
+    x = np.asarray(x, dtype="f8")
+    y = np.asarray(y, dtype="f8")
+
+    if x.shape != y.shape:
+        raise ValueError("x and y must have the same shape")
+
+    if x.size == 0:
+        return np.zeros(0, dtype="int64")
+
+    n = 2**order
+    return _hilbert_index(_scale_to_grid(x, n), _scale_to_grid(y, n), n)
+
+
+def _hilbert_index(xi: np.ndarray, yi: np.ndarray, n: int) -> np.ndarray:
+    """Return the Hilbert index of integer cells on an n by n grid."""
+
+    keys = np.zeros(xi.shape, dtype="int64")
+    s = n // 2
+    while s > 0:
+        rx = (xi & s) > 0
+        ry = (yi & s) > 0
+        keys += s * s * ((3 * rx.astype("int64")) ^ ry.astype("int64"))
+
+        # rotate the quadrant so that the curve stays continuous.
+        flip = ~ry & rx
+        xi = np.where(flip, n - 1 - xi, xi)
+        yi = np.where(flip, n - 1 - yi, yi)
+        swap = ~ry
+        xi, yi = np.where(swap, yi, xi), np.where(swap, xi, yi)
+        s //= 2
+
+    return keys
+
+
+def _scale_to_grid(v: np.ndarray, n: int) -> np.ndarray:
+    """Scale values onto the integer range [0, n-1]."""
+
+    vmin = v.min()
+    span = v.max() - vmin
+    if span <= 0:
+        return np.zeros(v.shape, dtype="int64")
+    return np.minimum(((v - vmin) / span * n).astype("int64"), n - 1)
+
+
+def partition_by_curve(keys, size: int, weights=None) -> np.ndarray:
+    """
+    Assign items to `size` ranks as contiguous stretches of the curve.
+
+    Each rank receives (approximately) the same total weight. Without
+    weights every item counts equally, which gives the same partition sizes
+    as the round robin distribution of houses.
+    Returns the owning rank of every item.
+    """
+
+    keys = np.asarray(keys)
+    if size < 1:
+        raise ValueError("size must be at least 1")
+
+    order = np.argsort(keys, kind="stable")
+    owners = np.zeros(keys.size, dtype="int64")
+    if keys.size == 0:
+        return owners
+
+    if weights is None:
+        ave, res = divmod(keys.size, size)
+        counts = [ave + 1 if p < res else ave for p in range(size)]
+        owners[order] = np.repeat(np.arange(size), counts)
+        return owners
+
+    weights = np.asarray(weights, dtype="f8")[order]
+    if np.any(weights < 0):
+        raise ValueError("weights must not be negative")
+
+    total = weights.sum()
+    if total <= 0:
+        return partition_by_curve(keys, size)
+
+    # position of the centre of each item along the cumulative weight line.
+    centres = np.cumsum(weights) - 0.5 * weights
+    owners[order] = np.minimum((centres / total * size).astype("int64"), size - 1)
+    return owners
+
+
+class BorderExchange:
+    """
+    Exchanges infectious minutes of border locations between ranks.
+
+    A location is on a border when houses of more than one rank can visit it.
+    Each rank only sends its partial sums for the locations it shares with a
+    neighbouring rank, instead of reducing the full location vector.
+    """
+
+    def __init__(self, comm, touched):
+        self.comm = comm
+        self.rank = comm.Get_rank()
+        self.size = comm.Get_size()
+
+        mine = np.flatnonzero(np.asarray(touched)).astype("int64")
+        all_touched = comm.allgather(mine)
+
+        self.neighbours = {}  # rank -> indices of the shared locations.
+        for r, theirs in enumerate(all_touched):
+            if r == self.rank:
+                continue
+            shared = np.intersect1d(mine, theirs, assume_unique=True)
+            if shared.size > 0:
+                self.neighbours[r] = shared
+
+        self.num_touched = mine.size
+        # bytes sent by this rank in every exchange.
+        self.num_bytes = 8 * sum(i.size for i in self.neighbours.values())
+        self.num_border = (
+            np.unique(np.concatenate(list(self.neighbours.values()))).size
+            if self.neighbours
+            else 0
+        )
+
+    def exchange(self, loc_inf_minutes: np.ndarray) -> np.ndarray:
+        """Return loc_inf_minutes with border locations summed over ranks."""
+
+        requests = []
+        send_buffers = {}
+        recv_buffers = {}
+        for r, indices in self.neighbours.items():
+            send_buffers[r] = np.ascontiguousarray(loc_inf_minutes[indices], dtype="f8")
+            recv_buffers[r] = np.empty(indices.size, dtype="f8")
+            requests.append(self.comm.Isend(send_buffers[r], dest=r, tag=1))
+            requests.append(self.comm.Irecv(recv_buffers[r], source=r, tag=1))
+
+        for request in requests:
+            request.Wait()
+
+        total = loc_inf_minutes.copy()
+        # add in rank order, so the sum does not depend on message arrival.
+        for r in sorted(recv_buffers):
+            total[self.neighbours[r]] += recv_buffers[r]
+        return total
@@ -0,0 +1,66 @@
+"""
+Module for running stochastic replicas of a simulation in forked processes.
+
+The population and the nearest location tables are built once in the parent
+process. Every replica then runs in a fresh fork of the parent, which shares
+that memory copy-on-write and only differs in its random seed.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import random
+
+import numpy as np
+
+from .random_streams import RandomStreams, get_streams, set_streams
+from .utils import event_logger
+
+_replica = None  # function run by the forked workers, set by run_replicas.
+
+
+def get_replica_seeds(num_replicas: int, entropy=None) -> list[int]:
+    """Return distinct 32-bit seeds for the replicas."""
+
+    seeds = np.random.SeedSequence(entropy).generate_state(num_replicas)
+    return [int(seed) for seed in seeds]
+
+
+def _run_replica(job):
+    index, seed = job
+    np.random.seed(seed)
+    random.seed(seed)
+    streams = get_streams()
+    if streams is not None:
+        streams = RandomStreams(seed, streams.rank, streams.pool_size)
+        set_streams(streams)
+    if event_logger.rng is not None:  # sampled event logs draw from their own rng.
+        event_logger.rng = streams["events"] if streams else np.random.default_rng(seed)
+    return _replica(index, seed)
+
+
+def run_replicas(replica, seeds, num_workers: int = 1) -> list:
+    """
+    Call replica(index, seed) once per seed, each in its own fork of this
+    process, with at most num_workers running at a time. The global and (if
+    active) the per-purpose random streams are seeded with the seed, as is
+    the sampling of the event logs. The results are returned in the order of
+    the seeds, so they have to be picklable.
+    """
+
+    global _replica  # pylint: disable=global-statement
+
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1")
+    if len(seeds) == 0:
+        return []
+
+    _replica = replica
+    ctx = mp.get_context("fork")
+    try:
+        # a new worker is forked for every replica, so none of them sees
+        # the state that an earlier replica left behind.
+        with ctx.Pool(min(num_workers, len(seeds)), maxtasksperchild=1) as pool:
+            return pool.map(_run_replica, list(enumerate(seeds)), chunksize=1)
+    finally:
+        _replica = None
@@ -0,0 +1,214 @@
+"""Module for writing the event logs as typed, columnar binary files."""
+
+from __future__ import annotations
+
+import zipfile
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Column names and types of each event log. The fourth column of the deaths
+# and recoveries logs holds the location of the event, not an age.
+EVENT_SCHEMAS = {
+    "infections": [
+        ("time", "int32"),
+        ("x", "float32"),
+        ("y", "float32"),
+        ("location_type", "category"),
+        ("rank", "int16"),
+        ("incubation_time", "int32"),
+    ],
+    "hospitalisations": [
+        ("time", "int32"),
+        ("x", "float32"),
+        ("y", "float32"),
+        ("age", "int16"),
+    ],
+    "deaths": [
+        ("time", "int32"),
+        ("x", "float32"),
+        ("y", "float32"),
+        ("location_type", "category"),
+    ],
+    "recoveries": [
+        ("time", "int32"),
+        ("x", "float32"),
+        ("y", "float32"),
+        ("location_type", "category"),
+    ],
+    "binned": [
+        ("time", "int32"),
+        ("event", "category"),
+        ("cell_x", "int32"),
+        ("cell_y", "int32"),
+        ("location_type", "category"),
+        ("count", "int32"),
+    ],
+}
+
+# format -> file extension.
+EVENT_FORMATS = {"csv": "csv", "parquet": "parquet", "npz": "npz"}
+
+
+class ColumnarEventWriter(ABC):
+    """Base class that converts buffered columns to typed arrays."""
+
+    def __init__(self, file_name: str, category: str):
+        if category not in EVENT_SCHEMAS:
+            raise ValueError(f"No columnar schema for event category {category}.")
+
+        self.file_name = file_name
+        self.schema = EVENT_SCHEMAS[category]
+        self.categories = {}  # column name -> {label: code}
+
+    def to_arrays(self, columns: list[list]) -> dict[str, np.ndarray]:
+        """Return typed arrays; categorical columns become int16 codes."""
+
+        arrays = {}
+        for (name, dtype), column in zip(self.schema, columns):
+            if dtype == "category":
+                codes = self.categories.setdefault(name, {})
+                for label in column:
+                    if label not in codes:
+                        codes[label] = len(codes)
+                arrays[name] = np.array(
+                    [codes[label] for label in column], dtype="int16"
+                )
+            else:
+                arrays[name] = np.asarray(column, dtype=dtype)
+        return arrays
+
+    def get_labels(self, name: str) -> list[str]:
+        """Return the labels of a categorical column, ordered by code."""
+
+        return list(self.categories.get(name, {}))
+
+    @abstractmethod
+    def write(self, columns: list[list]):
+        """Write one block of events."""
+
+    def close(self):
+        """Finish the file."""
+
+
+class ParquetEventWriter(ColumnarEventWriter):
+    """Writes every block of events as a row group of a Parquet file."""
+
+    def __init__(self, file_name: str, category: str):
+        super().__init__(file_name, category)
+
+        # pylint: disable=import-outside-toplevel
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ImportError(
+                "pyarrow is needed for Parquet event logs, use npz or csv instead."
+            ) from err
+
+        self.pa = pa
+        fields = [
+            (
+                pa.field(name, pa.dictionary(pa.int16(), pa.string()))
+                if dtype == "category"
+                else pa.field(name, pa.from_numpy_dtype(np.dtype(dtype)))
+            )
+            for name, dtype in self.schema
+        ]
+        self.arrow_schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(file_name, self.arrow_schema)
+
+    def write(self, columns: list[list]):
+        pa = self.pa
+        arrays = self.to_arrays(columns)
+        table = pa.table(
+            [
+                (
+                    pa.DictionaryArray.from_arrays(
+                        arrays[name], pa.array(self.get_labels(name), type=pa.string())
+                    )
+                    if dtype == "category"
+                    else pa.array(arrays[name])
+                )
+                for name, dtype in self.schema
+            ],
+            schema=self.arrow_schema,
+        )
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+
+class NpzEventWriter(ColumnarEventWriter):
+    """
+    Writes every block of events to a compressed .npz file as it arrives,
+    as the arrays <name>.<block>. Categorical columns are stored as codes,
+    with the labels in <name>_labels, which are written on close.
+    """
+
+    def __init__(self, file_name: str, category: str):
+        super().__init__(file_name, category)
+        self.zip = zipfile.ZipFile(file_name, "w", zipfile.ZIP_DEFLATED)
+        self.num_blocks = 0
+
+    def write_array(self, key: str, array: np.ndarray):
+        """Add an array to the file, as np.savez does."""
+
+        with self.zip.open(f"{key}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, array)
+
+    def write(self, columns: list[list]):
+        for name, array in self.to_arrays(columns).items():
+            self.write_array(f"{name}.{self.num_blocks:06d}", array)
+        self.num_blocks += 1
+
+    def close(self):
+        if self.num_blocks == 0:  # keep the columns and their types.
+            self.write([[] for _ in self.schema])
+        for name, dtype in self.schema:
+            if dtype == "category":
+                labels = np.array(self.get_labels(name), dtype=str)
+                self.write_array(f"{name}_labels", labels)
+        self.zip.close()
+
+
+def get_event_writer(output_format: str, file_name: str, category: str):
+    """Return the writer for a columnar event log format."""
+
+    if output_format == "parquet":
+        return ParquetEventWriter(file_name, category)
+    if output_format == "npz":
+        return NpzEventWriter(file_name, category)
+    raise ValueError(f"Unknown columnar event format {output_format}.")
+
+
+def read_events(file_name: str):
+    """Load an event log (csv, parquet or npz) as a pandas DataFrame."""
+
+    # pylint: disable=import-outside-toplevel
+    import pandas as pd
+
+    if file_name.endswith(".parquet"):
+        return pd.read_parquet(file_name)
+
+    if file_name.endswith(".npz"):
+        with np.load(file_name) as npz:
+            blocks = {}  # column name -> keys of its blocks, in order.
+            for key in npz.files:
+                if not key.endswith("_labels"):
+                    blocks.setdefault(key.split(".")[0], []).append(key)
+
+            columns = {}
+            for name, keys in blocks.items():
+                values = np.concatenate([npz[key] for key in keys])
+                if f"{name}_labels" in npz.files:
+                    columns[name] = pd.Categorical.from_codes(
+                        values, categories=npz[f"{name}_labels"]
+                    )
+                else:
+                    columns[name] = values
+        return pd.DataFrame(columns)
+
+    return pd.read_csv(file_name)
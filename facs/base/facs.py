@@ -1,41 +1,54 @@
 """Main module for the FACS package."""
 
-
 # FLu And Coronavirus Simulator
 # Covid-19 model, based on the general Flee paradigm.
 
 import csv
-import random
 import sys
 
 from datetime import timedelta
+from time import perf_counter
 
 import numpy as np
-import pandas as pd
 
-from .needs import Needs
-from .location_types import building_types_dict, building_types
+from .config import Config, get_config, set_config
+from .status import SUSCEPTIBLE, STATUS_NAMES
 from .house import House
 from .location import Location
 from .utils import (
     probability,
     get_random_int,
     out_files,
+    event_logger,
     calc_dist,
     write_log_headers,
     check_vac_eligibility,
 )
-from .mpi import MPIManager
+from .shared import SerialManager
+from .decomposition import BorderExchange
+from .rebalance import get_imbalance, get_destinations, migrate_houses
+from .kernels import parallel_for, base_rates_kernel, nearest_kernel, get_step_kernel
+from .household import HOME_INTERACTION_FRACTION
+from .random_streams import get_rng
+from .profiling import PhaseTimer, get_profile_file, write_phase_stats
 
 log_prefix = "."
 
-# Global storage for needs now, to keep it simple.
-needs = Needs("covid_data/needs.csv", building_types)
-
 
 class Ecosystem:
-    def __init__(self, duration, needsfile="covid_data/needs.csv", mode="parallel"):
-        self.mode = mode  # "serial" or "parallel"
+    def __init__(
+        self,
+        duration,
+        needsfile=None,
+        mode="parallel",
+        mpi=None,
+        config=None,
+    ):
+        # pylint: disable=too-many-arguments
+        if config is not None or needsfile is not None:
+            set_config(config or Config(needs_file=needsfile))
+        self.config = get_config()  # input files, read on first use.
+        self.mode = mode  # "serial", "parallel" (MPI) or "shared" (forked workers)
         self.locations = {}
         self.houses = []
         self.house_names = []
@@ -46,6 +59,9 @@ class Ecosystem:
         self.disease = None
         self.closures = {}
         self.validation = np.zeros(duration + 1)
+        # running totals of the written status lines, for the cum columns.
+        self.cum_hospitalisations = 0
+        self.cum_infections = 0
         self.contact_rate_multiplier = {}
         self.initialise_social_distance()  # default: no social distancing.
         self.self_isolation_multiplier = 1.0
@@ -87,7 +103,6 @@ class Ecosystem:
         }
         self.enforce_masks_on_transport = False
         self.loc_groups = {}
-        self.needsfile = needsfile
 
         self.airflow_indoors = 0.007
         self.airflow_outdoors = 0.028  # assuming x4: x20 from the literature but also that people occupy only 20% of the park space on average
@@ -113,18 +128,36 @@ class Ecosystem:
 
         self.size = 1  # number of processes
         self.rank = 0  # rank of current process
+        self.decomposition = "round_robin"  # "round_robin" or "spatial"
+        self.border_exchange = None  # only set up for spatial decomposition.
+        self.step_times = []  # per-step compute time on this rank [s].
+        self.rebalance_interval = 0  # days between rebalancing checks, 0 is off.
+        self.rebalance_threshold = 1.2  # max/mean compute time that triggers it.
+        self.num_threads = 1  # threads per process for the array kernels.
+        self.step_kernels = False  # run the daily phases as array kernels.
+        self.timers = PhaseTimer()  # wall-clock time of the phases of a step.
+        self.profile = False  # write the phase times of every step.
+        self.memory_report = None  # MemoryReport, in the memory report mode.
         self.debug_mode = False
         self.verbose = False
-        if self.mode == "parallel":
-            self.mpi = MPIManager()
-            self.rank = (
-                self.mpi.comm.Get_rank()
-            )  # this is stored outside of the MPI manager, to have one code for seq and parallel.
-            self.size = (
-                self.mpi.comm.Get_size()
-            )  # this is stored outside of the MPI manager, to have one code for seq and parallel.
-            self.global_stats = np.zeros(6, dtype="int64")
+        if mpi is not None:
+            self.mpi = mpi  # e.g. a SharedMemoryManager for mode="shared".
+        elif self.mode == "parallel":
+            # pylint: disable=import-outside-toplevel
+            from .mpi import MPIManager  # imports mpi4py, only needed here.
 
+            self.mpi = MPIManager()
+        else:
+            self.mpi = SerialManager()
+        self.rank = (
+            self.mpi.comm.Get_rank()
+        )  # this is stored outside of the MPI manager, to have one code for seq and parallel.
+        self.size = (
+            self.mpi.comm.Get_size()
+        )  # this is stored outside of the MPI manager, to have one code for seq and parallel.
+        self.global_stats = np.zeros(6, dtype="int64")
+
+        if self.mode != "serial":
             print("Hello from process {} out of {}".format(self.rank, self.size))
 
     def get_partition_size(self, num):
@@ -140,12 +173,14 @@ class Ecosystem:
         offset = 0
         self.loc_offsets = {}
         self.loc_m2 = {}
+        self.location_list = []  # non-house locations, indexed by loc_inf_minutes_id.
         for lt in self.locations:
             if lt != "house":
                 self.loc_m2[lt] = 0.0
                 for i in range(0, len(self.locations[lt])):
                     self.locations[lt][i].loc_inf_minutes_id = offset + i
                     self.loc_m2[lt] += self.locations[lt][i].sqm
+                self.location_list += self.locations[lt]
 
                 if self.rank == 0 and self.verbose:
                     print(
@@ -157,10 +192,46 @@ class Ecosystem:
                 self.loc_offsets[lt] = offset
                 offset += len(self.locations[lt])
         self.loc_inf_minutes = np.zeros(self.number_of_non_house_locations, dtype="f8")
+        self.loc_base_rates = np.zeros(self.number_of_non_house_locations, dtype="f8")
+        self.loc_sqm = np.array([l.sqm for l in self.location_list], dtype="f8")
+        self.loc_outdoors = np.array(
+            [l.loc_type == "park" for l in self.location_list], dtype=bool
+        )
 
     def reset_loc_inf_minutes(self):
         self.loc_inf_minutes = np.zeros(self.number_of_non_house_locations, dtype="f8")
 
+    def compute_base_rates(self):
+        """
+        Compute the infection base rate of all non-house locations for today,
+        split over num_threads threads (see Location.evolve).
+        """
+        multipliers = np.zeros(self.number_of_non_house_locations, dtype="f8")
+        for lt, offset in self.loc_offsets.items():
+            multipliers[offset : offset + len(self.locations[lt])] = (
+                4.0
+                * self.seasonal_effect
+                * self.contact_rate_multiplier[lt]
+                * self.disease.infection_rate
+            )
+        airflow = np.where(
+            self.loc_outdoors, self.airflow_outdoors, self.airflow_indoors
+        )
+
+        parallel_for(
+            lambda start, stop: base_rates_kernel(
+                self.loc_base_rates,
+                self.loc_inf_minutes,
+                multipliers,
+                airflow,
+                self.loc_sqm,
+                start,
+                stop,
+            ),
+            self.number_of_non_house_locations,
+            self.num_threads,
+        )
+
     def get_date_string(self, date_format="%-d/%-m/%Y"):
         """
         Return the simulation date as a short string.
@@ -192,8 +263,11 @@ class Ecosystem:
                 for a in hh.agents:
                     a.assign_group(loc_type, max_groups)
 
+        if self.border_exchange is not None:
+            self.setup_border_exchange()  # groups can span the whole domain.
+
     def get_location_by_group(self, loc_type_id, group_num):
-        loc_type = building_types[loc_type_id]
+        loc_type = self.config.building_types[loc_type_id]
         return self.loc_groups[loc_type][group_num]
 
     def print_contact_rate(self, measure):
@@ -272,7 +346,7 @@ class Ecosystem:
             h = self.houses[i]
             for hh in h.households:
                 for a in hh.agents:
-                    if probability(infection_probability):
+                    if probability(infection_probability, "transport"):
                         a.infect(self, location_type="traffic")
                         num_inf += 1
 
@@ -334,17 +408,14 @@ class Ecosystem:
 
         if dump_and_exit == True:
             # print header row
-            print(",".join(f"{x}" for x in building_types), file=f)
+            print(",".join(f"{x}" for x in self.config.building_types), file=f)
 
         count = 0
         print("Updating nearest locations...", file=sys.stderr)
-        for h in self.houses:
-            ni = h.find_nearest_locations(self)
+        for ni in self.find_all_nearest_locations():
             if dump_and_exit == True:
                 print(",".join(f"{x}" for x in ni), file=f)
             count += 1
-            if count % 1000 == 0:
-                print(f"{count} houses scanned.", file=sys.stderr, end="\r")
         print(f"Total {count} houses scanned.", file=sys.stderr)
 
         print(dump_and_exit)
@@ -352,7 +423,7 @@ class Ecosystem:
         if dump_and_exit == True:
             sys.exit()
 
-        if self.mode == "parallel":
+        if self.mode != "serial":
             # Assign houses to ranks for parallelisation.
 
             # count: the size of each sub-task
@@ -364,6 +435,69 @@ class Ecosystem:
             offsets = [sum(counts[:p]) for p in range(self.size)]
             self.house_slice_offsets = np.array(offsets)
 
+    def find_all_nearest_locations(self):
+        """
+        Identify the preferred locations of every house for each purpose,
+        taking into account distance, and to a lesser degree size. The
+        distance kernel is split over num_threads threads; the random
+        choice for "fixed" location types is made afterwards, in house order.
+        Returns the selected location indices of every house.
+        """
+        hx = np.array([h.location_x for h in self.houses], dtype="f8")
+        hy = np.array([h.location_y for h in self.houses], dtype="f8")
+
+        codes = self.config.building_types_dict
+        nearest = {}
+        for l in self.config.building_types:
+            if l not in self.locations.keys():
+                print("WARNING: location type missing")
+                continue
+
+            locs = self.locations[l]
+            if min([element.sqm for element in locs]) <= 0:
+                print("WARNING: location type with 0 sqm")
+                print(f"type: {l}")
+                print(
+                    "These errors are commonly caused by corruptions in the <building>.csv file."
+                )
+                print("To detect these, you can use the following command:")
+                print('cat <buildings file name>.csv | grep -v house | grep ",0$"')
+                sys.exit()
+
+            lx = np.array([element.x for element in locs], dtype="f8")
+            ly = np.array([element.y for element in locs], dtype="f8")
+            sqrt_sqm = np.sqrt(np.array([element.sqm for element in locs], dtype="f8"))
+            k = min(self.config.neighbours[codes[l]], len(locs))
+
+            out = np.zeros((len(self.houses), k), dtype="int64")
+            parallel_for(
+                lambda start, stop, out=out, lx=lx, ly=ly, s=sqrt_sqm, k=k: nearest_kernel(
+                    out, hx, hy, lx, ly, s, k, start, stop
+                ),
+                len(self.houses),
+                self.num_threads,
+                min_chunk=64,
+            )
+            nearest[l] = out
+
+        all_indices = []
+        for i, h in enumerate(self.houses):
+            n = []
+            ni = []
+            for l in self.config.building_types:
+                if l not in nearest:
+                    n.append(None)
+                    ni.append([])
+                    continue
+                indices = list(nearest[l][i])
+                if self.config.fixed[codes[l]]:
+                    indices = list(get_rng("population").choice(indices, 1))
+                n.append([self.locations[l][j] for j in indices])
+                ni.append(indices)
+            h.nearest_locations = n
+            all_indices.append(ni)
+        return all_indices
+
     def add_infections(self, num, severity="exposed"):
         """
         Randomly add infections.
@@ -376,7 +510,7 @@ class Ecosystem:
             infected = False
             attempts = 0
             while infected == False and attempts < 500:
-                house = int(get_random_int(len(self.houses)))
+                house = int(get_random_int(len(self.houses), "infections"))
                 infected = self.houses[house].add_infection(self, severity)
                 attempts += 1
             if attempts > 499:
@@ -411,8 +545,62 @@ class Ecosystem:
 
         selected_house.add_infection_by_age(self, age)
 
+    def get_touched_locations(self):
+        """
+        Return a mask over loc_inf_minutes of the locations that agents on
+        this rank can visit.
+        """
+        touched = np.zeros(self.number_of_non_house_locations, dtype=bool)
+        for h in self.houses:
+            for locs in h.nearest_locations:
+                if locs is None:
+                    continue
+                for l in locs:
+                    touched[l.loc_inf_minutes_id] = True
+
+        # hospitalised agents are sent to any large hospital (see find_hospital).
+        for l in self.locations.get("hospital", []):
+            if l.sqm > 4000:
+                touched[l.loc_inf_minutes_id] = True
+
+        for loc_type in self.loc_groups:
+            for l in self.loc_groups[loc_type].values():
+                touched[l.loc_inf_minutes_id] = True
+
+        return touched
+
+    def setup_border_exchange(self):
+        """
+        Set up the exchange of infectious minutes for border locations.
+        Only used with spatial decomposition, where each rank owns a contiguous
+        region and most locations are only visited from a single rank.
+        """
+        if self.mode != "parallel" or self.size == 1:
+            return
+
+        self.border_exchange = BorderExchange(
+            self.mpi.comm, self.get_touched_locations()
+        )
+        if self.verbose:
+            print(
+                "rank {}: {} locations visited, {} on borders with ranks {}".format(
+                    self.rank,
+                    self.border_exchange.num_touched,
+                    self.border_exchange.num_border,
+                    list(self.border_exchange.neighbours),
+                )
+            )
+
     def _aggregate_loc_inf_minutes(self):
-        if self.mode == "parallel":
+        if self.border_exchange is not None:
+            start = perf_counter()
+            self.loc_inf_minutes = self.border_exchange.exchange(self.loc_inf_minutes)
+            self.mpi.stats.record(
+                "border_exchange",
+                perf_counter() - start,
+                self.border_exchange.num_bytes,
+            )
+        elif self.size > 1:
             # print("loc inf min local: ", self.mpi.rank, self.loc_inf_minutes, type(self.loc_inf_minutes[0]))
             self.loc_inf_minutes = self.mpi.CalcCommWorldTotalDouble(
                 self.loc_inf_minutes
@@ -425,12 +613,322 @@ class Ecosystem:
             rank += 1
         return rank
 
+    def rebalance(self):
+        """
+        Migrate houses between ranks when the compute time per step is
+        imbalanced by more than rebalance_threshold (max / mean over ranks).
+        Uses the compute time of the steps since the previous rebalance.
+        """
+        if self.size == 1 or len(self.step_times) == 0:
+            return False
+
+        local_cost = float(np.mean(self.step_times))
+        self.step_times = []
+
+        costs, counts = zip(*self.mpi.comm.allgather((local_cost, len(self.houses))))
+        imbalance = get_imbalance(costs)
+        if imbalance <= self.rebalance_threshold:
+            return False
+
+        destinations = get_destinations(costs, counts, self.rank)
+        num_moved = migrate_houses(self, destinations)
+
+        if self.border_exchange is not None:
+            self.setup_border_exchange()
+
+        counts = self.mpi.comm.gather(len(self.houses))
+        if self.rank == 0:
+            print(
+                "Rebalanced at t {}: imbalance {:.2f}, houses per rank {}.".format(
+                    self.time, imbalance, counts
+                )
+            )
+        if self.verbose:
+            print("rank {}: {} houses moved out.".format(self.rank, num_moved))
+        return True
+
+    def clear_visits(self):
+        """Remove the visits of the previous day, and return their number."""
+
+        total_visits = 0
+        for lk in self.locations.keys():
+            for l in self.locations[lk]:
+                total_visits += len(l.visits)
+                l.clear_visits(self)
+        self.reset_loc_inf_minutes()
+        return total_visits
+
+    def get_agents(self):
+        """Return the agents of this rank, in house order."""
+
+        return [a for h in self.houses for hh in h.households for a in hh.agents]
+
+    def plan_visits(self):
+        """Let every agent plan (and register) its visits for the day."""
+
+        if self.step_kernels:
+            planned = []
+            for h in self.houses:
+                for hh in h.households:
+                    for a in hh.agents:
+                        a.plan_visits(self, planned=planned)
+            self.register_visits(planned)
+            return
+
+        for h in self.houses:
+            for hh in h.households:
+                for a in hh.agents:
+                    a.plan_visits(self)
+
+    def register_visits(self, planned):
+        """
+        Register the planned (location, agent, minutes) visits at once with
+        the register_visits kernel, instead of one by one. Unlike the other
+        step kernels, it is not split over threads, as visits to the same
+        location add to its infectious minutes in visit order.
+        """
+
+        if not planned:
+            return
+
+        quarantined = {}  # id(household) -> household has infectious agents.
+        for _, a, _ in planned:
+            if id(a.household) not in quarantined:
+                quarantined[id(a.household)] = a.household.is_infected()
+
+        hospital = self.config.building_types_dict["hospital"]
+        out_time = np.zeros(len(planned), dtype="f8")
+        get_step_kernel("register_visits")(
+            out_time,
+            self.loc_inf_minutes,
+            np.array([l.loc_inf_minutes_id for l, _, _ in planned], dtype="i8"),
+            np.array([l.avg_visit_time for l, _, _ in planned], dtype="f8"),
+            np.array([minutes for _, _, minutes in planned], dtype="f8"),
+            np.array([a.status_code for _, a, _ in planned], dtype="i8"),
+            np.array([a.hospitalised for _, a, _ in planned], dtype=bool),
+            np.array([quarantined[id(a.household)] for _, a, _ in planned], dtype=bool),
+            np.array([l.type_code == hospital for l, _, _ in planned], dtype=bool),
+            get_rng("visits").random(len(planned)),
+            float(self.self_isolation_multiplier),
+            float(self.household_isolation_multiplier),
+            float(self.hospital_protection_factor),
+        )
+        for i in np.flatnonzero(out_time):
+            l, a, _ = planned[i]
+            l.visits.append([a, float(out_time[i])])
+
+    def progress_conditions(self):
+        """Progress the condition of every agent."""
+
+        if self.step_kernels:
+            # only the agents selected by the kernel change (or draw numbers).
+            agents = self.get_agents()
+            due = np.zeros(len(agents), dtype=bool)
+            status = np.array([a.status_code for a in agents], dtype="i8")
+            change_time = np.array([a.status_change_time for a in agents], dtype="f8")
+            phase_duration = np.array([a.phase_duration for a in agents], dtype="f8")
+            kernel = get_step_kernel("progression")
+            parallel_for(
+                lambda start, stop: kernel(
+                    due[start:stop],
+                    float(self.time),
+                    status[start:stop],
+                    change_time[start:stop],
+                    phase_duration[start:stop],
+                    float(self.disease.immunity_duration),
+                ),
+                len(agents),
+                self.num_threads,
+            )
+            for i in np.flatnonzero(due):
+                agents[i].progress_condition(self, self.time, self.disease)
+            return
+
+        for h in self.houses:
+            for hh in h.households:
+                for a in hh.agents:
+                    a.progress_condition(self, self.time, self.disease)
+
+    def vaccinate(self):
+        """Hand out the vaccinations available today to eligible agents."""
+
+        for h in self.houses:
+            for hh in h.households:
+                for a in hh.agents:
+                    self.vaccinate_agent(a)
+        self.vaccinate_remaining()
+
+    def vaccinate_agent(self, a):
+        """Vaccinate an eligible agent above the age limit, if doses are left."""
+
+        if (
+            a.age > self.vaccinations_age_limit
+            and self.vaccinations_available - self.vaccinations_today > 0
+        ):
+            if check_vac_eligibility(a) == True:
+                a.vaccinate(
+                    self.time,
+                    self.vac_no_symptoms,
+                    self.vac_no_transmission,
+                    self.vac_duration,
+                )
+                self.vaccinations_today += 1
+
+    def vaccinate_remaining(self):
+        """Hand out the doses left to eligible agents above the legal age limit."""
+
+        if self.vaccinations_available - self.vaccinations_today > 0:
+            for h in self.houses:
+                for hh in h.households:
+                    for a in hh.agents:
+                        if self.vaccinations_available - self.vaccinations_today > 0:
+                            if (
+                                a.age > self.vaccinations_legal_age_limit
+                                and check_vac_eligibility(a) == True
+                            ):
+                                a.vaccinate(
+                                    self.time,
+                                    self.vac_no_symptoms,
+                                    self.vac_no_transmission,
+                                    self.vac_duration,
+                                )
+                                self.vaccinations_today += 1
+
+    def update_agents(self):
+        """
+        Let every agent in turn plan (and register) its visits, progress its
+        condition and get vaccinated, so that later agents see the changes of
+        earlier ones, e.g. a housemate who became infectious. This is what
+        evolve runs; plan_visits, progress_conditions and vaccinate run one
+        phase for all agents, so that the phases can be benchmarked on their
+        own. With profiling on, each phase of each agent is timed separately,
+        otherwise the whole loop is one phase. The step kernels run each
+        phase for all agents at once instead.
+        """
+
+        timers = self.timers
+        if self.step_kernels:
+            self.plan_visits()
+            timers.lap("plan_visits")
+            self.progress_conditions()
+            timers.lap("progress_conditions")
+            self.vaccinate()
+            timers.lap("vaccinate")
+            return
+
+        profile = self.profile  # a lap per agent and phase is not free.
+        for h in self.houses:
+            for hh in h.households:
+                for a in hh.agents:
+                    a.plan_visits(self)
+                    if profile:
+                        timers.lap("plan_visits")
+                    a.progress_condition(self, self.time, self.disease)
+                    if profile:
+                        timers.lap("progress_conditions")
+                    self.vaccinate_agent(a)
+                    if profile:
+                        timers.lap("vaccinate")
+        self.vaccinate_remaining()
+        timers.lap("vaccinate" if profile else "update_agents")
+
+    def evolve_locations(self, reduce_stochasticity=False):
+        """Spread infections during the visits to all open locations."""
+
+        open_locations = []
+        for lk in self.locations:
+            if lk in self.closures:
+                if self.closures[lk] < self.time:
+                    continue
+            open_locations += self.locations[lk]
+
+        if not self.step_kernels or reduce_stochasticity:
+            for l in open_locations:
+                l.evolve(self, reduce_stochasticity)
+            return
+
+        visitors = []
+        visited = []  # location of every visit.
+        minutes = []
+        for l in open_locations:
+            self.base_rate += float(self.loc_base_rates[l.loc_inf_minutes_id])
+            self.loc_evolves += len(l.visits)
+            for person, visit_time in l.visits:
+                visitors.append(person)
+                visited.append(l)
+                minutes.append(visit_time)
+
+        infected = np.zeros(len(visitors), dtype=bool)
+        rates = self.loc_base_rates[[l.loc_inf_minutes_id for l in visited]]
+        minutes = np.array(minutes, dtype="f8")
+        status = np.array([p.status_code for p in visitors], dtype="i8")
+        uniforms = get_rng("infections").random(len(visitors))
+        kernel = get_step_kernel("location_infection")
+        parallel_for(
+            lambda start, stop: kernel(
+                infected[start:stop],
+                rates[start:stop],
+                minutes[start:stop],
+                status[start:stop],
+                uniforms[start:stop],
+            ),
+            len(visitors),
+            self.num_threads,
+        )
+        for i in np.flatnonzero(infected):
+            # an agent can be infected during several visits, but only once.
+            if visitors[i].status_code == SUSCEPTIBLE:
+                visitors[i].infect(self, location_type=visited[i].loc_type)
+
+    def evolve_households(self):
+        """Spread infections within the households of every house."""
+
+        if not self.step_kernels:
+            for h in self.houses:
+                h.evolve(self, self.disease)
+            return
+
+        households = [hh for h in self.houses for hh in h.households]
+        agents = [a for hh in households for a in hh.agents]
+        offsets = np.zeros(len(households) + 1, dtype="i8")
+        offsets[1:] = np.cumsum([len(hh.agents) for hh in households])
+
+        infected = np.zeros(len(agents), dtype=bool)
+        status = np.array([a.status_code for a in agents], dtype="i8")
+        hospitalised = np.array([a.hospitalised for a in agents], dtype=bool)
+        factor = (
+            self.contact_rate_multiplier["house"]
+            * self.disease.infection_rate
+            * HOME_INTERACTION_FRACTION
+        )
+        uniforms = get_rng("infections").random(len(agents))
+        kernel = get_step_kernel("household_infection")
+
+        def run_households(start, stop):
+            # the agents of households [start, stop).
+            s = slice(offsets[start], offsets[stop])
+            kernel(
+                infected[s],
+                offsets[start : stop + 1] - offsets[start],
+                status[s],
+                hospitalised[s],
+                factor,
+                uniforms[s],
+            )
+
+        parallel_for(run_households, len(households), self.num_threads)
+        for i in np.flatnonzero(infected):
+            agents[i].infect(self)
+
     def evolve(self, reduce_stochasticity=False):
+        step_start = perf_counter()
+        comm_start = self.mpi.comm_time
+        self.timers.start()
         self.num_infections_today = 0
         self.num_hospitalisations_today = 0
         self.vaccinations_today = 0
 
-        if self.mode == "parallel" and reduce_stochasticity == True:
+        if self.size > 1 and reduce_stochasticity == True:
             reduce_stochasticity = False
             if self.rank == 0:
                 print(
@@ -438,8 +936,6 @@ class Ecosystem:
                 )
 
         # remove visits from the previous day
-        total_visits = 0
-
         if self.debug_mode:
             self.visit_minutes = self.mpi.CalcCommWorldTotalSingle(self.visit_minutes)
             self.base_rate = (
@@ -465,79 +961,69 @@ class Ecosystem:
             self.base_rate = 0.0
             self.loc_evolves = 0.0
 
-        for lk in self.locations.keys():
-            for l in self.locations[lk]:
-                total_visits += len(l.visits)
-                l.clear_visits(self)
-        self.reset_loc_inf_minutes()
+        total_visits = self.clear_visits()
+        self.timers.lap("clear_visits")
 
         if self.rank == 0 and self.verbose:
             print("total visits:", total_visits)
 
         # collect visits for the current day
-        for i in range(0, len(self.houses)):
-            h = self.houses[i]
-            for hh in h.households:
-                for a in hh.agents:
-                    a.plan_visits(self)
-                    a.progress_condition(self, self.time, self.disease)
-
-                    if (
-                        a.age > self.vaccinations_age_limit
-                        and self.vaccinations_available - self.vaccinations_today > 0
-                    ):
-                        if check_vac_eligibility(a) == True:
-                            a.vaccinate(
-                                self.time,
-                                self.vac_no_symptoms,
-                                self.vac_no_transmission,
-                                self.vac_duration,
-                            )
-                            self.vaccinations_today += 1
-
-        if self.vaccinations_available - self.vaccinations_today > 0:
-            for i in range(0, len(self.houses)):
-                h = self.houses[i]
-                for hh in h.households:
-                    for a in hh.agents:
-                        # print("VAC:",self.vaccinations_available, self.vaccinations_today, self.vac_no_symptoms, self.vac_no_transmission, file=sys.stderr)
-                        if self.vaccinations_available - self.vaccinations_today > 0:
-                            if (
-                                a.age > self.vaccinations_legal_age_limit
-                                and check_vac_eligibility(a) == True
-                            ):
-                                a.vaccinate(
-                                    self.time,
-                                    self.vac_no_symptoms,
-                                    self.vac_no_transmission,
-                                    self.vac_duration,
-                                )
-                                self.vaccinations_today += 1
+        self.update_agents()
 
         self._aggregate_loc_inf_minutes()
         if self.rank == 0 and self.verbose:
             print(self.rank, np.sum(self.loc_inf_minutes))
+        self.timers.lap("exchange")
+        self.compute_base_rates()
+        self.timers.lap("base_rates")
 
         # process visits for the current day (spread infection).
-        for lk in self.locations:
-            if lk in self.closures:
-                if self.closures[lk] < self.time:
-                    continue
-            for l in self.locations[lk]:
-                l.evolve(self, reduce_stochasticity)
+        self.evolve_locations(reduce_stochasticity)
+        self.timers.lap("locations")
 
         # process intra-household infection spread.
-        for i in range(0, len(self.houses)):
-            h = self.houses[i]
-            h.evolve(self, self.disease)
+        self.evolve_households()
+        self.timers.lap("households")
 
         # process infection via public transport.
         self.evolve_public_transport()
+        self.timers.lap("transport")
+
+        # time spent waiting in collectives is excluded from the compute time.
+        comm_time = self.mpi.comm_time - comm_start
+        compute_time = perf_counter() - step_start - comm_time
+        self.step_times.append(compute_time)
+        self.mpi.stats.end_step(compute_time, comm_time)
+        self.timers.times["compute"] = compute_time
+        self.timers.times["comm_wait"] = comm_time
+
+        if self.memory_report is not None:
+            self.memory_report.measure_step(self)  # before the buffers are emptied.
+            self.timers.lap("memory_report")
+
+        event_logger.flush()  # write the events of this step in bulk.
+        self.timers.lap("event_logs")
 
         self.time += 1
         self.date = self.date + timedelta(days=1)
         self.seasonal_effect = self.get_seasonal_effect()
 
+        if self.rebalance_interval > 0 and self.time % self.rebalance_interval == 0:
+            self.rebalance()
+        self.timers.lap("rebalance")
+
+        if self.profile:
+            self.write_profile(self.time - 1)
+
+    def write_profile(self, time=None):
+        """
+        Write the min/mean/max over ranks of the timed phases, to the
+        per-step timing csv, or to the start-up one when time is None.
+        """
+        stats = self.timers.get_stats(self.mpi.comm)
+        if stats is not None:
+            write_phase_stats(get_profile_file(startup=time is None), stats, time)
+
     def addHouse(self, name, x, y, num_households=1):
         house = House(x, y)
         house.add_households(self.household_size, self.ages, num_households)
@@ -554,8 +1040,8 @@ class Ecosystem:
 
         data = None
         if self.mpi.rank == 0:
-            x = random.uniform(xbounds[0], xbounds[1])
-            y = random.uniform(ybounds[0], ybounds[1])
+            x = get_rng("population").uniform(xbounds[0], xbounds[1])
+            y = get_rng("population").uniform(ybounds[0], ybounds[1])
             data = [x, y]
 
         data = self.mpi.comm.bcast(data, root=0)
@@ -587,12 +1073,12 @@ class Ecosystem:
                 for k, e in enumerate(self.houses):
                     for hh in e.households:
                         for a in hh.agents:
-                            if probability(fraction):
+                            if probability(fraction, "population"):
                                 a.school_from_home = True
                             else:
                                 a.school_from_home = False
             else:
-                needs.scale_needs(loc_type, 1.0 - fraction)
+                self.config.needs.scale_needs(loc_type, 1.0 - fraction)
 
         elif loc_type == "office":
             fraction = min(fraction, 1.0 - self.keyworker_fraction)
@@ -600,18 +1086,18 @@ class Ecosystem:
                 for k, e in enumerate(self.houses):
                     for hh in e.households:
                         for a in hh.agents:
-                            if probability(fraction):
+                            if probability(fraction, "population"):
                                 a.work_from_home = True
                             else:
                                 a.work_from_home = False
             else:
-                needs.scale_needs(loc_type, 1.0 - fraction)
+                self.config.needs.scale_needs(loc_type, 1.0 - fraction)
 
         else:
             if loc_type == "school_parttime":
                 loc_type = "school"
 
-            needs.scale_needs(loc_type, 1.0 - fraction)
+            self.config.needs.scale_needs(loc_type, 1.0 - fraction)
 
     def undo_partial_closure(self, loc_type, fraction=0.8):
         if loc_type == "school":
@@ -625,10 +1111,10 @@ class Ecosystem:
                     for a in hh.agents:
                         a.work_from_home = False
         else:
-            needs.scale_needs(loc_type, 1.0 / (1.0 - fraction))
+            self.config.needs.scale_needs(loc_type, 1.0 / (1.0 - fraction))
 
     def initialise_social_distance(self, contact_ratio=1.0):
-        for l in building_types_dict:
+        for l in self.config.building_types_dict:
             self.contact_rate_multiplier[l] = contact_ratio
         self.contact_rate_multiplier["house"] = 1.0
         self.print_contact_rate("Reset to no measures")
@@ -646,10 +1132,9 @@ class Ecosystem:
         self.print_contact_rate("Removal of SD")
 
     def remove_all_measures(self):
-        global needs
         self.initialise_social_distance()
         self.remove_closures()
-        needs = Needs(self.needsfile, building_types)
+        self.config.reset_needs()
         for k, e in enumerate(self.houses):
             for hh in e.households:
                 for a in hh.agents:
@@ -731,15 +1216,6 @@ class Ecosystem:
             "Household isolation with {} multiplier".format(multiplier)
         )
 
-    def add_cum_column(self, csv_file, cum_columns):
-        if self.rank == 0:
-            df = pd.read_csv(csv_file, index_col=None, header=0)
-
-            for column in cum_columns:
-                df["cum %s" % (column)] = df[column].cumsum()
-
-            df.to_csv(csv_file, index=False)
-
     def find_hospital(self):
         hospitals = []
         sqms = []
@@ -757,7 +1233,7 @@ class Ecosystem:
                 print("Error: couldn't find hospitals with more than 4000 sqm.")
                 sys.exit()
         sqms = [float(i) / sum(sqms) for i in sqms]
-        return np.random.choice(hospitals, p=sqms)
+        return get_rng("population").choice(hospitals, p=sqms)
 
     def print_needs(self):
         for k, e in enumerate(self.houses):
@@ -772,39 +1248,38 @@ class Ecosystem:
         if self.rank == 0:
             out = out_files.open(outfile)
             print(
-                "#time,date,susceptible,exposed,infectious,recovered,dead,immune,num infections today,num hospitalisations today,hospital bed occupancy,num hospitalisations today (data)",
+                "#time,date,susceptible,exposed,infectious,recovered,dead,immune,num infections today,num hospitalisations today,hospital bed occupancy,num hospitalisations today (data),cum num hospitalisations today,cum num infections today",
                 file=out,
                 flush=True,
             )
 
     def print_status(self, outfile, silent=False):
-        local_stats = {
-            "susceptible": 0,
-            "exposed": 0,
-            "infectious": 0,
-            "recovered": 0,
-            "dead": 0,
-            "immune": 0,
-            "num_infections_today": self.num_infections_today,
-            "num_hospitalisations_today": self.num_hospitalisations_today,
-            "num_hospitalised": self.num_hospitalised,
-        }
-        for k, elem in enumerate(self.houses):
+        counts = [0] * len(STATUS_NAMES)  # agents per status code.
+        for elem in self.houses:
             for hh in elem.households:
                 for a in hh.agents:
-                    # print(hh,a, a.status)
-                    local_stats[a.status] += 1
-        self.mpi.gather_stats(self, list(local_stats.values()))
+                    counts[a.status_code] += 1
+        local_stats = counts + [
+            self.num_infections_today,
+            self.num_hospitalisations_today,
+            self.num_hospitalised,
+        ]
+        self.mpi.gather_stats(self, local_stats)
         if not silent:
             if self.rank == 0:
                 out = out_files.open(outfile)
                 t = max(0, self.time)
 
+                self.cum_hospitalisations += self.global_stats[7]
+                self.cum_infections += self.global_stats[6]
+
                 print(
                     self.time,
                     self.get_date_string(),
                     *self.global_stats,
                     self.validation[t],
+                    self.cum_hospitalisations,
+                    self.cum_infections,
                     sep=",",
                     file=out,
                     flush=True,
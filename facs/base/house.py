@@ -1,26 +1,24 @@
 """Module for the House class."""
 
 from __future__ import annotations
-import sys
 
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
-import numpy as np
-
 from .household import Household
 from .location import Location
-from .utils import get_random_int, calc_dist
-from .location_types import building_types, building_types_data
+from .random_streams import get_rng
+from .status import SUSCEPTIBLE
+from .utils import get_random_int
 
 if TYPE_CHECKING:
     from .facs import Ecosystem
     from .disease import Disease
 
 
-@dataclass
+@dataclass(slots=True)
 class House:
-    """Class for House."""
+    """Class for House. Uses __slots__, as a borough has many houses."""
 
     location_x: float
     location_y: float
@@ -35,7 +33,7 @@ class House:
         """Add households to the house."""
 
         for _ in range(num_households):
-            size = 1 + np.random.poisson(household_size - 1)
+            size = 1 + get_rng("population").poisson(household_size - 1)
             self.total_size += size
             self.households.append(Household(self, ages, size))
 
@@ -50,60 +48,14 @@ class House:
         for household in self.households:
             household.evolve(e, disease)
 
-    def find_nearest_locations(self, e: Ecosystem):
-        """
-        identify preferred locations for each particular purpose,
-        and store in an array.
-
-        Takes into account distance, and to a lesser degree size.
-        """
-        n = []
-        ni = []
-        for l in building_types:
-            if l not in e.locations.keys():
-                n.append(None)
-                print("WARNING: location type missing")
-
-            if min([element.sqm for element in e.locations[l]]) <= 0:
-                print("WARNING: location type with 0 sqm")
-                print(f"type: {l}")
-                print(
-                    "These errors are commonly caused by corruptions in the <building>.csv file."
-                )
-                print("To detect these, you can use the following command:")
-                print('cat <buildings file name>.csv | grep -v house | grep ",0$"')
-                sys.exit()
-
-            scaled_distances = [
-                calc_dist(self.location_x, self.location_y, element.x, element.y)
-                / np.sqrt(element.sqm)
-                for element in e.locations[l]
-            ]
-            sorted_indices = sorted(
-                range(len(scaled_distances)), key=lambda k: scaled_distances[k]
-            )
-            num_neighbours = building_types_data[l]["neighbours"]
-            sorted_indices_truncated = sorted_indices[:num_neighbours]
-
-            if building_types_data[l]["fixed"]:
-                sorted_indices_truncated = list(
-                    np.random.choice(sorted_indices_truncated, 1)
-                )
-
-            n.append([e.locations[l][i] for i in sorted_indices_truncated])
-            ni.append(sorted_indices_truncated)
-
-        self.nearest_locations = n
-        return ni
-
     def add_infection(self, e, severity="exposed"):
         """Pre-seed infections in the house."""
 
         # could target using age later on
 
-        hh = int(get_random_int(len(self.households)))
-        p = get_random_int(len(self.households[hh].agents))
-        if self.households[hh].agents[p].status == "susceptible":
+        hh = int(get_random_int(len(self.households), "infections"))
+        p = get_random_int(len(self.households[hh].agents), "infections")
+        if self.households[hh].agents[p].status_code == SUSCEPTIBLE:
             # because we do pre-seeding we need to ensure we add exactly 1 infection.
             self.households[hh].agents[p].infect(e, severity)
             return True
@@ -115,7 +67,7 @@ class House:
         for household in self.households:
             for agent in household.agents:
                 if agent.age == age:
-                    if age.status == "susceptible":
+                    if agent.status_code == SUSCEPTIBLE:
                         return True
         return False
 
@@ -125,5 +77,5 @@ class House:
         for hh in self.households:
             for a in hh.agents:
                 if a.age == age:
-                    if a.status == "susceptible":
+                    if a.status_code == SUSCEPTIBLE:
                         a.infect(e, severity="exposed")
@@ -2,13 +2,13 @@
 
 from __future__ import annotations
 
-import random
-
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Optional
 from warnings import warn
 
 from .person import Person
+from .random_streams import get_rng
+from .status import SUSCEPTIBLE, INFECTIOUS
 from .utils import probability
 
 if TYPE_CHECKING:
@@ -25,9 +25,9 @@ class House:
     """Dummy class for House for typehints."""
 
 
-@dataclass
+@dataclass(slots=True)
 class Household:
-    """Class for Household."""
+    """Class for Household. Uses __slots__, as a borough has many households."""
 
     house: House
     ages: list[float]
@@ -39,7 +39,7 @@ class Household:
         """Post init function."""
 
         if self.size is None:
-            self.size = random.choice([1, 2, 3, 4])
+            self.size = int(get_rng("population").choice([1, 2, 3, 4]))
 
         if self.size < 1:
             raise ValueError("Household size must be at least 1.")
@@ -56,7 +56,7 @@ class Household:
             list(
                 agent
                 for agent in self.agents
-                if agent.status == "infectious" and not agent.hospitalised
+                if agent.status_code == INFECTIOUS and not agent.hospitalised
             )
         )
 
@@ -69,15 +69,17 @@ class Household:
         """Evolve the household."""
 
         ic = self.get_infectious_count()
-        for i in range(0, self.size):
-            if self.agents[i].status == "susceptible":
-                if ic > 0:
-                    infection_chance = (
-                        eco.contact_rate_multiplier["house"]
-                        * disease.infection_rate
-                        * HOME_INTERACTION_FRACTION
-                        * ic
-                    )
-                    # house infection already incorporates airflow, because derived from literature.
-                    if probability(infection_chance):
-                        self.agents[i].infect(eco)
+        if ic == 0:
+            return
+
+        infection_chance = (
+            eco.contact_rate_multiplier["house"]
+            * disease.infection_rate
+            * HOME_INTERACTION_FRACTION
+            * ic
+        )
+        # house infection already incorporates airflow, because derived from literature.
+        for agent in self.agents:
+            if agent.status_code == SUSCEPTIBLE:
+                if probability(infection_chance):
+                    agent.infect(eco)
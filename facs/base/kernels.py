@@ -0,0 +1,329 @@
+"""
+Module for array kernels that are split over a pool of threads, and for the
+optional step kernels.
+
+Each threaded kernel works on a disjoint index range [start, stop), so the
+threads never write to the same elements. NumPy releases the GIL inside its
+array operations, which lets an MPI rank (or shared memory worker) use
+several cores for these kernels.
+
+The step kernels run the visit registration, location infection, household
+infection and progression checks over arrays gathered from the agents (see
+Ecosystem.step_kernels). Every step kernel has a NumPy version and a loop
+version with the same results, which is compiled with Numba when use_numba
+is called and Numba is installed. Both versions take the same pre-drawn
+uniform numbers, so they give the same results for a fixed seed. The
+progression, location infection and household infection kernels are split
+over threads with parallel_for; the compiled versions release the GIL. As
+utils.probability does for the object path, the infection kernels raise a
+ValueError when a susceptible agent gets an infection chance above one.
+"""
+
+from __future__ import annotations
+
+import os
+import warnings
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .status import SUSCEPTIBLE, EXPOSED, INFECTIOUS, RECOVERED, DEAD, IMMUNE
+
+MIN_CHUNK = 256  # smallest index range worth handing to a thread.
+
+_pools = {}
+_compiled = {}  # step kernel name -> Numba compiled loop version.
+
+# the threads of a pool do not survive a fork, so forked processes start anew.
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+def get_default_threads(local_size: int = 1) -> int:
+    """Return the number of cores per process on this node."""
+
+    return max(1, (os.cpu_count() or 1) // max(1, local_size))
+
+
+def parallel_for(func, n: int, num_threads: int = 1, min_chunk: int = MIN_CHUNK):
+    """
+    Call func(start, stop) on disjoint chunks covering range(n).
+    Chunks are run on a thread pool when num_threads > 1.
+    """
+
+    num_chunks = max(1, min(num_threads, n // max(1, min_chunk)))
+    bounds = np.linspace(0, n, num_chunks + 1).astype(int)
+
+    if num_chunks == 1:
+        func(0, n)
+        return
+
+    if num_threads not in _pools:
+        _pools[num_threads] = ThreadPoolExecutor(max_workers=num_threads)
+
+    futures = [
+        _pools[num_threads].submit(func, bounds[i], bounds[i + 1])
+        for i in range(num_chunks)
+    ]
+    for future in futures:
+        future.result()  # re-raises exceptions from the threads.
+
+
+def base_rates_kernel(
+    out, loc_inf_minutes, multipliers, airflow, sqm, start: int, stop: int
+):
+    """
+    Compute the infection base rate of locations [start, stop) (see
+    Location.evolve for the derivation).
+
+    multipliers: 4 * seasonal effect * contact rate multiplier * infection
+    rate per location; airflow: airflow coefficient per location.
+    """
+    # pylint: disable=too-many-arguments
+
+    minutes_opened = 12 * 60
+    s = slice(start, stop)
+    out[s] = (multipliers[s] * loc_inf_minutes[s]) / (
+        airflow[s] * 24.0 * 60.0 * sqm[s] * minutes_opened
+    )
+
+
+def nearest_kernel(out, hx, hy, lx, ly, sqrt_sqm, k: int, start: int, stop: int):
+    """
+    Find the k locations with the smallest size-scaled distance for houses
+    [start, stop), sorted by scaled distance.
+
+    Equal distances are ordered by location index, as with a stable sort of
+    all locations.
+    """
+    # pylint: disable=too-many-arguments
+
+    num_locs = lx.size
+    k = min(k, num_locs)
+    block = 64  # houses per distance matrix, to bound the memory use.
+
+    for b in range(start, stop, block):
+        e = min(b + block, stop)
+        dx = hx[b:e, None] - lx[None, :]
+        dy = hy[b:e, None] - ly[None, :]
+        dist = np.sqrt(dx**2 + dy**2) / sqrt_sqm[None, :]
+
+        if k < num_locs:
+            # include every location that ties with the k-th smallest distance.
+            kth = np.partition(dist, k - 1, axis=1)[:, k - 1 : k]
+            for i in range(e - b):
+                candidates = np.flatnonzero(dist[i] <= kth[i])
+                order = np.lexsort((candidates, dist[i, candidates]))
+                out[b + i] = candidates[order[:k]]
+        else:
+            out[b:e] = np.argsort(dist, axis=1, kind="stable")
+
+
+def register_visits_numpy(
+    out_time,
+    loc_inf_minutes,
+    loc_ids,
+    avg_time,
+    need,
+    status,
+    hospitalised,
+    quarantined,
+    at_hospital,
+    uniforms,
+    self_isolation,
+    household_isolation,
+    hospital_protection,
+):
+    """
+    Accept or reject planned visits, as Location.register_visit does for one
+    visit. Sets out_time to the visit time of the accepted visits (0 for the
+    others), and adds the infectious minutes to loc_inf_minutes in visit order.
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+
+    infectious = status == INFECTIOUS
+    visit_time = avg_time.copy()
+    visit_time[infectious] *= self_isolation
+    visit_time[~infectious & quarantined] *= household_isolation
+
+    alive = status != DEAD
+    treated = alive & infectious & at_hospital & hospitalised
+    valid = alive & ~treated & (visit_time > 0.0)
+
+    prob = np.zeros(status.size)
+    prob[valid] = np.minimum(need[valid] / (visit_time[valid] * 7), 1.0)
+    accepted = valid & (uniforms < prob)
+    out_time[:] = np.where(accepted, visit_time, 0.0)
+
+    minutes = np.where(treated, need / 7 * hospital_protection, 0.0)
+    minutes = np.where(accepted & infectious, visit_time, minutes)
+    np.add.at(loc_inf_minutes, loc_ids, minutes)
+
+
+def register_visits_loop(
+    out_time,
+    loc_inf_minutes,
+    loc_ids,
+    avg_time,
+    need,
+    status,
+    hospitalised,
+    quarantined,
+    at_hospital,
+    uniforms,
+    self_isolation,
+    household_isolation,
+    hospital_protection,
+):
+    """Loop version of register_visits_numpy."""
+    # pylint: disable=too-many-arguments
+
+    for i in range(status.size):
+        out_time[i] = 0.0
+        if status[i] == DEAD:
+            continue
+        visit_time = avg_time[i]
+        if status[i] == INFECTIOUS:
+            visit_time *= self_isolation
+            if at_hospital[i] and hospitalised[i]:
+                loc_inf_minutes[loc_ids[i]] += need[i] / 7 * hospital_protection
+                continue
+        elif quarantined[i]:
+            visit_time *= household_isolation
+        if visit_time <= 0.0:
+            continue
+        if uniforms[i] < min(need[i] / (visit_time * 7), 1.0):
+            out_time[i] = visit_time
+            if status[i] == INFECTIOUS:
+                loc_inf_minutes[loc_ids[i]] += visit_time
+
+
+def location_infection_numpy(infected, rates, minutes, status, uniforms):
+    """Mark the susceptible visitors that are infected, as Location.evolve does."""
+
+    prob = minutes * rates
+    susceptible = (status == SUSCEPTIBLE) & (prob > 0.0)
+    if np.any(susceptible & (prob > 1.0)):
+        raise ValueError("prob must be between 0 and 1")
+    infected[:] = susceptible & (uniforms < prob)
+
+
+def location_infection_loop(infected, rates, minutes, status, uniforms):
+    """Loop version of location_infection_numpy."""
+
+    for i in range(status.size):
+        prob = minutes[i] * rates[i]
+        if status[i] == SUSCEPTIBLE and prob > 1.0:
+            raise ValueError("prob must be between 0 and 1")
+        infected[i] = status[i] == SUSCEPTIBLE and prob > 0.0 and uniforms[i] < prob
+
+
+def household_infection_numpy(
+    infected, offsets, status, hospitalised, factor, uniforms
+):
+    """
+    Mark the susceptible agents that are infected at home, as
+    Household.evolve does. The agents of household h are offsets[h] to
+    offsets[h + 1]; factor is the infection chance per infectious agent.
+    """
+    # pylint: disable=too-many-arguments
+
+    sizes = np.diff(offsets)
+    household = np.repeat(np.arange(sizes.size), sizes)
+    infectious = (status == INFECTIOUS) & ~hospitalised
+    counts = np.bincount(household[infectious], minlength=sizes.size)[household]
+    chance = factor * counts
+    susceptible = (status == SUSCEPTIBLE) & (counts > 0)
+    if np.any(susceptible & ((chance < 0.0) | (chance > 1.0))):
+        raise ValueError("prob must be between 0 and 1")
+    infected[:] = susceptible & (uniforms < chance)
+
+
+def household_infection_loop(infected, offsets, status, hospitalised, factor, uniforms):
+    """Loop version of household_infection_numpy."""
+    # pylint: disable=too-many-arguments
+
+    for h in range(offsets.size - 1):
+        count = 0
+        for i in range(offsets[h], offsets[h + 1]):
+            if status[i] == INFECTIOUS and not hospitalised[i]:
+                count += 1
+        chance = factor * count
+        for i in range(offsets[h], offsets[h + 1]):
+            if status[i] == SUSCEPTIBLE and count > 0 and not 0.0 <= chance <= 1.0:
+                raise ValueError("prob must be between 0 and 1")
+            infected[i] = (
+                status[i] == SUSCEPTIBLE and count > 0 and uniforms[i] < chance
+            )
+
+
+def progression_numpy(due, t, status, change_time, phase_duration, immunity_duration):
+    """
+    Mark the agents whose condition progresses at time t, that is, the agents
+    for which Person.progress_condition changes anything.
+    """
+    # pylint: disable=too-many-arguments
+
+    elapsed = t - change_time
+    due[:] = (change_time <= t) & (
+        ((status == EXPOSED) & (elapsed >= np.trunc(phase_duration)))
+        | ((status == INFECTIOUS) & (elapsed >= phase_duration))
+        | (
+            (immunity_duration > 0)
+            & ((status == RECOVERED) | (status == IMMUNE))
+            & (elapsed >= phase_duration)
+        )
+    )
+
+
+def progression_loop(due, t, status, change_time, phase_duration, immunity_duration):
+    """Loop version of progression_numpy."""
+    # pylint: disable=too-many-arguments
+
+    for i in range(status.size):
+        due[i] = False
+        if change_time[i] > t:
+            continue
+        elapsed = t - change_time[i]
+        if status[i] == EXPOSED:
+            due[i] = elapsed >= np.trunc(phase_duration[i])
+        elif status[i] == INFECTIOUS:
+            due[i] = elapsed >= phase_duration[i]
+        elif immunity_duration > 0 and (status[i] == RECOVERED or status[i] == IMMUNE):
+            due[i] = elapsed >= phase_duration[i]
+
+
+# step kernel name -> (NumPy version, loop version).
+STEP_KERNELS = {
+    "register_visits": (register_visits_numpy, register_visits_loop),
+    "location_infection": (location_infection_numpy, location_infection_loop),
+    "household_infection": (household_infection_numpy, household_infection_loop),
+    "progression": (progression_numpy, progression_loop),
+}
+
+
+def use_numba(enabled: bool = True) -> bool:
+    """
+    Select the Numba compiled step kernels, or the NumPy ones. Returns
+    whether the compiled kernels are used, which is False without Numba.
+    """
+
+    if not enabled:
+        _compiled.clear()
+        return False
+
+    try:
+        import numba  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        warnings.warn("Numba is not installed, using the NumPy step kernels.")
+        return False
+
+    for name, (_, loop) in STEP_KERNELS.items():
+        _compiled[name] = numba.njit(cache=True, nogil=True)(loop)
+    return True
+
+
+def get_step_kernel(name: str):
+    """Return the selected version of a step kernel."""
+
+    return _compiled.get(name, STEP_KERNELS[name][0])
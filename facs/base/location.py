@@ -2,16 +2,16 @@
 
 from dataclasses import dataclass, field
 
-from .location_types import building_types_dict
+from .config import get_config
+from .status import SUSCEPTIBLE, INFECTIOUS, DEAD
 from .utils import probability
 
-
 avg_visit_times = [90, 60, 60, 360, 360, 60, 60]  # average time spent per visit
 
 
-@dataclass
+@dataclass(slots=True)
 class Location:
-    """Class for Location."""
+    """Class for Location. Uses __slots__, as a borough has many locations."""
 
     # pylint: disable=too-many-instance-attributes
 
@@ -21,21 +21,36 @@ class Location:
     y: float
     sqm: int
 
-    links: list = field(default_factory=list)
-    closed_links: list = field(default_factory=list)
+    type_code: int = field(init=False, default=-1)
     loc_inf_minutes_id: int = -1
     visits: list = field(default_factory=list)
     avg_visit_time: int = 0
     visit_probability_counter: float = 0.5
 
     def __post_init__(self):
+        building_types_dict = get_config().building_types_dict
         if self.loc_type not in building_types_dict:
             raise ValueError(f"Location type {self.loc_type} not recognised.")
 
         if self.loc_type == "park":
             self.sqm *= 10
 
-        self.avg_visit_time = avg_visit_times[building_types_dict[self.loc_type]]
+        self.type_code = building_types_dict[self.loc_type]
+        self.avg_visit_time = avg_visit_times[self.type_code]
+
+    def __getstate__(self):
+        """
+        Return the state to pickle, without the visits. They are cleared at
+        the start of the next step, and their references to agents make the
+        object graph too deep to pickle.
+        """
+
+        return {k: getattr(self, k) for k in self.__slots__ if k != "visits"}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+        self.visits = []
 
     def clear_visits(self, e):
         """Removed all visits from the location."""
@@ -47,13 +62,14 @@ class Location:
         """Register a visit to the location."""
 
         visit_time = self.avg_visit_time
-        if person.status == "dead":
+        status = person.status_code
+        if status == DEAD:
             return
-        if person.status == "infectious":
+        if status == INFECTIOUS:
             visit_time *= (
                 e.self_isolation_multiplier
             )  # implementing case isolation (CI)
-            if self.loc_type == "hospital":
+            if self.type_code == e.config.building_types_dict["hospital"]:
                 if person.hospitalised:
                     e.loc_inf_minutes[self.loc_inf_minutes_id] += (
                         need / 7 * e.hospital_protection_factor
@@ -80,12 +96,12 @@ class Location:
             if self.visit_probability_counter > 1.0:
                 self.visit_probability_counter -= 1.0
                 self.visits.append([person, visit_time])
-                if person.status == "infectious":
+                if status == INFECTIOUS:
                     e.loc_inf_minutes[self.loc_inf_minutes_id] += visit_time
 
-        elif probability(visit_probability):
+        elif probability(min(visit_probability, 1.0), "visits"):
             self.visits.append([person, visit_time])
-            if person.status == "infectious":
+            if status == INFECTIOUS:
                 e.loc_inf_minutes[self.loc_inf_minutes_id] += visit_time
 
     def evolve(self, e, deterministic=False):
@@ -173,18 +189,8 @@ class Location:
         """
 
         # supermarket, park, hospital, shopping, school, office, leisure
-        minutes_opened = 12 * 60
-        airflow = e.airflow_indoors
-        if self.loc_type == "park":
-            airflow = e.airflow_outdoors
-
-        base_rate = (
-            4.0
-            * e.seasonal_effect
-            * e.contact_rate_multiplier[self.loc_type]
-            * e.disease.infection_rate
-            * float(e.loc_inf_minutes[self.loc_inf_minutes_id])
-        ) / (float(airflow) * 24.0 * 60.0 * float(self.sqm) * float(minutes_opened))
+        # base rates are computed for all locations at once by e.compute_base_rates().
+        base_rate = float(e.loc_base_rates[self.loc_inf_minutes_id])
 
         e.base_rate += base_rate
 
@@ -219,7 +225,7 @@ class Location:
         else:
             for v in self.visits:
                 e.loc_evolves += 1
-                if v[0].status == "susceptible":
+                if v[0].status_code == SUSCEPTIBLE:
                     infection_probability = v[1] * base_rate
                     if infection_probability > 0.0:
                         if probability(infection_probability):
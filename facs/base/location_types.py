@@ -1,4 +1,7 @@
-"""Module to store location types and their ids."""
+"""
+Module to read location types and their ids. The types of a run are kept
+by the Config (see config.py), which reads the file on first use.
+"""
 
 import yaml
 
@@ -9,6 +12,12 @@ def read_building_types(ymlfile: str):
     with open(ymlfile, encoding="utf-8") as file:
         buildings_data = yaml.safe_load(file)
 
+    return parse_building_types(buildings_data)
+
+
+def parse_building_types(buildings_data: dict):
+    """Return the index, labels and default sqm of the parsed building types."""
+
     types = {}
 
     for building_type, params in buildings_data.items():
@@ -35,10 +44,3 @@ def get_building_types(types):
         buildings[building_type] = index
 
     return buildings
-
-
-_data = read_building_types("covid_data/building_types_map.yml")
-building_types_dict = get_building_types(_data)
-building_types = _data.keys()
-
-building_types_data = yaml.safe_load(open("covid_data/building_types_map.yml"))
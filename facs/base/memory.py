@@ -0,0 +1,209 @@
+"""
+Module for estimating the memory footprint of the simulation per subsystem.
+
+The estimates follow the references from the objects of each subsystem and
+add up sys.getsizeof of everything reached, stopping at the objects of other
+subsystems. An object that is shared between subsystems is only counted for
+the first one. The population, neighbour tables, locations and needs are
+measured once, at the first step; the visit buffers and event log buffers
+change every step, so their peak is tracked as well.
+
+For a deeper look, tracemalloc can be started before the setup, and its
+snapshot written to a file for tracemalloc.Snapshot.load.
+"""
+
+from __future__ import annotations
+
+import resource
+import sys
+import tracemalloc
+
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from . import utils
+from .config import get_config
+from .house import House
+from .household import Household
+from .location import Location
+from .person import Person
+from .utils import event_logger
+
+if TYPE_CHECKING:
+    from .facs import Ecosystem
+
+DYNAMIC_SUBSYSTEMS = ["visit_buffers", "event_logs"]
+
+MB = 1024 * 1024
+
+
+def get_deep_size(obj, seen: dict, stop: tuple = ()) -> int:
+    """
+    Return the bytes of obj and of all objects it references, except for
+    objects in seen and instances of the stop types. Adds the counted
+    objects to seen (id -> object), which keeps them alive so that their
+    ids are not reused by temporary objects.
+    """
+
+    size = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, stop):
+            continue
+        if callable(o) or isinstance(o, ModuleType):
+            continue  # classes, functions and modules belong to the code.
+        seen[id(o)] = o
+
+        if hasattr(o, "memory_usage"):  # pandas objects.
+            size += int(np.sum(o.memory_usage(deep=True)))
+            continue
+
+        size += sys.getsizeof(o)
+        if isinstance(o, np.ndarray):
+            if o.base is not None:
+                stack.append(o.base)
+        elif isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        elif hasattr(o, "__dict__"):
+            stack.append(o.__dict__)
+        else:
+            stack.extend(get_slot_values(o))
+    return size
+
+
+def get_slot_values(obj) -> list:
+    """Return the values of the __slots__ attributes of obj that are set."""
+
+    values = []
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name):
+                values.append(getattr(obj, name))
+    return values
+
+
+def get_static_sizes(e: Ecosystem, seen: dict) -> dict[str, int]:
+    """
+    Return the bytes of the subsystems that do not change during a run.
+    Measure the dynamic sizes first, so the visits are not counted here.
+    """
+
+    sizes = {}
+    sizes["neighbour_tables"] = sum(
+        get_deep_size(h.nearest_locations, seen, (Location,)) for h in e.houses
+    )
+    sizes["population"] = get_deep_size([e.houses, e.house_names], seen, (Location,))
+    sizes["locations"] = get_deep_size(
+        [e.locations, e.location_list], seen, (House, Household, Person)
+    )
+    sizes["needs"] = get_deep_size(get_config().needs, seen)
+    return sizes
+
+
+def get_dynamic_sizes(e: Ecosystem, seen: dict) -> dict[str, int]:
+    """Return the bytes of the buffers that are refilled every step."""
+
+    stop = (House, Household, Person, Location)
+    sizes = {}
+    sizes["visit_buffers"] = sum(
+        get_deep_size(l.visits, seen, stop)
+        for locs in e.locations.values()
+        for l in locs
+    ) + get_deep_size([e.loc_inf_minutes, e.loc_base_rates], seen)
+    sizes["event_logs"] = get_deep_size(
+        [event_logger.columns, event_logger.bins, event_logger.writers], seen, stop
+    )
+    return sizes
+
+
+def get_peak_rss() -> int:
+    """Return the peak resident set size of this process in bytes."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kB on Linux.
+
+
+class MemoryReport:
+    """
+    Estimates the bytes per subsystem on this rank, at the first step
+    measured and at the step with the largest dynamic buffers.
+    """
+
+    def __init__(self):
+        self.setup = None  # subsystem -> bytes at the first step.
+        self.peak = None  # subsystem -> bytes at the peak of the buffers.
+        self.peak_time = None
+
+    def measure_step(self, e: Ecosystem):
+        """Measure the buffers of this step, and all subsystems the first time."""
+
+        seen = {}
+        dynamic = get_dynamic_sizes(e, seen)
+        if self.setup is None:
+            self.setup = {**get_static_sizes(e, seen), **dynamic}
+            self.peak = dict(self.setup)
+            self.peak_time = e.time
+            return
+
+        if sum(dynamic.values()) > sum(self.peak[k] for k in DYNAMIC_SUBSYSTEMS):
+            self.peak.update(dynamic)
+            self.peak_time = e.time
+
+    def get_lines(self, rank: int) -> list[str]:
+        """Return the report of this rank."""
+
+        if self.setup is None:
+            return [f"rank {rank}: no steps measured."]
+
+        lines = []
+        for label, sizes in [
+            ("setup", self.setup),
+            (f"peak at t {self.peak_time}", self.peak),
+        ]:
+            parts = [f"{k} {v / MB:.2f}" for k, v in sizes.items()]
+            parts.append(f"total {sum(sizes.values()) / MB:.2f}")
+            lines.append(f"rank {rank} {label} [MB]: " + ", ".join(parts))
+        lines.append(f"rank {rank} peak RSS [MB]: {get_peak_rss() / MB:.2f}")
+        return lines
+
+
+def print_memory_report(e: Ecosystem):
+    """Print the memory reports of all ranks on rank 0. All ranks have to call this."""
+
+    all_lines = e.mpi.comm.gather(e.memory_report.get_lines(e.rank), root=0)
+    if all_lines is not None:
+        print("Memory report:")
+        for lines in all_lines:
+            print("\n".join(lines))
+
+
+def start_tracemalloc(frames: int = 1):
+    """Start tracing the allocations, with the given number of frames per trace."""
+
+    tracemalloc.start(frames)
+
+
+def write_tracemalloc_snapshot(e: Ecosystem, top: int = 10) -> str:
+    """
+    Write the tracemalloc snapshot of this rank next to the event logs and
+    print the top allocation sites of every rank on rank 0. All ranks have
+    to call this. Returns the name of the snapshot file.
+    """
+
+    snapshot = tracemalloc.take_snapshot()
+    file_name = f"{utils.LOG_PREFIX}/tracemalloc_{e.rank}.snap"
+    snapshot.dump(file_name)
+
+    stats = snapshot.statistics("lineno")[:top]
+    all_stats = e.mpi.comm.gather([str(s) for s in stats], root=0)
+    if all_stats is not None:
+        for rank, lines in enumerate(all_stats):
+            print(f"rank {rank} top {top} allocation sites:")
+            print("\n".join(lines))
+    return file_name
@@ -1,7 +1,11 @@
 """Module for MPIManager class."""
 
+from time import perf_counter
+
 import numpy as np
 
+from .profiling import CommStats, TimedComm
+
 try:
     from mpi4py import MPI
 except ImportError:
@@ -14,15 +18,29 @@ class MPIManager:
         if not MPI.Is_initialized():
             print("Manual MPI_Init performed.")
             MPI.Init()
-        self.comm = MPI.COMM_WORLD
+        self.stats = CommStats()  # calls, time and bytes of the collectives.
+        self.comm = TimedComm(MPI.COMM_WORLD, self.stats)
         self.rank = self.comm.Get_rank()
         self.size = self.comm.Get_size()
 
-    def CalcCommWorldTotalSingle(self, i, op=MPI.SUM):
+        # ranks sharing this node, used to divide the cores between ranks.
+        node_comm = self.comm.Split_type(MPI.COMM_TYPE_SHARED, key=self.rank)
+        self.local_rank = node_comm.Get_rank()
+        self.local_size = node_comm.Get_size()
+        node_comm.Free()
+
+    @property
+    def comm_time(self):
+        """Time spent in collectives [s]."""
+        return self.stats.total_time
+
+    def CalcCommWorldTotalSingle(self, i, op=None):
         in_array = np.array([i])
         total = np.array([-1.0])
+        start = perf_counter()
         # If you want this number on rank 0, just use Reduce.
         self.comm.Allreduce([in_array, MPI.DOUBLE], [total, MPI.DOUBLE], op=MPI.SUM)
+        self.stats.record("allreduce", perf_counter() - start, in_array.nbytes)
         return total[0]
 
     def CalcCommWorldTotalDouble(self, np_array):
@@ -30,9 +48,11 @@ class MPIManager:
 
         total = np.zeros(np_array.size, dtype="f8")
 
+        start = perf_counter()
         # print(self.rank, type(total), type(np_array), total, np_array, np_array.size)
         # If you want this number on rank 0, just use Reduce.
         self.comm.Allreduce([np_array, MPI.DOUBLE], [total, MPI.DOUBLE], op=MPI.SUM)
+        self.stats.record("allreduce", perf_counter() - start, np_array.nbytes)
 
         return total
 
@@ -41,9 +61,11 @@ class MPIManager:
 
         total = np.zeros(np_array.size, dtype="int64")
 
+        start = perf_counter()
         # print(self.rank, type(total), type(np_array), total, np_array, np_array.size)
         # If you want this number on rank 0, just use Reduce.
         self.comm.Allreduce([np_array, MPI.LONG], [total, MPI.LONG], op=MPI.SUM)
+        self.stats.record("allreduce", perf_counter() - start, np_array.nbytes)
 
         return total
 
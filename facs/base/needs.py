@@ -5,18 +5,22 @@ from __future__ import annotations
 import os
 from typing import TYPE_CHECKING
 
-import pandas as pd
-
 if TYPE_CHECKING:
     from facs.base.person import Person
 
 
 class Needs:
-    """Generates needs for the population."""
+    """
+    Generates needs for the population. The needs are kept as a DataFrame,
+    and copied to an array (table) that get_needs indexes by age.
+    """
 
     def __init__(self, filename: str, building_types: list[str]):
         """Add needs from a CSV file."""
 
+        # pylint: disable=import-outside-toplevel
+        import pandas as pd  # slow to import, and only needed for the table.
+
         self.exception_handler(filename)
 
         self.needs = pd.read_csv(filename, header=0, index_col=0)
@@ -30,6 +34,11 @@ class Needs:
         self.needs["school"] = self.needs["school"].astype(int)
         self.needs = self.needs.reindex(building_types, axis=1)
 
+        columns = list(self.needs.columns)
+        self.office = columns.index("office") if "office" in columns else None
+        self.school = columns.index("school") if "school" in columns else None
+        self.update_table()
+
         print(f"Needs created from {filename}.")
 
     def exception_handler(self, filename: str):
@@ -48,12 +57,14 @@ class Needs:
         """Get the needs of a person."""
 
         if not person.hospitalised:
-            need = dict(self.needs.iloc[person.age])
-            if person.work_from_home:
-                need["office"] = 0
-            if person.school_from_home:
-                need["school"] = 0
-            return list(need.values())
+            need = self.table[person.age]
+            if person.work_from_home or person.school_from_home:
+                need = need.copy()
+                if person.work_from_home and self.office is not None:
+                    need[self.office] = 0
+                if person.school_from_home and self.school is not None:
+                    need[self.school] = 0
+            return need.tolist()
 
         return [0, 5040, 0, 0, 0, 0, 0]
 
@@ -67,3 +78,9 @@ class Needs:
             raise ValueError("Scale factor must be positive.")
 
         self.needs[location_type] = self.needs[location_type] * factor
+        self.update_table()
+
+    def update_table(self):
+        """Copy the needs to the array used by get_needs, after changing them."""
+
+        self.table = self.needs.to_numpy()
@@ -2,21 +2,29 @@
 
 from __future__ import annotations
 
-import random
 import sys
 
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 import numpy as np
-import yaml
 
-from facs.readers.read_disease_yml import read_disease_yml
-from .needs import Needs
-from .location_types import building_types_dict, building_types_data
+from .config import get_config
+from .random_streams import draw, get_rng
+from .status import (
+    SUSCEPTIBLE,
+    EXPOSED,
+    INFECTIOUS,
+    RECOVERED,
+    DEAD,
+    IMMUNE,
+    STATUS_CODES,
+    STATUS_NAMES,
+)
 from .utils import (
     probability,
     get_random_int,
+    get_weighted_index,
     log_infection,
     log_hospitalisation,
     log_recovery,
@@ -30,16 +38,6 @@ if TYPE_CHECKING:
     from .disease import Disease
 
 
-needs = Needs("covid_data/needs.csv", list(building_types_dict.keys()))
-
-with open("covid_data/vaccinations.yml", encoding="utf-8") as f:
-    vac_data = yaml.safe_load(f)
-    antivax_chance = vac_data["antivax_fraction"]
-
-immune_duration = read_disease_yml("covid_data/disease_covid19.yml").immunity_duration
-immunity_fraction = read_disease_yml("covid_data/disease_covid19.yml").immunity_fraction
-
-
 @dataclass
 class Person:
     """Class for a person."""
@@ -58,8 +56,8 @@ class Person:
     phase_duration: float = field(init=False, default=0.0)
     symptoms_suppressed: bool = field(init=False, default=False)
     antivax: bool = field(init=False, default=False)
-    status: str = field(init=False, default="susceptible")
-    # states: susceptible, exposed, infectious, recovered, dead, immune.
+    status_code: int = field(init=False, default=SUSCEPTIBLE)
+    # states: susceptible, exposed, infectious, recovered, dead, immune (see status.py).
     symptomatic: bool = field(init=False, default=False)
     status_change_time: float = field(init=False, default=-1)
     age: int = field(init=False)
@@ -71,17 +69,29 @@ class Person:
         self.location.increment_num_agents()
         self.home_location = self.location
 
-        if np.random.rand() < antivax_chance:  # 5% are antivaxxers.
+        config = get_config()
+        rng = get_rng("population")
+        # 5% are antivaxxers.
+        if rng.random() < config.vaccinations["antivax_fraction"]:
             self.antivax = True
 
-        if np.random.rand() < 0.5:  # 50% immune initially
-            self.status = "immune"
-            self.phase_duration = np.random.poisson(immune_duration)
+        if rng.random() < 0.5:  # 50% immune initially
+            self.status_code = IMMUNE
+            self.phase_duration = rng.poisson(config.disease.immunity_duration)
 
-        self.age = np.random.choice(91, p=self.ages)  # age in years
-        self.job = np.random.choice(4, 1, p=[0.865, 0.015, 0.08, 0.04])[0]
+        self.age = rng.choice(91, p=self.ages)  # age in years
+        self.job = rng.choice(4, 1, p=[0.865, 0.015, 0.08, 0.04])[0]
         # 0=default, 1=teacher (1.5%), 2=shop worker (8%), 3=health worker (4%)
 
+    @property
+    def status(self) -> str:
+        """The name of the status of the person."""
+        return STATUS_NAMES[self.status_code]
+
+    @status.setter
+    def status(self, name: str):
+        self.status_code = STATUS_CODES[name]
+
     def assign_group(self, location_type, num_groups):
         """
         Used to assign a grouping to a person.
@@ -90,12 +100,13 @@ class Person:
         The location type should match the corresponding personal needs category
         (e.g., school or supermarket).
         """
-        self.groups[building_types_dict[location_type]] = get_random_int(num_groups)
+        types = get_config().building_types_dict
+        self.groups[types[location_type]] = get_random_int(num_groups)
 
     def location_has_grouping(self, lid):
         """Check if a location has a particular grouping."""
 
-        return lid in list(self.groups)
+        return lid in self.groups
 
     def vaccinate(self, time, vac_no_symptoms, vac_no_transmission, vac_duration):
         """Vaccinate a person."""
@@ -103,38 +114,41 @@ class Person:
         self.status_change_time = time  # necessary if vaccines give temporary immunity.
         if vac_duration > 0:
             if vac_duration > 100:
-                self.phase_duration = np.random.gamma(vac_duration / 20.0, 20.0)
+                self.phase_duration = draw(
+                    "vaccination", "gamma", vac_duration / 20.0, 20.0
+                )
                 # shape parameter is changed with variable, scale parameter is kept
                 # fixed at 20 (assumption).
 
             else:
-                self.phase_duration = np.poisson(vac_duration)
+                self.phase_duration = draw("vaccination", "poisson", vac_duration)
 
-        if self.status == "susceptible":
-            if probability(vac_no_transmission):
-                self.status = "immune"
-            elif probability(vac_no_symptoms):
+        if self.status_code == SUSCEPTIBLE:
+            if probability(vac_no_transmission, "vaccination"):
+                self.status_code = IMMUNE
+            elif probability(vac_no_symptoms, "vaccination"):
                 self.symptoms_suppressed = True
         # print("vac", self.status, self.symptoms_suppressed, self.phase_duration)
 
-    def plan_visits(self, e):
+    def plan_visits(self, e, deterministic=False, planned=None):
         """
-        Plan visits for the day.
+        Plan visits for the day. The visits are registered at once, or added
+        to planned as (location, person, minutes) when it is given.
         TODO: plan visits to classes not using nearest location (make an override).
         """
 
-        if self.status in [
-            "susceptible",
-            "exposed",
-            "infectious",
-        ]:  # recovered people are assumed to be immune.
-            personal_needs = needs.get_needs(self)
+        if self.status_code <= INFECTIOUS:
+            # susceptible, exposed or infectious: the recovered are immune.
+            config = get_config()
+            building_types_dict = config.building_types_dict
+            hospital = building_types_dict["hospital"]
+            personal_needs = config.needs.get_needs(self)
             for k, minutes in enumerate(personal_needs):
                 nearest_locs = self.home_location.nearest_locations
 
                 if minutes < 1:
                     continue
-                elif k == building_types_dict["hospital"] and self.hospitalised:
+                elif k == hospital and self.hospitalised:
                     location_to_visit = self.hospital
 
                 elif k == building_types_dict["office"] and self.job > 0:
@@ -145,9 +159,7 @@ class Person:
                             building_types_dict["shopping"]
                         ]
                     if self.job == 3:  # health worker
-                        location_to_visit = nearest_locs[
-                            building_types_dict["hospital"]
-                        ]
+                        location_to_visit = nearest_locs[hospital]
 
                 elif self.location_has_grouping(k):
                     location_to_visit = e.get_location_by_group(k, self.groups[k])
@@ -157,26 +169,35 @@ class Person:
                 else:  # no known nearby locations.
                     continue
 
+                if location_to_visit is None:  # no such location for the job.
+                    continue
+
                 e.visit_minutes += minutes
 
                 if isinstance(location_to_visit, list):
-                    loc_type = location_to_visit[0].loc_type
-
-                    if building_types_data[loc_type]["weighted"]:
+                    if config.weighted[location_to_visit[0].type_code]:
                         sizes = [x.sqm for x in location_to_visit]
-                        prob = [x / sum(sizes) for x in sizes]
-                        location_to_visit = np.random.choice(location_to_visit, p=prob)
+                        location_to_visit = location_to_visit[
+                            get_weighted_index(sizes, "visits")
+                        ]
 
                     else:
-                        location_to_visit = random.choice(location_to_visit)
+                        location_to_visit = location_to_visit[
+                            get_random_int(len(location_to_visit), "visits")
+                        ]
+
+                if planned is None:
+                    location_to_visit.register_visit(e, self, minutes, deterministic)
+                else:
+                    planned.append((location_to_visit, self, minutes))
 
     def print_needs(self):
         """Print the needs of a person."""
-        print(self.age, needs.get_needs(self))
+        print(self.age, get_config().needs.get_needs(self))
 
     def get_needs(self):
         """Get the needs of a person."""
-        return needs.get_needs(self)
+        return get_config().needs.get_needs(self)
 
     def get_hospitalisation_chance(self, disease):
         """Get the hospitalisation chance of a person."""
@@ -192,11 +213,13 @@ class Person:
         """Infect a person."""
         # severity can be overridden to infectious when rigidly inserting cases.
         # but by default, it should be exposed.
-        self.status = severity
+        self.status_code = STATUS_CODES[severity]
         self.status_change_time = e.time
         self.mild_version = True
         self.hospitalised = False
-        self.phase_duration = max(1, np.random.poisson(e.disease.incubation_period))
+        self.phase_duration = max(
+            1, draw("infections", "poisson", e.disease.incubation_period)
+        )
         e.num_infections_today += log_infection(
             e.time,
             self.location.location_x,
@@ -209,11 +232,11 @@ class Person:
     def recover(self, e, location):
         """Recover a person."""
         if e.disease.immunity_duration > 0:
-            self.phase_duration = np.random.gamma(
-                e.disease.immunity_duration / 20.0, 20.0
+            self.phase_duration = draw(
+                "infections", "gamma", e.disease.immunity_duration / 20.0, 20.0
             )  # shape parameter is changed with variable,
             # scale parameter is kept fixed at 20 (assumption).
-        self.status = "recovered"
+        self.status_code = RECOVERED
         self.status_change_time = e.time
         e.num_recoveries_today = log_recovery(
             e.time, self.location.location_x, self.location.location_x, location, e.rank
@@ -223,10 +246,11 @@ class Person:
         """Progress the condition of a person."""
         if self.status_change_time > t:
             return
-        if self.status == "exposed":
+        status = self.status_code
+        if status == EXPOSED:
             # print("exposed", t, self.status_change_time, self.phase_duration)
             if t - self.status_change_time >= int(self.phase_duration):
-                self.status = "infectious"
+                self.status_code = INFECTIOUS
                 self.status_change_time = t
                 if (
                     probability(self.get_hospitalisation_chance(disease))
@@ -238,7 +262,7 @@ class Person:
                     # - disease.incubation_period)
                     self.phase_duration = max(
                         1,
-                        np.random.poisson(disease.period_to_hospitalisation)
+                        draw("infections", "poisson", disease.period_to_hospitalisation)
                         - self.phase_duration,
                     )
                 else:
@@ -248,11 +272,11 @@ class Person:
                     # - disease.incubation_period)
                     self.phase_duration = max(
                         1,
-                        np.random.poisson(disease.mild_recovery_period)
+                        draw("infections", "poisson", disease.mild_recovery_period)
                         - self.phase_duration,
                     )
 
-        elif self.status == "infectious":
+        elif status == INFECTIOUS:
             # mild version (may require hospital visits, but not ICU visits)
             if self.mild_version:
                 if t - self.status_change_time >= self.phase_duration:
@@ -288,13 +312,13 @@ class Person:
                         ):
                             # avg mortality rate (divided by the average hospitalization rate).
                             self.dying = True
-                            self.phase_duration = np.random.poisson(
-                                disease.mortality_period
+                            self.phase_duration = draw(
+                                "infections", "poisson", disease.mortality_period
                             )
                         else:
                             self.dying = False
-                            self.phase_duration = np.random.poisson(
-                                disease.recovery_period
+                            self.phase_duration = draw(
+                                "infections", "poisson", disease.recovery_period
                             )
                 else:
                     if (
@@ -305,7 +329,7 @@ class Person:
                         self.status_change_time = t
                         # decease
                         if self.dying:
-                            self.status = "dead"
+                            self.status_code = DEAD
                             e.num_deaths_today = log_death(
                                 t,
                                 self.location.location_x,
@@ -317,10 +341,8 @@ class Person:
                         else:
                             self.recover(e, "hospital")
 
-        elif e.disease.immunity_duration > 0 and (
-            self.status in ("recovered", "immune")
-        ):
+        elif e.disease.immunity_duration > 0 and status in (RECOVERED, IMMUNE):
             if t - self.status_change_time >= self.phase_duration:
                 # print("susc.", self.status, self.phase_duration)
-                self.status = "susceptible"
+                self.status_code = SUSCEPTIBLE
                 self.symptoms_suppressed = False
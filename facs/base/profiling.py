@@ -0,0 +1,215 @@
+"""
+Module for lightweight timers around the phases of the simulation, and for
+the communication statistics of the managers.
+
+A PhaseTimer records the wall-clock time between consecutive laps, so each
+phase only costs one perf_counter call. With profiling on, the phase times
+of all ranks are gathered on rank 0 after every step, which writes their
+minimum, mean and maximum to profile.csv (and those of the start-up phases
+in read_building_csv to profile_startup.csv).
+
+Every manager keeps a CommStats with the calls, waiting time and bytes of
+each collective, and the compute and waiting time of every step. At the end
+of a run with profiling on, these are summarised over ranks, to show the
+load imbalance.
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+
+import numpy as np
+
+from . import utils
+from .utils import out_files
+from .rebalance import get_imbalance
+
+
+class PhaseTimer:
+    """Accumulates the time spent in each phase since start()."""
+
+    def __init__(self):
+        self.times = {}  # phase -> time [s].
+        self.last = perf_counter()
+
+    def start(self):
+        """Forget the previous phases and start timing the first one."""
+
+        self.times = {}
+        self.last = perf_counter()
+
+    def lap(self, phase: str):
+        """End the current phase, and start the next one."""
+
+        now = perf_counter()
+        self.times[phase] = self.times.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def get_stats(self, comm) -> dict[str, tuple[float, float, float]] | None:
+        """
+        Return the (min, mean, max) time over ranks of every phase on rank 0,
+        and None on the other ranks. All ranks have to call this.
+        """
+
+        all_times = comm.gather(self.times, root=0)
+        if all_times is None:
+            return None
+
+        stats = {}
+        for phase in all_times[0]:
+            times = np.array([t.get(phase, 0.0) for t in all_times])
+            stats[phase] = (times.min(), times.mean(), times.max())
+        return stats
+
+
+def get_profile_file(startup: bool = False) -> str:
+    """Return the name of the (start-up) phase timing file."""
+
+    if startup:
+        return f"{utils.LOG_PREFIX}/profile_startup.csv"
+    return f"{utils.LOG_PREFIX}/profile.csv"
+
+
+def write_phase_stats(file_name: str, stats: dict, time: int | None = None):
+    """Append phase statistics to a timing csv, with a header on first use."""
+
+    new_file = file_name not in out_files.files
+    out = out_files.open(file_name)
+
+    prefix = [] if time is None else [time]
+    if new_file:
+        columns = ["time"] * len(prefix) + ["phase", "min", "mean", "max"]
+        print("#" + ",".join(columns), file=out)
+    for phase, values in stats.items():
+        print(*prefix, phase, *values, sep=",", file=out)
+    out.flush()
+
+
+class CommStats:
+    """
+    Calls, waiting time and bytes of each collective on this rank.
+    Bytes are only known for array collectives; objects sent by the pickle
+    based collectives (bcast, allgather, ...) count as 0 bytes.
+    """
+
+    def __init__(self):
+        self.calls = {}  # collective -> number of calls.
+        self.time = {}  # collective -> time spent in it [s].
+        self.bytes = {}  # collective -> bytes sent by this rank.
+        self.total_time = 0.0
+        self.steps = []  # (compute time, waiting time) of every step [s].
+
+    def record(self, name: str, seconds: float, nbytes: int = 0):
+        """Add one call of a collective."""
+
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.time[name] = self.time.get(name, 0.0) + seconds
+        self.bytes[name] = self.bytes.get(name, 0) + nbytes
+        self.total_time += seconds
+
+    def end_step(self, compute_time: float, wait_time: float):
+        """Add the compute and waiting time of a step."""
+
+        self.steps.append((compute_time, wait_time))
+
+
+class TimedComm:
+    """
+    Wraps a communicator and records the time of its object collectives and
+    barriers. All other attributes are those of the wrapped communicator.
+    """
+
+    def __init__(self, comm, stats: CommStats):
+        self.comm = comm
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self.comm, name)
+
+    def _timed(self, name, func, *args, **kwargs):
+        start = perf_counter()
+        result = func(*args, **kwargs)
+        self.stats.record(name, perf_counter() - start)
+        return result
+
+    def Barrier(self):  # pylint: disable=invalid-name
+        """Wait until all ranks reach the barrier."""
+        return self._timed("barrier", self.comm.Barrier)
+
+    def bcast(self, obj, root=0):
+        """Broadcast an object from root to all ranks."""
+        return self._timed("bcast", self.comm.bcast, obj, root=root)
+
+    def allgather(self, obj):
+        """Return the list of objects of all ranks."""
+        return self._timed("allgather", self.comm.allgather, obj)
+
+    def alltoall(self, objs):
+        """Send objs[i] to rank i, and return the objects sent to this rank."""
+        return self._timed("alltoall", self.comm.alltoall, objs)
+
+    def gather(self, obj, root=0):
+        """Return the list of objects of all ranks on root, None elsewhere."""
+        return self._timed("gather", self.comm.gather, obj, root=root)
+
+
+def get_comm_summary(mpi) -> list[str] | None:
+    """
+    Return the lines of the communication and load imbalance summary of all
+    ranks on rank 0, and None on the other ranks. All ranks have to call this.
+    """
+
+    stats = mpi.stats
+    local = (dict(stats.calls), dict(stats.time), dict(stats.bytes), stats.steps)
+    gathered = mpi.comm.gather(local, root=0)
+    if gathered is None:
+        return None
+
+    size = len(gathered)
+    steps = np.array([g[3] for g in gathered], dtype="f8").reshape(size, -1, 2)
+    compute = steps[:, :, 0].sum(axis=1)
+    wait = steps[:, :, 1].sum(axis=1)
+
+    lines = [
+        f"Communication summary of {size} ranks over {steps.shape[1]} steps:",
+        "collective,calls per rank,wait min [s],wait mean [s],wait max [s],"
+        "bytes per rank",
+    ]
+    for name in sorted({name for g in gathered for name in g[0]}):
+        calls = np.array([g[0].get(name, 0) for g in gathered])
+        times = np.array([g[1].get(name, 0.0) for g in gathered])
+        nbytes = np.array([g[2].get(name, 0) for g in gathered])
+        lines.append(
+            f"{name},{calls.mean():.0f},{times.min():.3f},{times.mean():.3f},"
+            f"{times.max():.3f},{nbytes.mean():.0f}"
+        )
+
+    lines.append(
+        f"compute time [s]: min {compute.min():.3f}, mean {compute.mean():.3f}, "
+        f"max {compute.max():.3f}"
+    )
+    lines.append(
+        f"waiting time in steps [s]: min {wait.min():.3f}, mean {wait.mean():.3f}, "
+        f"max {wait.max():.3f}"
+    )
+
+    imbalance = get_imbalance(compute)
+    lines.append(
+        f"load imbalance (max / mean compute time): {imbalance:.2f}, "
+        f"parallel efficiency: {1.0 / imbalance:.2f}"
+    )
+    if steps.shape[1] > 0:
+        per_step = [get_imbalance(steps[:, i, 0]) for i in range(steps.shape[1])]
+        lines.append(
+            f"load imbalance per step: mean {np.mean(per_step):.2f}, "
+            f"max {np.max(per_step):.2f}"
+        )
+    return lines
+
+
+def print_comm_summary(mpi):
+    """Print the communication summary on rank 0. All ranks have to call this."""
+
+    lines = get_comm_summary(mpi)
+    if lines is not None:
+        print("\n".join(lines))
@@ -0,0 +1,120 @@
+"""
+Module for seeded random number streams per rank and purpose.
+
+Every purpose (population synthesis, visits, infections, ...) draws from its
+own numpy Generator, so that changing how one part of the model uses random
+numbers leaves the draws of the other parts unchanged. The generators are
+derived from a single seed and the rank. Until streams are activated with
+set_streams, all draws fall back to the global np.random state.
+
+Scalar draws cost a numpy call each. With a pool_size, the streams instead
+draw blocks of pool_size variates per distribution and parameters, and hand
+them out one by one. Pooled runs are reproducible, but differ from unpooled
+runs with the same seed, because the order of the draws changes.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+STREAMS = ["population", "visits", "infections", "transport", "vaccination", "events"]
+
+_active = None  # RandomStreams used by get_rng.
+
+
+class RandomPool:
+    """Variates of one distribution, drawn from a generator in blocks."""
+
+    def __init__(self, rng: np.random.Generator, method: str, args: tuple, size: int):
+        # pylint: disable=too-many-arguments
+        self.rng = rng
+        self.method = method  # name of the Generator method, e.g. "poisson".
+        self.args = args
+        self.size = size
+        self.values = []
+        self.index = 0
+
+    def next(self):
+        """Return the next variate, drawing a new block when all are used."""
+
+        if self.index == len(self.values):
+            draw = getattr(self.rng, self.method)
+            self.values = draw(*self.args, size=self.size).tolist()
+            self.index = 0
+        value = self.values[self.index]
+        self.index += 1
+        return value
+
+
+class RandomStreams:
+    """
+    The generators of one rank, one per purpose in STREAMS, and the pools of
+    variates drawn from them if pool_size is not 0.
+    """
+
+    def __init__(self, seed: int, rank: int = 0, pool_size: int = 0):
+        self.seed = seed
+        self.rank = rank
+        self.pool_size = pool_size
+        self.generators = {
+            name: np.random.default_rng(np.random.SeedSequence([seed, rank, i]))
+            for i, name in enumerate(STREAMS)
+        }
+        self.uniforms = {}  # purpose -> RandomPool of uniforms in [0, 1).
+        self.pools = {}  # (purpose, method, args) -> RandomPool.
+
+    def __getitem__(self, name: str) -> np.random.Generator:
+        return self.generators[name]
+
+    def uniform(self, purpose: str) -> float:
+        """Return a uniform variate in [0, 1) from the pool of purpose."""
+
+        pool = self.uniforms.get(purpose)
+        if pool is None:
+            pool = RandomPool(self.generators[purpose], "random", (), self.pool_size)
+            self.uniforms[purpose] = pool
+        return pool.next()
+
+    def draw(self, purpose: str, method: str, *args):
+        """Return one variate of a Generator method of the stream of purpose."""
+
+        if not self.pool_size:
+            return getattr(self.generators[purpose], method)(*args)
+        key = (purpose, method, args)
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = RandomPool(self.generators[purpose], method, args, self.pool_size)
+            self.pools[key] = pool
+        return pool.next()
+
+
+def set_streams(streams: RandomStreams | None):
+    """Activate streams for all draws; None falls back to np.random."""
+
+    global _active  # pylint: disable=global-statement
+    _active = streams
+
+
+def get_streams() -> RandomStreams | None:
+    """Return the active streams, if any."""
+
+    return _active
+
+
+def get_rng(purpose: str):
+    """Return the generator of a purpose, or the np.random module."""
+
+    if _active is None:
+        return np.random
+    return _active[purpose]
+
+
+def draw(purpose: str, method: str, *args):
+    """
+    Return one variate of a distribution, e.g. draw("infections", "poisson",
+    5.0), from the pools of the active streams, or from np.random.
+    """
+
+    if _active is None:
+        return getattr(np.random, method)(*args)
+    return _active.draw(purpose, method, *args)
@@ -0,0 +1,125 @@
+"""Module for migrating houses between ranks to balance the work load."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .decomposition import partition_by_curve
+
+if TYPE_CHECKING:
+    from .facs import Ecosystem
+    from .house import House
+
+
+def get_imbalance(costs) -> float:
+    """Return the ratio of the maximum to the mean cost over ranks."""
+
+    costs = np.asarray(costs, dtype="f8")
+    mean = costs.mean()
+    if mean <= 0:
+        return 1.0
+    return float(costs.max() / mean)
+
+
+def get_destinations(costs, counts, rank: int) -> np.ndarray:
+    """
+    Return the destination rank of each house on this rank.
+
+    All houses are placed on one line in rank order. Every house on a rank is
+    assumed to cost the same, and the line is cut into stretches of equal
+    cost. Houses therefore only move towards neighbouring ranks, which keeps
+    the regions of a spatial decomposition contiguous.
+    """
+
+    costs = np.asarray(costs, dtype="f8")
+    counts = np.asarray(counts, dtype="int64")
+
+    per_house = np.divide(
+        costs, counts, out=np.zeros(costs.size, dtype="f8"), where=counts > 0
+    )
+    weights = np.repeat(per_house, counts)
+    owners = partition_by_curve(np.arange(weights.size), costs.size, weights)
+
+    offset = counts[:rank].sum()
+    return owners[offset : offset + counts[rank]]
+
+
+def pack_house(house: House, name, e: Ecosystem):
+    """
+    Prepare a house for sending to another rank.
+    Location references are replaced by their loc_inf_minutes ids, as the
+    receiving rank holds its own copies of all locations.
+    """
+
+    house.nearest_locations = [
+        None if locs is None else [l.loc_inf_minutes_id for l in locs]
+        for locs in house.nearest_locations
+    ]
+    for hh in house.households:
+        hh.ages = None
+        for a in hh.agents:
+            a.ages = None
+            if getattr(a, "hospital", None) is not None:
+                a.hospital = a.hospital.loc_inf_minutes_id
+            if a.hospitalised:
+                e.num_hospitalised -= 1
+    e.num_agents -= house.total_size
+    return name, house
+
+
+def unpack_house(packed, e: Ecosystem):
+    """Restore the location references of a received house."""
+
+    name, house = packed
+    house.nearest_locations = [
+        None if ids is None else [e.location_list[i] for i in ids]
+        for ids in house.nearest_locations
+    ]
+    for hh in house.households:
+        hh.ages = e.ages
+        for a in hh.agents:
+            a.ages = e.ages
+            if getattr(a, "hospital", None) is not None:
+                a.hospital = e.location_list[a.hospital]
+            if a.hospitalised:
+                e.num_hospitalised += 1
+    e.num_agents += house.total_size
+    return name, house
+
+
+def migrate_houses(e: Ecosystem, destinations) -> int:
+    """
+    Send houses (with their households and agents) to their destination
+    ranks. Returns the number of houses that left this rank.
+    """
+
+    outgoing = [[] for _ in range(e.size)]
+    kept_houses = []
+    kept_names = []
+    for house, name, dest in zip(e.houses, e.house_names, destinations):
+        if dest == e.rank:
+            kept_houses.append(house)
+            kept_names.append(name)
+        else:
+            outgoing[dest].append(pack_house(house, name, e))
+
+    incoming = e.mpi.comm.alltoall(outgoing)
+
+    # keep the rank order of houses, so the global house line stays intact.
+    houses = []
+    names = []
+    for source in range(e.size):
+        if source == e.rank:
+            houses += kept_houses
+            names += kept_names
+            continue
+        for packed in incoming[source]:
+            name, house = unpack_house(packed, e)
+            houses.append(house)
+            names.append(name)
+
+    e.houses = houses
+    e.house_names = names
+    return sum(len(x) for x in outgoing)
@@ -0,0 +1,278 @@
+"""
+Module for running FACS on several cores of a single node without MPI.
+
+Worker processes are forked from one parent and each owns a partition of the
+houses, exactly like an MPI rank. Reductions of loc_inf_minutes and the
+global statistics are summed in multiprocessing.shared_memory, and the few
+object collectives that the code needs (bcast, allgather, alltoall, gather)
+are sent through per-worker queues.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import sys
+
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from time import perf_counter
+
+import numpy as np
+
+from .profiling import CommStats, TimedComm
+
+
+class SharedComm:
+    """The subset of the mpi4py communicator API used by FACS."""
+
+    def __init__(self, rank, size, barrier, inboxes):
+        self.rank = rank
+        self.size = size
+        self.barrier = barrier
+        self.inboxes = inboxes
+        self._seq = 0
+        self._pending = {}  # (seq, source) -> message received out of order.
+
+    def Get_rank(self):  # pylint: disable=invalid-name
+        """Return the rank of this worker."""
+        return self.rank
+
+    def Get_size(self):  # pylint: disable=invalid-name
+        """Return the number of workers."""
+        return self.size
+
+    def Barrier(self):  # pylint: disable=invalid-name
+        """Wait until all workers reach the barrier."""
+        if self.barrier is not None:
+            self.barrier.wait()
+
+    def _send(self, dest, obj):
+        self.inboxes[dest].put((self._seq, self.rank, obj))
+
+    def _recv(self, source):
+        key = (self._seq, source)
+        while key not in self._pending:
+            seq, src, obj = self.inboxes[self.rank].get()
+            self._pending[(seq, src)] = obj
+        return self._pending.pop(key)
+
+    def bcast(self, obj, root=0):
+        """Broadcast an object from root to all workers."""
+        self._seq += 1
+        if self.rank == root:
+            for dest in range(self.size):
+                if dest != root:
+                    self._send(dest, obj)
+            return obj
+        return self._recv(root)
+
+    def allgather(self, obj):
+        """Return the list of objects of all workers, in rank order."""
+        self._seq += 1
+        for dest in range(self.size):
+            if dest != self.rank:
+                self._send(dest, obj)
+        return [
+            obj if source == self.rank else self._recv(source)
+            for source in range(self.size)
+        ]
+
+    def alltoall(self, objs):
+        """Send objs[i] to worker i, and return the objects sent to this worker."""
+        self._seq += 1
+        for dest in range(self.size):
+            if dest != self.rank:
+                self._send(dest, objs[dest])
+        return [
+            objs[source] if source == self.rank else self._recv(source)
+            for source in range(self.size)
+        ]
+
+    def gather(self, obj, root=0):
+        """Return the list of objects of all workers on root, None elsewhere."""
+        self._seq += 1
+        if self.rank != root:
+            self._send(root, obj)
+            return None
+        return [
+            obj if source == root else self._recv(source) for source in range(self.size)
+        ]
+
+
+class SharedMemoryManager:
+    """
+    Drop-in replacement for MPIManager for forked worker processes.
+    Array reductions are done in shared memory: every worker writes its
+    partial array to its own row of a shared buffer, and after a barrier
+    all workers sum the rows.
+    """
+
+    def __init__(self, rank, size, barrier, inboxes, prefix):
+        self.shared_comm = SharedComm(rank, size, barrier, inboxes)
+        self.stats = CommStats()  # calls, time and bytes of the collectives.
+        self.comm = TimedComm(self.shared_comm, self.stats)
+        self.rank = rank
+        self.size = size
+        self.prefix = prefix
+        self.local_rank = rank  # all workers share one node.
+        self.local_size = size
+        self._buffers = {}  # (dtype, length) -> (SharedMemory, array view).
+
+    def _get_buffer(self, dtype, length):
+        """Return a (size x length) array in shared memory, created on first use."""
+
+        key = (np.dtype(dtype).str, length)
+        if key not in self._buffers:
+            name = "{}_{}_{}".format(self.prefix, np.dtype(dtype).char, length)
+            nbytes = max(1, self.size * length * np.dtype(dtype).itemsize)
+            if self.rank == 0:
+                shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)
+            self.shared_comm.Barrier()
+            if self.rank != 0:
+                shm = _attach_shared_memory(name)
+            array = np.ndarray((self.size, length), dtype=dtype, buffer=shm.buf)
+            self._buffers[key] = (shm, array)
+        return self._buffers[key][1]
+
+    def _reduce(self, np_array, dtype):
+        start = perf_counter()
+        buffer = self._get_buffer(dtype, np_array.size)
+        buffer[self.rank] = np_array
+        self.shared_comm.Barrier()
+        total = buffer.sum(axis=0, dtype=dtype)
+        self.shared_comm.Barrier()  # nobody may overwrite a row before all have summed.
+        self.stats.record("allreduce", perf_counter() - start, np_array.nbytes)
+        return total
+
+    @property
+    def comm_time(self):
+        """Time spent in collectives [s]."""
+        return self.stats.total_time
+
+    def CalcCommWorldTotalSingle(self, i, op=None):  # pylint: disable=invalid-name
+        """Return the sum of a number over all workers."""
+        return self._reduce(np.array([i], dtype="f8"), "f8")[0]
+
+    def CalcCommWorldTotalDouble(self, np_array):  # pylint: disable=invalid-name
+        """Return the element-wise sum of a float array over all workers."""
+        assert np_array.size > 0
+        return self._reduce(np_array, "f8")
+
+    def CalcCommWorldTotal(self, np_array):  # pylint: disable=invalid-name
+        """Return the element-wise sum of an integer array over all workers."""
+        assert np_array.size > 0
+        return self._reduce(np_array, "int64")
+
+    def gather_stats(self, e, local_stats):
+        """Sum the local statistics of all workers into e.global_stats."""
+        e.global_stats = self.CalcCommWorldTotal(np.array(local_stats))
+
+    def close(self):
+        """Release the shared memory buffers."""
+        for shm, _ in self._buffers.values():
+            shm.close()
+            if self.rank == 0:
+                shm.unlink()
+        self._buffers = {}
+
+
+class SerialManager:
+    """Manager for a single process, where all collectives are trivial."""
+
+    def __init__(self):
+        self.comm = SharedComm(0, 1, None, None)
+        self.stats = CommStats()  # stays empty, the collectives are trivial.
+        self.rank = 0
+        self.size = 1
+        self.local_rank = 0
+        self.local_size = 1
+
+    @property
+    def comm_time(self):
+        """Time spent in collectives [s]."""
+        return self.stats.total_time
+
+    def CalcCommWorldTotalSingle(self, i, op=None):  # pylint: disable=invalid-name
+        """Return the number itself."""
+        return float(i)
+
+    def CalcCommWorldTotalDouble(self, np_array):  # pylint: disable=invalid-name
+        """Return a copy of the float array."""
+        return np.array(np_array, dtype="f8")
+
+    def CalcCommWorldTotal(self, np_array):  # pylint: disable=invalid-name
+        """Return a copy of the integer array."""
+        return np.array(np_array, dtype="int64")
+
+    def gather_stats(self, e, local_stats):
+        """Store the local statistics as the global statistics."""
+        e.global_stats = self.CalcCommWorldTotal(np.array(local_stats))
+
+    def close(self):
+        """Nothing to release."""
+
+
+def _attach_shared_memory(name):
+    """Attach to an existing segment without handing it to the resource tracker."""
+
+    if sys.version_info >= (3, 13):
+        # pylint: disable=unexpected-keyword-arg
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # pylint: disable=import-outside-toplevel
+    from multiprocessing import resource_tracker
+
+    shm = shared_memory.SharedMemory(name=name)
+    # only the creating worker may unlink the segment.
+    # pylint: disable-next=protected-access
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _run_worker(target, rank, size, barrier, inboxes, prefix, args):
+    manager = SharedMemoryManager(rank, size, barrier, inboxes, prefix)
+    try:
+        target(*args, mpi=manager)
+    finally:
+        manager.close()
+
+
+def launch(target, num_workers, *args):
+    """
+    Run target(*args, mpi=manager) in num_workers forked processes, each with
+    its own SharedMemoryManager. Returns once all workers have finished.
+    """
+
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1")
+
+    ctx = mp.get_context("fork")
+    barrier = ctx.Barrier(num_workers)
+    inboxes = [ctx.Queue() for _ in range(num_workers)]
+    prefix = "facs_{}".format(os.getpid())
+
+    workers = [
+        ctx.Process(
+            target=_run_worker,
+            args=(target, rank, num_workers, barrier, inboxes, prefix, args),
+        )
+        for rank in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    running = list(workers)
+    while running:
+        wait([w.sentinel for w in running])
+        for worker in [w for w in running if not w.is_alive()]:
+            running.remove(worker)
+            if worker.exitcode != 0:
+                # the other workers would wait forever in their next collective.
+                barrier.abort()
+                for other in running:
+                    other.terminate()
+
+    failed = [rank for rank, w in enumerate(workers) if w.exitcode != 0]
+    if failed:
+        raise RuntimeError("shared memory workers {} failed.".format(failed))
@@ -0,0 +1,19 @@
+"""
+Module for the integer codes of the agent statuses.
+
+Agents store their status as one of these codes, so the checks in the hot
+loops are integer comparisons, and the statuses of many agents can be held
+in an integer array. The codes of the active statuses (susceptible, exposed
+and infectious) come first, and STATUS_NAMES follows the order of the status
+columns in the output.
+"""
+
+SUSCEPTIBLE = 0
+EXPOSED = 1
+INFECTIOUS = 2
+RECOVERED = 3
+DEAD = 4
+IMMUNE = 5
+
+STATUS_NAMES = ["susceptible", "exposed", "infectious", "recovered", "dead", "immune"]
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
@@ -2,34 +2,65 @@
 
 from __future__ import annotations
 
+import atexit
 import os
 
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+
 from typing import TYPE_CHECKING
 
 import numpy as np
 
+from .event_output import EVENT_FORMATS, get_event_writer
+from .random_streams import get_rng, get_streams
+from .status import SUSCEPTIBLE
+
 if TYPE_CHECKING:
     from .person import Person
 
 LOG_PREFIX = "."
 
+EVENT_LOG_LEVELS = ["full", "binned", "sample"]
+
 
-def probability(prob):
-    """Return True with probability prob."""
+def probability(prob, purpose="infections"):
+    """Return True with probability prob, drawn from the stream of purpose."""
 
     if prob < 0 or prob > 1:
         raise ValueError("prob must be between 0 and 1")
 
-    return np.random.random() < prob
+    streams = get_streams()
+    if streams is not None and streams.pool_size:
+        return streams.uniform(purpose) < prob
+    return get_rng(purpose).random() < prob
 
 
-def get_random_int(high) -> int:
-    """Return a random integer between 0 and high."""
+def get_random_int(high, purpose="population") -> int:
+    """Return a random integer between 0 and high, drawn from the stream of purpose."""
 
-    if high < 0:
+    if high <= 0:
         raise ValueError("high must be greater than 0")
 
-    return np.random.randint(0, high)
+    streams = get_streams()
+    if streams is None:
+        return np.random.randint(0, high)
+    if streams.pool_size:
+        return int(streams.uniform(purpose) * high)
+    return streams[purpose].integers(0, high)
+
+
+def get_weighted_index(weights, purpose="visits") -> int:
+    """Return an index into weights, with probabilities proportional to the weights."""
+
+    streams = get_streams()
+    if streams is not None and streams.pool_size:
+        cumulative = list(accumulate(weights))
+        index = bisect_right(cumulative, streams.uniform(purpose) * cumulative[-1])
+        return min(index, len(weights) - 1)
+    total = sum(weights)
+    return get_rng(purpose).choice(len(weights), p=[w / total for w in weights])
 
 
 class OutputFiles:
@@ -50,6 +81,43 @@ class OutputFiles:
 
         return self.files[file_name]
 
+    def get_sizes(self) -> dict[str, int]:
+        """Flush all files and return their sizes in bytes."""
+
+        sizes = {}
+        for file_name, out_file in self.files.items():
+            out_file.flush()
+            sizes[file_name] = out_file.tell()
+        return sizes
+
+    def get_contents(self) -> dict[str, str]:
+        """Flush all files and return their contents."""
+
+        contents = {}
+        for file_name, out_file in self.files.items():
+            out_file.flush()
+            with open(file_name, "r", encoding="utf-8") as f:
+                contents[file_name] = f.read()
+        return contents
+
+    def close(self):
+        """Close all files."""
+
+        for out_file in self.files.values():
+            out_file.close()
+        self.files = {}
+
+    def restore(self, sizes: dict[str, int]):
+        """Reopen files for appending, cut back to the given sizes."""
+
+        for file_name, size in sizes.items():
+            if file_name in self.files:
+                self.files.pop(file_name).close()
+            with open(file_name, "a", encoding="utf-8") as out_file:
+                out_file.truncate(size)
+            # pylint: disable=consider-using-with
+            self.files[file_name] = open(file_name, "a", encoding="utf-8")
+
     def __del__(self) -> None:
         for _, value in self.files.items():
             value.close()
@@ -58,12 +126,244 @@ class OutputFiles:
 out_files = OutputFiles()
 
 
+class EventLogger:
+    """
+    Collects event records in per-file column buffers and writes them in
+    bulk, at the end of each time step or once max_events are buffered.
+    Until enable() is called, every record is written immediately.
+
+    Besides csv, the logs can be written as typed columnar files ("parquet"
+    or "npz", see event_output.py), one block per flush.
+
+    When enabled with a communicator, the logs of all ranks are merged: every
+    flush gathers the buffered columns on rank 0, which writes a single
+    time-ordered covid_out_<category> file. Such flushes are collective, so
+    they only happen at the end of each time step.
+
+    The level sets how much is logged: "full" keeps every event, "sample"
+    keeps a random sample_fraction of the events, and "binned" only writes
+    daily counts per grid cell, location type and event category to
+    covid_out_binned.
+    """
+
+    def __init__(self):
+        self.buffered = False
+        self.max_events = 0
+        self.output_format = "csv"
+        self.comm = None  # set when the logs of all ranks are merged.
+        self.level = "full"
+        self.sample_fraction = 1.0
+        self.bin_size = 0.01
+        self.rng = None  # for sampling, separate from the simulation streams.
+        self.bins = {}  # rank -> Counter of (time, event, cell_x, cell_y, location).
+        self.columns = {}  # (category, rank) -> list of column lists.
+        self.writers = {}  # (category, rank) -> columnar writer.
+        self.num_events = 0
+        self._close_registered = False
+
+    def enable(
+        self,
+        max_events: int = 100000,
+        output_format: str = "csv",
+        comm=None,
+        level: str = "full",
+        sample_fraction: float = 1.0,
+        bin_size: float = 0.01,
+    ):
+        """Buffer records, and flush at the latest when the interpreter exits."""
+        # pylint: disable=too-many-arguments
+
+        if max_events < 1:
+            raise ValueError("max_events must be at least 1")
+        if output_format not in EVENT_FORMATS:
+            raise ValueError(f"Unknown event log format {output_format}.")
+        if level not in EVENT_LOG_LEVELS:
+            raise ValueError(f"Unknown event log level {level}.")
+        if sample_fraction <= 0 or sample_fraction > 1:
+            raise ValueError("sample_fraction must be in (0, 1]")
+        if bin_size <= 0:
+            raise ValueError("bin_size must be positive")
+
+        self.level = level
+        self.sample_fraction = sample_fraction
+        self.bin_size = bin_size
+        streams = get_streams()
+        self.rng = streams["events"] if streams else np.random.default_rng()
+
+        self.buffered = True
+        self.max_events = max_events
+        self.output_format = output_format
+        self.comm = comm
+        if not self._close_registered:
+            atexit.register(self._close_at_exit)
+            self._close_registered = True
+
+    def get_file_name(self, category: str, rank: int | None) -> str:
+        """Return the name of the log file of a category and rank (None if merged)."""
+
+        extension = EVENT_FORMATS[self.output_format]
+        if rank is None:
+            return f"{LOG_PREFIX}/covid_out_{category}.{extension}"
+        return f"{LOG_PREFIX}/covid_out_{category}_{rank}.{extension}"
+
+    def log(self, category: str, rank: int, data: list[int | float | str]):
+        """Add a record to the log of the given category and rank."""
+
+        if not self.buffered:
+            out_file = out_files.open(self.get_file_name(category, rank))
+            print(",".join([str(x) for x in data]), file=out_file, flush=True)
+            return
+
+        if self.level == "sample" and self.rng.random() >= self.sample_fraction:
+            return
+
+        if self.level == "binned":
+            self.bin_event(category, rank, data)
+            return
+
+        key = (category, rank)
+        if key not in self.columns:
+            self.columns[key] = [[] for _ in data]
+        for column, value in zip(self.columns[key], data):
+            column.append(value)
+
+        self.num_events += 1
+        if self.num_events >= self.max_events and self.comm is None:
+            self.flush()
+
+    def bin_event(self, category: str, rank: int, data: list[int | float | str]):
+        """Count an event in its grid cell."""
+
+        # only infections, deaths and recoveries record a location type.
+        location = data[3] if category != "hospitalisations" else "none"
+        key = (
+            data[0],
+            category,
+            int(np.floor(data[1] / self.bin_size)),
+            int(np.floor(data[2] / self.bin_size)),
+            location,
+        )
+        self.bins.setdefault(rank, Counter())[key] += 1
+
+    def write_header(self, category: str, rank: int, names: list[str]):
+        """Write the header of a csv log; columnar logs carry their own schema."""
+
+        if self.output_format != "csv":
+            return
+        if (category == "binned") != (self.level == "binned"):
+            return
+
+        if self.comm is not None:
+            if self.comm.Get_rank() != 0:
+                return
+            rank = None  # merged log.
+
+        out_file = out_files.open(self.get_file_name(category, rank))
+        print(",".join(names), file=out_file, flush=True)
+
+    def _write(self, category: str, rank: int | None, columns: list):
+        """Write one block of columns to the log of a category and rank."""
+
+        if self.output_format == "csv":
+            out_file = out_files.open(self.get_file_name(category, rank))
+            rows = zip(*[map(str, column) for column in columns])
+            out_file.write("".join(",".join(row) + "\n" for row in rows))
+            out_file.flush()
+            return
+
+        if (category, rank) not in self.writers:
+            self.writers[(category, rank)] = get_event_writer(
+                self.output_format, self.get_file_name(category, rank), category
+            )
+        self.writers[(category, rank)].write(columns)
+
+    def flush(self):
+        """Write all buffered records, with one write call per file."""
+
+        if self.comm is not None:
+            self._flush_merged()
+            return
+
+        for rank, counts in self.bins.items():
+            if counts:
+                self._write("binned", rank, get_bin_columns(counts))
+                counts.clear()
+
+        for (category, rank), columns in self.columns.items():
+            if len(columns) == 0 or len(columns[0]) == 0:
+                continue
+
+            self._write(category, rank, columns)
+
+            for column in columns:
+                column.clear()
+        self.num_events = 0
+
+    def _flush_merged(self):
+        """Gather the buffered records on rank 0 and write them sorted by time."""
+
+        local = {}  # category -> list of column arrays.
+        for (category, _), columns in self.columns.items():
+            if len(columns) > 0 and len(columns[0]) > 0:
+                local[category] = [np.asarray(column) for column in columns]
+                for column in columns:
+                    column.clear()
+        self.num_events = 0
+
+        counts = Counter()
+        for rank_counts in self.bins.values():
+            counts.update(rank_counts)
+            rank_counts.clear()
+
+        gathered = self.comm.gather((local, counts), root=0)
+        if gathered is None:
+            return
+
+        for _, rank_counts in gathered[1:]:
+            counts.update(rank_counts)
+        if counts:
+            self._write("binned", None, get_bin_columns(counts))
+
+        gathered = [g for g, _ in gathered]
+
+        for category in sorted(set().union(*gathered)):
+            parts = [g[category] for g in gathered if category in g]
+            columns = [np.concatenate(c) for c in zip(*parts)]
+            # events are gathered in rank order; keep that order within a day.
+            order = np.argsort(columns[0], kind="stable")
+            self._write(category, None, [column[order] for column in columns])
+
+    def close(self):
+        """Flush the buffers and finish any columnar files."""
+
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        self.comm = None
+
+    def _close_at_exit(self):
+        # a merged flush needs all ranks, which may have stopped already.
+        if self.comm is None:
+            self.close()
+
+
+def get_bin_columns(counts: Counter) -> list[list]:
+    """Return the columns of the binned event counts, sorted by time and cell."""
+
+    keys = sorted(counts)
+    columns = [list(column) for column in zip(*keys)]
+    columns.append([counts[k] for k in keys])
+    return columns
+
+
+event_logger = EventLogger()
+
+
 def log_to_file(category: str, rank: int, data: list[int | float | str]):
     """Log data to a file."""
 
-    out_file = out_files.open(f"{LOG_PREFIX}/covid_out_{category}_{rank}.csv")
-    data = ",".join([str(x) for x in data])
-    print(data, file=out_file, flush=True)
+    event_logger.log(category, rank, data)
 
 
 def log_infection(
@@ -110,23 +410,26 @@ def write_log_headers(rank) -> None:
     """Write the headers for the log files."""
 
     data = ["#time", "x", "y", "location_type", "rank", "incubation_time"]
-    log_to_file("infections", rank, data)
+    event_logger.write_header("infections", rank, data)
 
     data = ["#time", "x", "y", "age"]
-    log_to_file("hospitalisations", rank, data)
+    event_logger.write_header("hospitalisations", rank, data)
 
     data = ["#time", "x", "y", "age"]
-    log_to_file("deaths", rank, data)
+    event_logger.write_header("deaths", rank, data)
 
     data = ["#time", "x", "y", "age"]
-    log_to_file("recoveries", rank, data)
+    event_logger.write_header("recoveries", rank, data)
+
+    data = ["#time", "event", "cell_x", "cell_y", "location_type", "count"]
+    event_logger.write_header("binned", rank, data)
 
 
 def check_vac_eligibility(a: Person) -> bool:
     """Check if an agent is eligible for vaccination."""
 
     if (
-        a.status == "susceptible"
+        a.status_code == SUSCEPTIBLE
         and a.symptoms_suppressed is False
         and a.antivax is False
     ):
@@ -1,10 +1,11 @@
 import sys
 
 import numpy as np
-import pandas as pd
 
 
 def read_age_csv(csv_name, header_name=""):
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
     df = pd.read_csv(csv_name)
     df.columns = map(str.lower, df.columns)
     if header_name not in df.columns:
@@ -1,17 +1,19 @@
 import csv
+import os
 import pprint
 import random
 import sys
 
+import numpy as np
 import yaml
 
+from facs.base.decomposition import hilbert_keys, partition_by_curve
+
 # File to read in CSV files of building definitions.
 # The format is as follows:
 # No,building,Longitude,Latitude,Occupancy
 # lids = {"park":0,"hospital":1,"supermarket":2,"office":3,"school":4,"leisure":5,"shopping":6}
 
-pp = pprint.PrettyPrinter()
-
 
 def apply_building_mapping(mapdict, label):
     """
@@ -51,71 +53,70 @@ def read_building_csv(
     with open(building_type_map) as f:
         building_mapping = yaml.safe_load(f)
 
-    house_csv_count = 0
-
     if csvfile == "":
         print("Error: could not find csv file.")
         sys.exit()
-    with open(csvfile) as csvfile:
-        building_reader = csv.reader(csvfile)
-        row_number = 0
-        num_locs = 0
-        num_houses = 0
-        office_sqm = 0
-        building_types = {}
-        xbound = [99999.0, -99999.0]
-        ybound = [99999.0, -99999.0]
-
-        print("Reading in buildings...", file=sys.stderr)
-        for row in building_reader:
-            if row[0][0] == "#":
-                continue
-
-            x = float(row[1])
-            y = float(row[2])
-            xbound[0] = min(x, xbound[0])
-            ybound[0] = min(y, ybound[0])
-            xbound[1] = max(x, xbound[1])
-            ybound[1] = max(y, ybound[1])
-
-            location_type = apply_building_mapping(building_mapping, row[0])
-            sqm = int(row[3])
-
-            # count all the building types in a dict.
-            if row[0] not in building_types:
-                building_types[row[0]] = 1
-            else:
-                building_types[row[0]] += 1
-
-            if location_type == "house":
-                if house_csv_count % house_ratio == 0:
-                    if num_houses % e.size == e.rank:
-                        e.addHouse(num_houses, x, y, house_ratio)
-
-                    num_houses += 1
-                house_csv_count += 1
-            else:
-                # e.addLocation(num_locs, location_type, x, y, building_mapping[location_type]['default_sqm'])
-                if location_type == "office":
-                    pass
-                    # num_locs += 1
-                    # office_sqm += sqm
-                    # e.addLocation(num_locs, location_type, x, y, sqm*10) # multiply office sqm by 10 to compensate for lack of parsing.
-                    # Space should be about 1 million m2 per borough, https://www.savoystewart.co.uk/blog/office-floor-space-in-london-growing-despite-premium-cost
-                else:
-                    num_locs += 1
-                    e.addLocation(num_locs, location_type, x, y, sqm)
-            row_number += 1
-            if row_number % 10000 == 0:
-                print(f"{row_number} buildings read", file=sys.stderr, end="\r")
-        print(f"Total {row_number} buildings read", file=sys.stderr)
-        print("bounds:", xbound, ybound, file=sys.stderr)
-        office_sqm = (
-            workspace * house_csv_count * work_participation_rate
-        )  # 10 sqm per worker, 2.6 person per household, 50% in workforce
-        office_sqm_red = office_sqm
-
-        f = open("offices.csv", "w")
+
+    e.timers.start()
+    print("Reading in buildings...", file=sys.stderr)
+    # every rank parses its own byte range of the file.
+    local = parse_building_rows(
+        read_byte_range(csvfile, e.rank, e.size), building_mapping
+    )
+    parts = e.mpi.comm.allgather(
+        (
+            local["row_number"],
+            len(local["house_x"]),
+            local["bounds"],
+            local["building_types"],
+            local["locations"],
+        )
+    )
+
+    row_number = sum(p[0] for p in parts)
+    house_counts = [p[1] for p in parts]
+    house_csv_count = sum(house_counts)
+    xbound = [min(p[2][0] for p in parts), max(p[2][1] for p in parts)]
+    ybound = [min(p[2][2] for p in parts), max(p[2][3] for p in parts)]
+    building_types = {}
+    for p in parts:
+        for label, count in p[3].items():
+            building_types[label] = building_types.get(label, 0) + count
+    print(f"Total {row_number} buildings read", file=sys.stderr)
+    print("bounds:", xbound, ybound, file=sys.stderr)
+
+    # every house_ratio-th house in the file is placed, numbered in file order.
+    csv_index = sum(house_counts[: e.rank]) + np.arange(house_counts[e.rank])
+    selected = csv_index % house_ratio == 0
+    house_nums = csv_index[selected] // house_ratio
+    house_x = np.array(local["house_x"], dtype="f8")[selected]
+    house_y = np.array(local["house_y"], dtype="f8")[selected]
+    num_houses = (house_csv_count + house_ratio - 1) // house_ratio
+    e.timers.lap("read")
+
+    if e.decomposition == "spatial":
+        coords = e.mpi.comm.allgather(np.column_stack((house_x, house_y)))
+        add_houses_spatially(e, np.concatenate(coords), house_ratio)
+    else:
+        add_houses_round_robin(e, house_nums, house_x, house_y, house_ratio)
+    e.timers.lap("houses")
+
+    # non-house locations are added on all ranks, in file order.
+    num_locs = 0
+    categories = list(building_mapping)
+    for p in parts:
+        types, xs, ys, sqms = p[4]
+        for t, x, y, sqm in zip(types, xs, ys, sqms):
+            num_locs += 1
+            e.addLocation(num_locs, categories[t], float(x), float(y), int(sqm))
+    e.timers.lap("locations")
+
+    office_sqm = (
+        workspace * house_csv_count * work_participation_rate
+    )  # 10 sqm per worker, 2.6 person per household, 50% in workforce
+    office_sqm_red = office_sqm
+
+    with open("offices.csv", "w") as f:
         while office_sqm_red > 0:
             num_locs += 1
             e.addRandomOffice(f, num_locs, xbound, ybound, office_size)
@@ -125,6 +126,7 @@ def read_building_csv(
             # f.write("office,{},{},{}\n".format(x, y, office_size))
 
             office_sqm_red -= office_size
+    e.timers.lap("offices")
 
     if e.rank == 0:
         print("Read in {} houses and {} other locations.".format(num_houses, num_locs))
@@ -136,8 +138,139 @@ def read_building_csv(
 
     if e.rank == 0:
         print("raw types are:")
-        pp.pprint(building_types)
+        pprint.pprint(building_types)
 
     e.update_nearest_locations(dumpnearest)
+    e.timers.lap("nearest")
+    if e.decomposition == "spatial":
+        e.setup_border_exchange()
+        e.timers.lap("border_exchange")
+    if e.profile:
+        e.write_profile()
     if dumptypesandquit:
         sys.exit()
+
+
+def read_byte_range(csvfile, rank, size):
+    """
+    Return the lines of the file that start within the rank's share of bytes.
+    Together, the ranks read every line exactly once.
+    """
+    filesize = os.path.getsize(csvfile)
+    start = filesize * rank // size
+    end = filesize * (rank + 1) // size
+
+    lines = []
+    with open(csvfile, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()  # skip the line that started in the previous range.
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line.decode("utf-8"))
+    return lines
+
+
+def parse_building_rows(lines, building_mapping):
+    """
+    Parse building CSV lines into house coordinates and arrays of non-house
+    locations (category index, x, y, sqm).
+    """
+    categories = list(building_mapping)
+    house_x = []
+    house_y = []
+    loc_types = []
+    loc_x = []
+    loc_y = []
+    loc_sqm = []
+    building_types = {}
+    bounds = [99999.0, -99999.0, 99999.0, -99999.0]  # xmin, xmax, ymin, ymax
+    row_number = 0
+
+    for row in csv.reader(lines):
+        if len(row) == 0 or row[0][0] == "#":
+            continue
+
+        x = float(row[1])
+        y = float(row[2])
+        bounds[0] = min(x, bounds[0])
+        bounds[1] = max(x, bounds[1])
+        bounds[2] = min(y, bounds[2])
+        bounds[3] = max(y, bounds[3])
+
+        location_type = apply_building_mapping(building_mapping, row[0])
+        sqm = int(row[3])
+
+        # count all the building types in a dict.
+        if row[0] not in building_types:
+            building_types[row[0]] = 1
+        else:
+            building_types[row[0]] += 1
+
+        if location_type == "house":
+            house_x.append(x)
+            house_y.append(y)
+        elif location_type == "office":
+            pass
+            # Offices are placed randomly below, as they are hard to parse.
+            # Space should be about 1 million m2 per borough, https://www.savoystewart.co.uk/blog/office-floor-space-in-london-growing-despite-premium-cost
+        else:
+            loc_types.append(categories.index(location_type))
+            loc_x.append(x)
+            loc_y.append(y)
+            loc_sqm.append(sqm)
+
+        row_number += 1
+
+    return {
+        "row_number": row_number,
+        "house_x": house_x,
+        "house_y": house_y,
+        "bounds": bounds,
+        "building_types": building_types,
+        "locations": (
+            np.array(loc_types, dtype="int16"),
+            np.array(loc_x, dtype="f8"),
+            np.array(loc_y, dtype="f8"),
+            np.array(loc_sqm, dtype="int64"),
+        ),
+    }
+
+
+def add_houses_round_robin(e, house_nums, house_x, house_y, house_ratio):
+    """
+    Send houses to their owning rank (house number modulo the number of
+    ranks) and add the ones owned by this rank, in house number order.
+    """
+    owners = house_nums % e.size
+    outgoing = [
+        (house_nums[owners == r], house_x[owners == r], house_y[owners == r])
+        for r in range(e.size)
+    ]
+    incoming = e.mpi.comm.alltoall(outgoing)
+
+    nums = np.concatenate([p[0] for p in incoming])
+    xs = np.concatenate([p[1] for p in incoming])
+    ys = np.concatenate([p[2] for p in incoming])
+    for i in np.argsort(nums, kind="stable"):
+        e.addHouse(int(nums[i]), float(xs[i]), float(ys[i]), house_ratio)
+
+
+def add_houses_spatially(e, house_coords, house_ratio):
+    """
+    Add the houses owned by this rank, where each rank owns a contiguous
+    stretch of a Hilbert curve through all houses.
+    """
+    if len(house_coords) == 0:
+        return
+
+    coords = np.array(house_coords)
+    keys = hilbert_keys(coords[:, 0], coords[:, 1])
+    owners = partition_by_curve(keys, e.size)
+
+    # add houses in curve order, so that neighbouring houses stay close in memory.
+    for i in np.argsort(keys, kind="stable"):
+        if owners[i] == e.rank:
+            e.addHouse(int(i), float(coords[i, 0]), float(coords[i, 1]), house_ratio)
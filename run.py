@@ -2,24 +2,51 @@
 
 import argparse
 import csv
+import os
 import sys
+import warnings
 from datetime import datetime, timedelta
 from os import makedirs, path
 
-from facs.base import facs
+import numpy as np
+import yaml
+
+from facs.base import facs, utils
+from facs.base.config import Config
 from facs.base.measures import Measures
+from facs.base.checkpoint import (
+    load_checkpoint,
+    restore_snapshot,
+    save_checkpoint,
+    take_snapshot,
+)
+from facs.base.ensemble import get_replica_seeds, run_replicas
+from facs.base.random_streams import RandomStreams, set_streams
+from facs.base.shared import launch
+from facs.base.kernels import get_default_threads, use_numba
+from facs.base.profiling import print_comm_summary
+from facs.base.memory import (
+    MemoryReport,
+    print_memory_report,
+    start_tracemalloc,
+    write_tracemalloc_snapshot,
+)
+from facs.base.utils import event_logger
 from facs.readers import (
     read_age_csv,
     read_building_csv,
     read_disease_yml,
     read_measures_yml,
-    read_vaccinations_yml
+    read_vaccinations_yml,
 )
 
 
-def parse_arguments() -> dict:
+def parse_arguments(argv=None) -> dict:
     """Formats command-line arguments as dictionary
 
+    Args:
+        argv: Arguments to parse instead of sys.argv[1:]
+
     Returns:
         dict: Dictionary of all command line arguments
     """
@@ -33,7 +60,8 @@ def parse_arguments() -> dict:
         "--measures_yml",
         action="store",
         default="measures_uk",
-        help="Input YML file containing interventions.",
+        help="Input YML file containing interventions. A comma-separated list runs "
+        "one scenario per file, which all continue from a single warm-up.",
     )
     parser.add_argument(
         "-d",
@@ -78,7 +106,7 @@ def parse_arguments() -> dict:
         "--start_date",
         action="store",
         default="1/3/2020",
-        help="Start date, format = %d/%m/%Y",
+        help="Start date, format = %%d/%%m/%%Y",
     )
     parser.add_argument(
         "-q",
@@ -119,7 +147,187 @@ def parse_arguments() -> dict:
         default="20",
         help="Workspace per person in m2.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--decomposition",
+        action="store",
+        choices=["round_robin", "spatial"],
+        default="round_robin",
+        help="Distribution of houses over ranks. 'spatial' gives each rank a contiguous "
+        "region and only exchanges infectious minutes of border locations.",
+    )
+    parser.add_argument(
+        "--rebalance_interval",
+        action="store",
+        type=int,
+        default=0,
+        help="Check the load balance between ranks every N days and migrate houses "
+        "if needed (0 = never).",
+    )
+    parser.add_argument(
+        "--rebalance_threshold",
+        action="store",
+        type=float,
+        default=1.2,
+        help="Rebalance when the max/mean compute time per step over ranks exceeds this.",
+    )
+    parser.add_argument(
+        "--backend",
+        action="store",
+        choices=["mpi", "shared", "serial"],
+        default="mpi",
+        help="Parallel backend: MPI ranks, forked workers on one node that reduce "
+        "in shared memory (no MPI needed), or a single serial process.",
+    )
+    parser.add_argument(
+        "--workers",
+        action="store",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes for --backend shared, and of replicas "
+        "that run at the same time with --replicas.",
+    )
+    parser.add_argument(
+        "--threads",
+        action="store",
+        type=int,
+        default=0,
+        help="Threads per process for the array kernels (0 = the cores of the node "
+        "divided over the processes on it). Place ranks per node or socket, e.g. "
+        "mpirun --map-by socket, to use fewer ranks with more threads each.",
+    )
+    parser.add_argument(
+        "--numba",
+        action="store_true",
+        help="Run the visit registration, infection and progression phases as array "
+        "kernels compiled with Numba (the NumPy versions without Numba). Uses the "
+        "random numbers in a different order, so results differ from the default.",
+    )
+    parser.add_argument(
+        "--event_buffer_size",
+        action="store",
+        type=int,
+        default=100000,
+        help="Maximum number of infection/hospitalisation/recovery/death events "
+        "buffered in memory before they are written (they are also written at "
+        "the end of every day).",
+    )
+    parser.add_argument(
+        "--event_format",
+        action="store",
+        choices=["csv", "parquet", "npz"],
+        default="csv",
+        help="File format of the covid_out_* event logs. parquet (needs pyarrow) and "
+        "npz store typed columns, and can be loaded with event_output.read_events.",
+    )
+    parser.add_argument(
+        "--merge_event_logs",
+        action="store_true",
+        help="Gather the events of all ranks on rank 0 every day, and write a single "
+        "time-ordered covid_out_<category> log instead of one log per rank.",
+    )
+    parser.add_argument(
+        "--event_log_level",
+        action="store",
+        choices=["full", "binned", "sample"],
+        default="full",
+        help="full: log every event. sample: log a random --event_sample_fraction "
+        "of the events. binned: only log daily event counts per grid cell of "
+        "--event_bin_size degrees and location type, in covid_out_binned.",
+    )
+    parser.add_argument(
+        "--event_sample_fraction",
+        action="store",
+        type=float,
+        default=0.01,
+        help="Fraction of the events logged with --event_log_level sample.",
+    )
+    parser.add_argument(
+        "--event_bin_size",
+        action="store",
+        type=float,
+        default=0.01,
+        help="Grid cell size in degrees for --event_log_level binned.",
+    )
+    parser.add_argument(
+        "--checkpoint_interval",
+        action="store",
+        type=int,
+        default=0,
+        help="Days between checkpoints of the simulation state (0 = no checkpoints). "
+        "Checkpoints need csv event logs.",
+    )
+    parser.add_argument(
+        "--checkpoint_dir",
+        action="store",
+        default="checkpoints",
+        help="Directory for the checkpoint files (one per rank).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write the min/mean/max over ranks of the time spent in each phase of "
+        "every step (including the compute and communication waiting time) to "
+        "profile.csv, and of the start-up phases to profile_startup.csv, next to "
+        "the event logs. Also prints a summary of the communication and load "
+        "imbalance at the end of the run.",
+    )
+    parser.add_argument(
+        "--memory_report",
+        action="store_true",
+        help="Estimate the memory used by the population, neighbour tables, "
+        "locations, needs, visit buffers and event log buffers, after the setup "
+        "and at the peak of the buffers, and print it per rank at the end.",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store",
+        type=int,
+        default=0,
+        help="Trace the allocations with tracemalloc, print the given number of "
+        "top allocation sites per rank at the end, and write the snapshot of "
+        "each rank to tracemalloc_<rank>.snap next to the event logs.",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Resume from the latest checkpoint in --checkpoint_dir, with the same "
+        "arguments and number of processes as the original run.",
+    )
+    parser.add_argument(
+        "--seed",
+        action="store",
+        type=int,
+        default=None,
+        help="Seed of the random streams (one per rank and purpose: population, "
+        "visits, infections, transport, vaccination, events). Runs with the same "
+        "seed and number of processes give the same results.",
+    )
+    parser.add_argument(
+        "--rng_pool_size",
+        action="store",
+        type=int,
+        default=0,
+        help="With --seed, draw the random numbers of the per-agent events in blocks "
+        "of this size and hand them out one by one, which is faster. Uses the random "
+        "numbers in a different order, so results differ from the default of 0.",
+    )
+    parser.add_argument(
+        "--replicas",
+        action="store",
+        type=int,
+        default=1,
+        help="Number of stochastic replicas with distinct seeds. The population is "
+        "built once, and every replica runs in a forked copy of it (needs "
+        "--backend serial and a single measures scenario).",
+    )
+    parser.add_argument(
+        "--warm_up_snapshot",
+        action="store",
+        default="",
+        help="Base name of the (per rank) files with the state after the warm-up. "
+        "They are loaded if they exist, and written after the warm-up otherwise.",
+    )
+    return parser.parse_args(argv)
 
 
 def get_house_ratio(test: bool) -> float:
@@ -159,103 +367,66 @@ def get_measures_file(filename: str) -> str:
     return str(filename)
 
 
-def main():
-    """The main program"""
+def get_warm_up_measures(data_dir: str, measures_yml: str, start_date: str) -> dict:
+    """Returns the measures that are enacted during the 20 day warm-up
 
-    args = parse_arguments()
+    Args:
+        data_dir (str): directory of the input files
+        measures_yml (str): measures filename
+        start_date (str): first day of the scenario, as %d/%m/%Y
 
-    print(args)
+    Returns:
+        dict: Measures of the 20 days before the start date
+    """
 
-    house_ratio = get_house_ratio(args.quicktest)
-    location = args.location
-    measures_yml = get_measures_file(args.measures_yml)
-    disease_yml = args.disease_yml
-    vaccinations_yml = args.vaccinations_yml
-    output_dir = args.output_dir
-    data_dir = args.data_dir
-    household_size = float(args.household_size)
-    end_time = args.simulation_period if args.simulation_period > 0 else 1100
+    with open(f"{data_dir}/{measures_yml}.yml", encoding="utf-8") as f:
+        m = yaml.safe_load(f)
 
-    # check if output_dir is exists
-    if not path.exists(output_dir):
-        makedirs(output_dir)
+    date_format = m["date_format"].replace("%-", "%")
+    start = datetime.strptime(start_date, "%d/%m/%Y")
 
-    outfile = f"{output_dir}/{location}-{measures_yml}.csv"
-    if args.generic_outfile:
-        outfile = f"{output_dir}/out.csv"
+    warm_up = {}
+    for key, value in m.items():
+        try:
+            date = datetime.strptime(str(key), date_format)
+        except ValueError:
+            continue  # not a date, e.g. keyworker_fraction.
+        if start - timedelta(days=20) <= date < start:
+            warm_up[str(key)] = value
+    return warm_up
 
-    workspace = args.workspace
-    office_size = args.office_size
 
-    print("Running basic Covid-19 simulation kernel.")
-    print(f"scenario = {location}")
-    print(f"measures input yml = {measures_yml}")
-    print(f"disease input yml = {disease_yml}")
-    print(f"vaccinations input yml = {vaccinations_yml}")
-    print(f"end_time = {end_time}")
-    print(f"output_dir  = {output_dir}")
-    print(f"outfile  = {outfile}")
-    print(f"data_dir  = {data_dir}")
-    
-    measures = Measures()
+def enable_event_logs(args, eco):
+    """Starts buffering the event logs as set by the arguments
 
-    eco = facs.Ecosystem(end_time)
-
-    eco.ages = read_age_csv.read_age_csv(f"{data_dir}/age-distr.csv", location)
-
-    print("age distribution in system:", eco.ages, file=sys.stderr)
-
-    eco.disease = read_disease_yml.read_disease_yml(f"{data_dir}/{disease_yml}.yml")
-
-    building_file = f"{data_dir}/{location}_buildings.csv"
-    read_building_csv.read_building_csv(
-        eco,
-        building_file,
-        f"{data_dir}/building_types_map.yml",
-        house_ratio=house_ratio,
-        workspace=workspace,
-        office_size=office_size,
-        household_size=household_size,
-        work_participation_rate=0.5,
-    )
-    # house ratio: number of households per house placed (higher number adds noise, but reduces
-    # runtime
-    # And then 3 parameters that ONLY affect office placement.
-    # workspace: m2 per employee on average. (10 in an office setting, but we use 20 as some
-    # people work in much more spacious environments)
-    # household size: average size of each household, specified separately here.
-    # work participation rate: fraction of population in workforce, irrespective of age
-
-    # print("{}/{}_cases.csv".format(data_dir, location))
-    # Can only be done after houses are in.
-    # read_cases_csv.read_cases_csv(e,
-    #                              "{}/{}_cases.csv".format(data_dir, location),
-    #                              start_date=args.start_date,
-    #                              date_format="%m/%d/%Y")
-
-    eco.print_status(
-        outfile, silent=True
-    )  # silent print to initialise log data structures.
-
-    starting_num_infections = 500
-    if args.starting_infections:
-        if int(args.starting_infections[0]) == 0:
-            # Aggregate the num agents before using the starting infections multiplier.
-            num_agents_all = eco.mpi.CalcCommWorldTotalSingle(float(eco.num_agents))
-            print("Num agents all:", num_agents_all)
-            starting_num_infections = int(
-                (num_agents_all * float(args.starting_infections))
-            )
-        else:
-            starting_num_infections = int(args.starting_infections)
-    elif location == "test":
-        starting_num_infections = 10
+    Args:
+        args: Parsed command line arguments
+        eco: The ecosystem of this process
+    """
 
-    print(
-        f"THIS SIMULATIONS HAS {eco.num_agents} AGENTS."
-        f"Starting with {starting_num_infections} infections."
+    event_logger.enable(
+        args.event_buffer_size,
+        args.event_format,
+        comm=eco.mpi.comm if args.merge_event_logs else None,
+        level=args.event_log_level,
+        sample_fraction=args.event_sample_fraction,
+        bin_size=args.event_bin_size,
     )
 
+
+def warm_up(args, eco, measures, measures_yml, outfile, starting_num_infections):
+    """Seeds the infections over the 20 days before the start date
+
+    Args:
+        args: Parsed command line arguments
+        eco: The ecosystem of this process
+        measures: Measures object that enacts the measures
+        measures_yml: Name of the measures file used during the warm-up
+        outfile: Name of the output csv
+        starting_num_infections: Number of infections added during the warm-up
+    """
+    # pylint: disable=too-many-arguments
+
     eco.time = -20
     eco.date = datetime.strptime(args.start_date, "%d/%m/%Y")
     eco.date = eco.date - timedelta(days=20)
@@ -269,7 +440,7 @@ def main():
         eco.add_infections(num)
 
         measures.enact_measures_and_evolutions(
-            eco, eco.time, measures_yml, vaccinations_yml, disease_yml
+            eco, eco.time, measures_yml, args.vaccinations_yml, args.disease_yml
         )
 
         eco.evolve(reduce_stochasticity=False)
@@ -282,9 +453,26 @@ def main():
             eco.debug_mode = False
             eco.print_status(outfile, silent=True)
 
-    for time in range(0, end_time):
+
+def run_scenario(args, eco, measures, scenario, outfile, end_time) -> np.ndarray:
+    """Runs a measures scenario until the end time
+
+    Args:
+        args: Parsed command line arguments
+        eco: The ecosystem of this process
+        measures: Measures object that enacts the measures
+        scenario: Name of the measures file
+        outfile: Name of the output csv
+        end_time: Last day of the simulation
+
+    Returns:
+        np.ndarray: The time and global statistics of every day
+    """
+
+    series = []
+    while eco.time < end_time:
         measures.enact_measures_and_evolutions(
-            eco, eco.time, measures_yml, vaccinations_yml, disease_yml
+            eco, eco.time, scenario, args.vaccinations_yml, args.disease_yml
         )
 
         # Propagate the model by one time step.
@@ -292,10 +480,292 @@ def main():
 
         # print(time, eco.get_date_string(), eco.vac_no_symptoms, eco.vac_no_transmission)
         eco.print_status(outfile)
+        series.append([eco.time, *eco.global_stats])
+
+        if args.checkpoint_interval > 0 and eco.time % args.checkpoint_interval == 0:
+            save_checkpoint(eco, args.checkpoint_dir)
+
+    return np.array(series)
+
+
+def print_reports(args, eco):
+    """Print the communication and memory reports. All ranks have to call this."""
+
+    if args.profile:
+        print_comm_summary(eco.mpi)
+    if eco.memory_report is not None:
+        print_memory_report(eco)
+    if args.tracemalloc > 0:
+        write_tracemalloc_snapshot(eco, args.tracemalloc)
+
+
+def run_ensemble(
+    args, eco, measures, scenario, outfile, starting_num_infections, end_time
+):
+    """Runs --replicas forked copies of the built population with distinct seeds
+
+    Every replica writes its outputs to <output_dir>/replica_<index>/, and the
+    daily statistics of all replicas are collected in <outfile>-ensemble.csv.
+
+    Args:
+        args: Parsed command line arguments
+        eco: The ecosystem of this process, before the warm-up
+        measures: Measures object that enacts the measures
+        scenario: Name of the measures file
+        outfile: Name of the output csv
+        starting_num_infections: Number of infections added during the warm-up
+        end_time: Last day of the simulation
+    """
+    # pylint: disable=too-many-arguments
+
+    def replica(index, seed):
+        utils.LOG_PREFIX = f"{args.output_dir}/replica_{index}"
+        makedirs(utils.LOG_PREFIX, exist_ok=True)
+        replica_outfile = f"{utils.LOG_PREFIX}/{path.basename(outfile)}"
+        print(f"Replica {index} with seed {seed}, output in {replica_outfile}.")
+
+        warm_up(args, eco, measures, scenario, replica_outfile, starting_num_infections)
+        series = run_scenario(args, eco, measures, scenario, replica_outfile, end_time)
+        event_logger.close()
+        print_reports(args, eco)  # the tracemalloc snapshot goes to the replica.
+        return series
+
+    seeds = get_replica_seeds(args.replicas, entropy=args.seed)
+    results = run_replicas(replica, seeds, args.workers)
+
+    with open(f"{outfile[:-4]}-ensemble.csv", "w", encoding="utf-8") as f:
+        print(
+            "#replica,seed,time,susceptible,exposed,infectious,recovered,dead,immune,"
+            "num infections today,num hospitalisations today,hospital bed occupancy",
+            file=f,
+        )
+        for index, (seed, series) in enumerate(zip(seeds, results)):
+            for row in series:
+                print(index, seed, *row, sep=",", file=f)
+
+
+def main():
+    """The main program"""
+
+    args = parse_arguments()
+
+    print(args)
+
+    if args.backend == "shared":
+        launch(run_simulation, args.workers, args)
+    else:
+        run_simulation(args)
+
+
+def run_simulation(args, mpi=None):
+    """Run a simulation on this process, with an optional non-MPI manager.
+
+    Args:
+        args: Parsed command line arguments
+        mpi: Manager for the collectives, e.g. a SharedMemoryManager
+    """
+
+    house_ratio = get_house_ratio(args.quicktest)
+    location = args.location
+    scenarios = get_measures_file(args.measures_yml).split(",")
+    measures_yml = scenarios[0]  # also used for the warm-up.
+    disease_yml = args.disease_yml
+    vaccinations_yml = args.vaccinations_yml
+    output_dir = args.output_dir
+    data_dir = args.data_dir
+    household_size = float(args.household_size)
+    end_time = args.simulation_period if args.simulation_period > 0 else 1100
+
+    # every rank or shared-memory worker gets here, so another may create it first.
+    makedirs(output_dir, exist_ok=True)
+
+    outfile = f"{output_dir}/{location}-{measures_yml}.csv"
+    if args.generic_outfile:
+        outfile = f"{output_dir}/out.csv"
+
+    workspace = args.workspace
+    office_size = args.office_size
+
+    print("Running basic Covid-19 simulation kernel.")
+    print(f"scenario = {location}")
+    print(f"measures input yml = {measures_yml}")
+    print(f"disease input yml = {disease_yml}")
+    print(f"vaccinations input yml = {vaccinations_yml}")
+    print(f"end_time = {end_time}")
+    print(f"output_dir  = {output_dir}")
+    print(f"outfile  = {outfile}")
+    print(f"data_dir  = {data_dir}")
+
+    if len(scenarios) > 1 and (args.restart or args.checkpoint_interval > 0):
+        sys.exit("Checkpoints are only supported for a single measures scenario.")
+
+    if args.restart and args.warm_up_snapshot:
+        # the restarted state is past the warm-up, and would replace the snapshot.
+        sys.exit("--restart cannot be combined with --warm_up_snapshot.")
+
+    if args.replicas > 1 and (
+        args.backend != "serial"
+        or len(scenarios) > 1
+        or args.restart
+        or args.checkpoint_interval > 0
+        or args.warm_up_snapshot
+    ):
+        sys.exit(
+            "Replicas need --backend serial, one measures scenario, and no "
+            "checkpoints or warm-up snapshots."
+        )
+
+    if args.tracemalloc > 0:
+        start_tracemalloc()
+
+    measures = Measures()
 
-    # calculate cumulative sums.
-    eco.add_cum_column(outfile, ["num hospitalisations today", "num infections today"])
+    modes = {"mpi": "parallel", "shared": "shared", "serial": "serial"}
+    eco = facs.Ecosystem(
+        end_time, mode=modes[args.backend], mpi=mpi, config=Config(data_dir=data_dir)
+    )
+    eco.decomposition = args.decomposition
+    eco.rebalance_interval = args.rebalance_interval
+    eco.rebalance_threshold = args.rebalance_threshold
+    eco.num_threads = args.threads or get_default_threads(eco.mpi.local_size)
+    eco.profile = args.profile
+    if args.numba:
+        eco.step_kernels = True
+        use_numba()
+    if args.memory_report:
+        eco.memory_report = MemoryReport()
+
+    if args.seed is not None:
+        set_streams(RandomStreams(args.seed, eco.rank, args.rng_pool_size))
+
+    enable_event_logs(args, eco)
+
+    snapshot = None
+    snapshot_file = ""
+    if args.warm_up_snapshot:
+        snapshot_file = f"{args.warm_up_snapshot}_{eco.rank}.pkl"
+
+    if args.restart:
+        load_checkpoint(eco, args.checkpoint_dir)
+        print(f"Restarting from the checkpoint of day {eco.time}.")
+    elif path.isfile(snapshot_file):
+        with open(snapshot_file, "rb") as f:
+            snapshot = f.read()
+        print(f"Continuing from the warm-up in {snapshot_file}.")
+    else:
+        eco.ages = read_age_csv.read_age_csv(f"{data_dir}/age-distr.csv", location)
+
+        print("age distribution in system:", eco.ages, file=sys.stderr)
+
+        eco.disease = read_disease_yml.read_disease_yml(f"{data_dir}/{disease_yml}.yml")
+
+        building_file = f"{data_dir}/{location}_buildings.csv"
+        read_building_csv.read_building_csv(
+            eco,
+            building_file,
+            f"{data_dir}/building_types_map.yml",
+            house_ratio=house_ratio,
+            workspace=workspace,
+            office_size=office_size,
+            household_size=household_size,
+            work_participation_rate=0.5,
+        )
+        # house ratio: number of households per house placed (higher number adds noise, but reduces
+        # runtime
+        # And then 3 parameters that ONLY affect office placement.
+        # workspace: m2 per employee on average. (10 in an office setting, but we use 20 as some
+        # people work in much more spacious environments)
+        # household size: average size of each household, specified separately here.
+        # work participation rate: fraction of population in workforce, irrespective of age
+
+        # print("{}/{}_cases.csv".format(data_dir, location))
+        # Can only be done after houses are in.
+        # read_cases_csv.read_cases_csv(e,
+        #                              "{}/{}_cases.csv".format(data_dir, location),
+        #                              start_date=args.start_date,
+        #                              date_format="%m/%d/%Y")
+
+        eco.print_status(
+            outfile, silent=True
+        )  # silent print to initialise log data structures.
+
+        starting_num_infections = 500
+        if args.starting_infections:
+            if int(args.starting_infections[0]) == 0:
+                # Aggregate the num agents before using the starting infections multiplier.
+                num_agents_all = eco.mpi.CalcCommWorldTotalSingle(float(eco.num_agents))
+                print("Num agents all:", num_agents_all)
+                starting_num_infections = int(
+                    (num_agents_all * float(args.starting_infections))
+                )
+            else:
+                starting_num_infections = int(args.starting_infections)
+        elif location == "test":
+            starting_num_infections = 10
+
+        print(
+            f"THIS SIMULATIONS HAS {eco.num_agents} AGENTS."
+            f"Starting with {starting_num_infections} infections."
+        )
 
+        if args.replicas > 1:
+            run_ensemble(
+                args,
+                eco,
+                measures,
+                measures_yml,
+                outfile,
+                starting_num_infections,
+                end_time,
+            )
+            return
+
+        warm_up(args, eco, measures, measures_yml, outfile, starting_num_infections)
+
+    if snapshot is None and (len(scenarios) > 1 or snapshot_file):
+        snapshot = take_snapshot(
+            eco,
+            {
+                "outfile": outfile,
+                "warm_up_measures": get_warm_up_measures(
+                    data_dir, measures_yml, args.start_date
+                ),
+            },
+        )
+        if snapshot_file:
+            with open(snapshot_file, "wb") as f:
+                f.write(snapshot)
+
+    for scenario in scenarios:
+        if snapshot is not None:
+            if len(scenarios) > 1:
+                # every scenario gets its own directory for the event logs.
+                utils.LOG_PREFIX = f"{output_dir}/{scenario}"
+                makedirs(utils.LOG_PREFIX, exist_ok=True)
+                outfile = f"{output_dir}/{location}-{scenario}.csv"
+                if args.generic_outfile:
+                    outfile = f"{utils.LOG_PREFIX}/out.csv"
+
+            def rename(file_name, metadata):
+                if file_name == metadata["outfile"]:
+                    return outfile
+                return f"{utils.LOG_PREFIX}/{path.basename(file_name)}"
+
+            enable_event_logs(args, eco)
+            metadata = restore_snapshot(eco, snapshot, rename)
+            if metadata["warm_up_measures"] != get_warm_up_measures(
+                data_dir, scenario, args.start_date
+            ):
+                warnings.warn(
+                    f"{scenario} has other measures in the 20 days before "
+                    f"{args.start_date} than the warm-up, which are not applied."
+                )
+            print(f"Running scenario {scenario}, output in {outfile}.")
+
+        run_scenario(args, eco, measures, scenario, outfile, end_time)
+        event_logger.close()
+
+    print_reports(args, eco)
     print("Simulation complete.", file=sys.stderr)
 
 
@@ -0,0 +1,255 @@
+"""Script to run a sweep of facs simulations over a grid of parameters
+
+Every point of the grid is a run.py simulation (with the serial backend),
+and the points are spread over a pool of forked processes. The outputs of a
+point are stored in <cache_dir>/<key>/, where the key is a hash of all
+arguments and the contents of the input files. Points that already have
+results in the cache are not run again.
+
+Example:
+    python sweep.py --grid measures_yml=measures_uk_1,measures_uk_2 \\
+        --grid starting_infections=100,200 --workers 4 -- --location test -t 100
+"""
+
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+from os import makedirs, path
+
+from facs.base import utils
+
+import run
+
+# run.py arguments that do not change the results of a simulation.
+IGNORED_ARGUMENTS = ["output_dir", "workers", "threads", "backend", "event_buffer_size"]
+
+DONE_FILE = "done.json"
+
+
+def get_grid_points(grid: dict) -> list:
+    """Returns all combinations of the grid values
+
+    Args:
+        grid (dict): Argument name -> list of values
+
+    Returns:
+        list: One dict of argument values per point
+    """
+
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def get_point_arguments(base_argv: list, point: dict) -> argparse.Namespace:
+    """Returns the run.py arguments of a grid point
+
+    Args:
+        base_argv (list): run.py arguments shared by all points
+        point (dict): Argument name -> value of this point
+
+    Returns:
+        argparse.Namespace: Parsed arguments, with the serial backend
+    """
+
+    argv = list(base_argv) + [f"--{name}={value}" for name, value in point.items()]
+    args = run.parse_arguments(argv)
+    args.backend = "serial"
+    return args
+
+
+def get_input_files(args) -> list:
+    """Returns the input files that a simulation reads
+
+    Args:
+        args: Parsed run.py arguments
+
+    Returns:
+        list: File names
+    """
+
+    files = [
+        f"{args.data_dir}/{args.location}_buildings.csv",
+        f"{args.data_dir}/age-distr.csv",
+        f"{args.data_dir}/building_types_map.yml",
+        f"{args.data_dir}/{args.disease_yml}.yml",
+        f"{args.data_dir}/needs.csv",
+        f"{args.data_dir}/vaccinations.yml",  # antivax fraction.
+        f"{args.data_dir}/disease_covid19.yml",  # initial immunity.
+        # the measures read the vaccinations and the mutations in the
+        # disease file from covid_data.
+        f"covid_data/{args.vaccinations_yml}.yml",
+        f"covid_data/{args.disease_yml}.yml",
+    ]
+    measures = run.get_measures_file(args.measures_yml).split(",")
+    files += [f"covid_data/{m}.yml" for m in measures]
+    return list(dict.fromkeys(files))
+
+
+def get_point_key(args) -> str:
+    """Returns the hash of all arguments and input files of a simulation
+
+    Args:
+        args: Parsed run.py arguments
+
+    Returns:
+        str: Hex digest
+    """
+
+    h = hashlib.sha256()
+    arguments = {k: v for k, v in vars(args).items() if k not in IGNORED_ARGUMENTS}
+    h.update(json.dumps(arguments, sort_keys=True, default=str).encode())
+
+    for file_name in get_input_files(args):
+        h.update(file_name.encode())
+        if path.isfile(file_name):
+            with open(file_name, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:16]
+
+
+def _run_point(job):
+    point, args = job
+
+    # each point writes its event logs and stdout to its own directory.
+    utils.LOG_PREFIX = args.output_dir
+    log_file = f"{args.output_dir}/log.txt"
+    try:
+        with open(log_file, "w", encoding="utf-8") as log:
+            with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                run.run_simulation(args)
+    except SystemExit as err:
+        # the pool would wait forever for a worker that exits.
+        print(f"Point {point} exited ({err.code}), see {log_file}.", file=sys.stderr)
+        return args.output_dir, False
+
+    with open(f"{args.output_dir}/{DONE_FILE}", "w", encoding="utf-8") as f:
+        json.dump({"point": point, "arguments": vars(args)}, f, default=str, indent=1)
+    return args.output_dir, True
+
+
+def run_sweep(grid: dict, base_argv=None, cache_dir="sweep_cache", num_workers=1):
+    """Runs every point of the grid that has no cached results yet
+
+    Args:
+        grid (dict): run.py argument name -> list of values, e.g.
+            {"measures_yml": ["measures_uk_1", "measures_uk_2"]}
+        base_argv (list): run.py arguments shared by all points
+        cache_dir (str): Directory of the cached results
+        num_workers (int): Number of simulations that run at the same time
+
+    Returns:
+        list: For each point a dict with the point, its output directory,
+            whether the results came from the cache, and whether it failed
+    """
+
+    if num_workers < 1:
+        raise ValueError("num_workers must be at least 1")
+
+    results = []
+    pending = []
+    for point in get_grid_points(grid):
+        args = get_point_arguments(base_argv or [], point)
+        args.output_dir = f"{cache_dir}/{get_point_key(args)}"
+        cached = path.isfile(f"{args.output_dir}/{DONE_FILE}")
+        if not cached:
+            makedirs(args.output_dir, exist_ok=True)
+            pending.append((point, args))
+        results.append(
+            {
+                "point": point,
+                "output_dir": args.output_dir,
+                "cached": cached,
+                "failed": False,
+            }
+        )
+
+    print(f"{len(results) - len(pending)} of {len(results)} points are cached.")
+
+    if pending:
+        ctx = mp.get_context("fork")
+        # a new process for every point, as a simulation changes module state.
+        with ctx.Pool(min(num_workers, len(pending)), maxtasksperchild=1) as pool:
+            failed = {
+                output_dir
+                for output_dir, ok in pool.imap_unordered(_run_point, pending)
+                if not ok
+            }
+        for result in results:
+            result["failed"] = result["output_dir"] in failed
+
+    return results
+
+
+def parse_arguments(argv=None):
+    """Formats the sweep arguments
+
+    Args:
+        argv: Arguments to parse instead of sys.argv[1:]
+
+    Returns:
+        argparse.Namespace: The sweep arguments; run_args holds the run.py ones
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Run facs over a grid of run.py arguments, reusing cached results."
+    )
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="Grid dimension as name=value1,value2,... with the name of a run.py "
+        "argument, e.g. measures_yml, disease_yml, starting_infections, "
+        "household_size, office_size or workspace. Can be repeated.",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        action="store",
+        default="sweep_cache",
+        help="Directory with one subdirectory of results per grid point.",
+    )
+    parser.add_argument(
+        "--workers",
+        action="store",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of simulations that run at the same time.",
+    )
+    parser.add_argument(
+        "run_args",
+        nargs=argparse.REMAINDER,
+        help="Arguments passed to run.py for every point, after --.",
+    )
+    return parser.parse_args(argv)
+
+
+def main():
+    """The main program"""
+
+    args = parse_arguments()
+
+    grid = {}
+    for dimension in args.grid:
+        name, _, values = dimension.partition("=")
+        if not values:
+            sys.exit(f"Grid dimension {dimension} should be name=value1,value2,...")
+        grid[name] = values.split(",")
+
+    run_args = args.run_args
+    if run_args and run_args[0] == "--":
+        run_args = run_args[1:]
+
+    results = run_sweep(grid, run_args, args.cache_dir, args.workers)
+    for result in results:
+        status = " (failed)" if result["failed"] else ""
+        print(
+            result["output_dir"] + status, json.dumps(result["point"]), file=sys.stderr
+        )
+
+
+if __name__ == "__main__":
+    main()
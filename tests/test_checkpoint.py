@@ -0,0 +1,79 @@
+"""Tests for the checkpoint module."""
+
+from facs.base import checkpoint
+from facs.base.facs import Ecosystem
+from facs.base.utils import OutputFiles, out_files
+from facs.readers import read_vaccinations_yml
+
+
+def test_find_latest_complete_checkpoint(tmp_path):
+    """Test that only checkpoints written by all ranks are used."""
+
+    for time, rank in [(4, 0), (4, 1), (8, 0)]:
+        (tmp_path / f"checkpoint_{time}_{rank}.pkl").write_bytes(b"")
+
+    assert checkpoint.find_latest_checkpoint(str(tmp_path), 2) == 4
+    assert checkpoint.find_latest_checkpoint(str(tmp_path), 1) == 8
+    assert checkpoint.find_latest_checkpoint(str(tmp_path / "missing"), 1) is None
+
+
+def test_module_state_round_trip(monkeypatch):
+    """Test that the mutation state of the vaccinations reader is restored."""
+
+    monkeypatch.setattr(read_vaccinations_yml, "__mutation_days_remaining", 3)
+    state = checkpoint.get_module_state()
+
+    monkeypatch.setattr(read_vaccinations_yml, "__mutation_days_remaining", -1)
+    checkpoint.set_module_state(state)
+
+    assert getattr(read_vaccinations_yml, "__mutation_days_remaining") == 3
+
+
+def test_output_files_restore(tmp_path):
+    """Test that restored files lose the lines written after the checkpoint."""
+
+    file_name = str(tmp_path / "out.csv")
+    files = OutputFiles()
+    print("day 1", file=files.open(file_name))
+    sizes = files.get_sizes()
+    print("day 2", file=files.open(file_name), flush=True)
+
+    restored = OutputFiles()
+    restored.restore(sizes)
+    print("day 2 again", file=restored.open(file_name), flush=True)
+
+    assert (tmp_path / "out.csv").read_text() == "day 1\nday 2 again\n"
+
+
+def test_snapshot_restores_state_and_files(tmp_path):
+    """Test that a snapshot restores the ecosystem and copies its output."""
+
+    e = Ecosystem(10, mode="serial")
+    e.time = 5
+    print("warm-up", file=out_files.open(str(tmp_path / "a.csv")), flush=True)
+    snapshot = checkpoint.take_snapshot(e, {"name": "a"})
+
+    e.time = 9
+    metadata = checkpoint.restore_snapshot(
+        e, snapshot, lambda name, metadata: name.replace("a.csv", "b.csv")
+    )
+    out_files.close()
+
+    assert e.time == 5
+    assert metadata == {"name": "a"}
+    assert (tmp_path / "b.csv").read_text() == "warm-up\n"
+
+
+def test_restore_into_a_longer_run(tmp_path):
+    """Test that the checkpoint of a shorter run restores into a longer one."""
+
+    e = Ecosystem(10, mode="serial")
+    e.add_validation_point(3)
+    checkpoint.save_checkpoint(e, str(tmp_path))
+
+    longer = Ecosystem(20, mode="serial")
+    checkpoint.load_checkpoint(longer, str(tmp_path))
+
+    assert longer.validation.size == 21
+    assert longer.validation[3] == 1
+    assert longer.validation[20] == 0
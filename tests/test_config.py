@@ -0,0 +1,55 @@
+"""Tests for the config module."""
+
+from facs.base import config
+from facs.base.config import Config, get_config, set_config
+
+
+def test_files_are_read_on_first_use(tmp_path):
+    """Test that creating a Config reads nothing, and each file is read once."""
+
+    (tmp_path / "building_types_map.yml").write_text(
+        "park:\n  index: 0\nhouse:\n  index: 1\n", encoding="utf-8"
+    )
+    c = Config(data_dir=str(tmp_path))
+
+    assert "building_types_data" not in c.__dict__
+    assert c.building_types == ["park", "house"]
+    assert c.building_types_dict == {"park": 0, "house": 1}
+
+    (tmp_path / "building_types_map.yml").unlink()
+    assert c.building_types == ["park", "house"]
+
+
+def test_reset_needs_undoes_scaling():
+    """Test that the needs are scaled in place and reset from the copy."""
+
+    c = Config()
+    before = c.needs.needs.copy()
+    c.needs.scale_needs("park", 0.5)
+    assert c.needs.needs["park"].sum() < before["park"].sum()
+
+    c.reset_needs()
+    assert (c.needs.needs == before).all().all()
+
+
+def test_get_config_creates_the_default(monkeypatch):
+    """Test that get_config returns the active Config, or a default one."""
+
+    monkeypatch.setattr(config, "_active", None)
+    assert get_config().data_dir == "covid_data"
+
+    c = Config(data_dir="elsewhere")
+    set_config(c)
+    assert get_config() is c
+
+
+def test_type_arrays_are_indexed_by_code():
+    """Test that the per-type parameters follow the building type codes."""
+
+    c = Config()
+    codes = c.building_types_dict
+
+    for name, params in c.building_types_data.items():
+        assert c.neighbours[codes[name]] == params["neighbours"]
+        assert c.fixed[codes[name]] == params["fixed"]
+        assert c.weighted[codes[name]] == params["weighted"]
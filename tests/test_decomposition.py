@@ -0,0 +1,137 @@
+"""Tests for the decomposition module."""
+
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Barrier
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from facs.base.decomposition import BorderExchange, hilbert_keys, partition_by_curve
+
+
+class ThreadComm:
+    """The communicator calls of BorderExchange, for ranks running in threads."""
+
+    def __init__(self, rank, size, barrier, gathered, mailboxes):
+        self.rank = rank
+        self.size = size
+        self.barrier = barrier
+        self.gathered = gathered
+        self.mailboxes = mailboxes
+
+    def Get_rank(self):  # pylint: disable=invalid-name
+        """Return the rank of this thread."""
+        return self.rank
+
+    def Get_size(self):  # pylint: disable=invalid-name
+        """Return the number of threads."""
+        return self.size
+
+    def allgather(self, obj):
+        """Return the objects of all ranks, in rank order."""
+        self.gathered[self.rank] = obj
+        self.barrier.wait()
+        return list(self.gathered)
+
+    def Isend(self, buf, dest, tag):  # pylint: disable=invalid-name,unused-argument
+        """Send a copy of buf to dest."""
+        self.mailboxes[(self.rank, dest)].put(buf.copy())
+        return SimpleNamespace(Wait=lambda: None)
+
+    def Irecv(self, buf, source, tag):  # pylint: disable=invalid-name,unused-argument
+        """Receive into buf from source when the request is waited on."""
+
+        def wait():
+            buf[:] = self.mailboxes[(source, self.rank)].get()
+
+        return SimpleNamespace(Wait=wait)
+
+
+def get_thread_comms(size):
+    """Return one ThreadComm per rank, sharing their mailboxes."""
+
+    barrier = Barrier(size)
+    gathered = [None] * size
+    mailboxes = {(s, d): Queue() for s in range(size) for d in range(size)}
+    return [ThreadComm(r, size, barrier, gathered, mailboxes) for r in range(size)]
+
+
+def test_hilbert_keys_unique_on_grid():
+    """Test that every cell of a full grid gets a distinct key."""
+
+    xx, yy = np.meshgrid(np.arange(16), np.arange(16))
+    keys = hilbert_keys(xx.ravel(), yy.ravel(), order=4)
+
+    assert sorted(keys) == list(range(256))
+
+
+def test_hilbert_keys_locality():
+    """Test that consecutive keys are neighbouring cells."""
+
+    xx, yy = np.meshgrid(np.arange(16), np.arange(16))
+    keys = hilbert_keys(xx.ravel(), yy.ravel(), order=4)
+    order = np.argsort(keys)
+    steps = np.abs(np.diff(xx.ravel()[order])) + np.abs(np.diff(yy.ravel()[order]))
+
+    assert np.all(steps == 1)
+
+
+def test_hilbert_keys_bad_shapes():
+    """Test that mismatched coordinates raise an error."""
+
+    with pytest.raises(ValueError):
+        hilbert_keys([0.0, 1.0], [0.0])
+
+
+def test_partition_by_curve_counts():
+    """Test that the partition sizes match the round robin sizes."""
+
+    keys = np.random.permutation(10)
+    owners = partition_by_curve(keys, 3)
+
+    assert list(np.bincount(owners)) == [4, 3, 3]
+    # ranks own contiguous stretches of the curve.
+    assert list(owners[np.argsort(keys)]) == sorted(owners)
+
+
+def test_partition_by_curve_weights():
+    """Test that heavy items get a rank of their own."""
+
+    keys = np.arange(5)
+    owners = partition_by_curve(keys, 2, weights=[10, 1, 1, 1, 1])
+
+    assert list(owners) == [0, 1, 1, 1, 1]
+
+
+def test_partition_by_curve_bad_input():
+    """Test the partition input checks."""
+
+    with pytest.raises(ValueError):
+        partition_by_curve([0, 1], 0)
+    with pytest.raises(ValueError):
+        partition_by_curve([0, 1], 2, weights=[1, -1])
+
+
+def test_border_exchange():
+    """Test that only the shared locations are summed over both ranks."""
+
+    comms = get_thread_comms(2)
+    touched = [[True, True, False, True], [False, True, True, True]]
+    minutes = [np.array([1.0, 2.0, 0.0, 4.0]), np.array([0.0, 20.0, 30.0, 40.0])]
+
+    def run_rank(rank):
+        exchange = BorderExchange(comms[rank], touched[rank])
+        return exchange, exchange.exchange(minutes[rank])
+
+    with ThreadPoolExecutor(2) as pool:
+        (ex0, total0), (ex1, total1) = pool.map(run_rank, range(2))
+
+    assert list(ex0.neighbours[1]) == [1, 3]
+    assert list(ex1.neighbours[0]) == [1, 3]
+    assert (ex0.num_touched, ex0.num_border) == (3, 2)
+    assert list(total0) == [1.0, 22.0, 0.0, 44.0]
+    assert list(total1) == [0.0, 22.0, 30.0, 44.0]
+    # the local partial sums are left untouched.
+    assert list(minutes[0]) == [1.0, 2.0, 0.0, 4.0]
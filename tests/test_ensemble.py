@@ -0,0 +1,60 @@
+"""Tests for the ensemble module."""
+
+import numpy as np
+import pytest
+
+from facs.base.ensemble import get_replica_seeds, run_replicas
+from facs.base.utils import event_logger
+
+STATE = []
+
+
+def draw(index, seed):
+    """Change the shared state and return a random number."""
+
+    STATE.append(index)
+    return seed, list(STATE), np.random.random()
+
+
+def test_replicas_start_from_the_parent_state():
+    """Test that every replica is a fresh fork with its own seed."""
+
+    seeds = get_replica_seeds(4, entropy=1)
+    results = run_replicas(draw, seeds, num_workers=2)
+
+    assert [r[0] for r in results] == seeds
+    assert [r[1] for r in results] == [[0], [1], [2], [3]]
+    assert len({r[2] for r in results}) == 4
+    assert STATE == []
+
+    np.random.seed(seeds[1])
+    assert results[1][2] == np.random.random()
+
+
+def test_replica_seeds_are_distinct():
+    """Test that the seeds are reproducible and distinct."""
+
+    assert get_replica_seeds(3, entropy=5) == get_replica_seeds(3, entropy=5)
+    assert len(set(get_replica_seeds(100))) == 100
+
+
+def test_run_replicas_needs_workers():
+    """Test that at least one worker is needed."""
+
+    with pytest.raises(ValueError):
+        run_replicas(draw, [1], num_workers=0)
+
+
+def sample_events(index, seed):
+    """Return a draw of the event sampling rng."""
+
+    return event_logger.rng.random()
+
+
+def test_replicas_sample_different_events(monkeypatch):
+    """Test that every replica reseeds the sampling of the event logs."""
+
+    monkeypatch.setattr(event_logger, "rng", np.random.default_rng())
+    draws = run_replicas(sample_events, get_replica_seeds(3, entropy=1))
+
+    assert len(set(draws)) == 3
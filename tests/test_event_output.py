@@ -0,0 +1,69 @@
+"""Tests for the event_output module."""
+
+import os
+
+import numpy as np
+import pytest
+
+from facs.base.event_output import ColumnarEventWriter, get_event_writer, read_events
+
+
+def test_npz_round_trip(tmp_path):
+    """Test that npz event logs keep their column types and labels."""
+
+    file_name = str(tmp_path / "covid_out_deaths_0.npz")
+    writer = get_event_writer("npz", file_name, "deaths")
+    writer.write([[1, 2], [0.5, 1.5], [2.5, 3.5], ["house", "park"]])
+    writer.write([[3], [0.0], [0.0], ["house"]])
+    writer.close()
+
+    df = read_events(file_name)
+    assert list(df["time"]) == [1, 2, 3]
+    assert df["time"].dtype == np.int32
+    assert df["x"].dtype == np.float32
+    assert list(df["location_type"]) == ["house", "park", "house"]
+    assert list(df.columns) == ["time", "x", "y", "location_type"]
+
+
+def test_npz_blocks_are_written_before_close(tmp_path):
+    """Test that npz event logs do not keep their blocks in memory."""
+
+    file_name = str(tmp_path / "covid_out_deaths_0.npz")
+    writer = get_event_writer("npz", file_name, "deaths")
+    writer.write([list(range(1000)), [0.5] * 1000, [2.5] * 1000, ["house"] * 1000])
+    assert os.path.getsize(file_name) > 0
+    writer.close()
+
+    empty_file = str(tmp_path / "covid_out_recoveries_0.npz")
+    get_event_writer("npz", empty_file, "recoveries").close()
+    df = read_events(empty_file)
+    assert len(df) == 0
+    assert df["time"].dtype == np.int32
+
+
+def test_parquet_round_trip(tmp_path):
+    """Test that every block of a Parquet event log is read back."""
+
+    pytest.importorskip("pyarrow")
+
+    file_name = str(tmp_path / "covid_out_hospitalisations_0.parquet")
+    writer = get_event_writer("parquet", file_name, "hospitalisations")
+    writer.write([[1], [0.5], [2.5], [70]])
+    writer.write([[2, 2], [1.0, 1.5], [3.0, 3.5], [80, 85]])
+    writer.close()
+
+    df = read_events(file_name)
+    assert list(df["age"]) == [70, 80, 85]
+    assert df["age"].dtype == np.int16
+
+
+def test_unknown_category_or_format(tmp_path):
+    """Test that only known categories and formats are accepted."""
+
+    with pytest.raises(ValueError):
+        get_event_writer("npz", str(tmp_path / "a.npz"), "unknown")
+    with pytest.raises(ValueError):
+        get_event_writer("hdf5", str(tmp_path / "a.h5"), "deaths")
+    with pytest.raises(TypeError):
+        # pylint: disable-next=abstract-class-instantiated
+        ColumnarEventWriter(str(tmp_path / "a.npz"), "deaths")
@@ -0,0 +1,15 @@
+"""Tests that the slow optional modules are only imported when needed."""
+
+import subprocess
+import sys
+
+
+def test_run_does_not_import_pandas_or_mpi4py():
+    """Test that importing run.py leaves pandas and mpi4py unloaded."""
+
+    code = "import sys, run; print('pandas' in sys.modules, 'mpi4py' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.split() == ["False", "False"]
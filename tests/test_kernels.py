@@ -0,0 +1,229 @@
+"""Tests for the kernels module."""
+
+import sys
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from facs.base import kernels
+from facs.base.facs import Ecosystem
+from facs.base.house import House
+from facs.base.person import Person
+from facs.base.random_streams import RandomStreams, set_streams
+from facs.base.kernels import (
+    STEP_KERNELS,
+    parallel_for,
+    base_rates_kernel,
+    nearest_kernel,
+)
+from facs.base.status import SUSCEPTIBLE, EXPOSED, INFECTIOUS, DEAD
+
+
+def test_parallel_for_covers_range():
+    """Test that the chunks cover the range exactly once."""
+
+    hits = np.zeros(1000, dtype=int)
+
+    def mark(start, stop):
+        hits[start:stop] += 1
+
+    parallel_for(mark, hits.size, num_threads=4, min_chunk=10)
+    assert np.all(hits == 1)
+
+
+def test_base_rates_kernel():
+    """Test the base rate of a single location."""
+
+    out = np.zeros(2)
+    base_rates_kernel(
+        out,
+        np.array([720.0, 0.0]),
+        np.array([4.0, 4.0]),
+        np.array([1.0, 1.0]),
+        np.array([1440.0, 1.0]),
+        0,
+        2,
+    )
+    assert np.allclose(out, [4.0 / (1440.0 * 1440.0), 0.0])
+
+
+def test_nearest_kernel_matches_sort():
+    """Test that the kernel matches a stable sort of the scaled distances."""
+
+    rng = np.random.default_rng(0)
+    hx, hy = rng.random(100), rng.random(100)
+    lx, ly = rng.random(30), rng.random(30)
+    sqrt_sqm = np.sqrt(rng.integers(1, 5, 30).astype(float))
+
+    out = np.zeros((100, 5), dtype=int)
+    parallel_for(
+        lambda a, b: nearest_kernel(out, hx, hy, lx, ly, sqrt_sqm, 5, a, b),
+        100,
+        num_threads=3,
+        min_chunk=10,
+    )
+
+    for i in range(100):
+        dist = np.sqrt((hx[i] - lx) ** 2 + (hy[i] - ly) ** 2) / sqrt_sqm
+        assert list(out[i]) == list(np.argsort(dist, kind="stable")[:5])
+
+
+def get_step_kernel_args(name, rng):
+    """Return random arguments for a step kernel; the first one is its output."""
+
+    n = 200
+    status = rng.integers(0, 6, n)
+    uniforms = rng.random(n)
+    flags = rng.random(n) < 0.3
+    if name == "register_visits":
+        return [
+            np.zeros(n),
+            np.zeros(10),
+            rng.integers(0, 10, n),
+            rng.choice([60.0, 90.0, 360.0], n),
+            rng.integers(0, 2000, n).astype(float),
+            status,
+            flags,
+            rng.random(n) < 0.3,
+            rng.random(n) < 0.3,
+            uniforms,
+            0.5,
+            0.625,
+            0.2,
+        ]
+    if name == "location_infection":
+        return [
+            np.zeros(n, dtype=bool),
+            rng.random(n) * 0.01,
+            rng.random(n) * 100,
+            status,
+            uniforms,
+        ]
+    if name == "household_infection":
+        offsets = np.concatenate(
+            [[0], np.sort(rng.choice(np.arange(1, n), 60, replace=False)), [n]]
+        )
+        factor = 1.0 / np.diff(offsets).max()  # chances of at most one.
+        return [np.zeros(n, dtype=bool), offsets, status, flags, factor, uniforms]
+    return [
+        np.zeros(n, dtype=bool),
+        10.0,
+        status,
+        rng.integers(-1, 12, n).astype(float),
+        rng.random(n) * 10,
+        100.0,
+    ]
+
+
+@pytest.mark.parametrize("name", STEP_KERNELS)
+def test_step_kernel_versions_match(name):
+    """Test that the NumPy and loop versions of a step kernel agree exactly."""
+
+    numpy_version, loop_version = STEP_KERNELS[name]
+    numpy_args = get_step_kernel_args(name, np.random.default_rng(0))
+    loop_args = get_step_kernel_args(name, np.random.default_rng(0))
+
+    numpy_version(*numpy_args)
+    loop_version(*loop_args)
+
+    assert np.array_equal(numpy_args[0], loop_args[0])
+    assert np.array_equal(numpy_args[1], loop_args[1])
+
+
+def test_register_visits_kernel():
+    """Test the visits of dead, hospitalised and quarantined agents."""
+
+    out_time = np.zeros(4)
+    loc_inf_minutes = np.zeros(2)
+    STEP_KERNELS["register_visits"][0](
+        out_time,
+        loc_inf_minutes,
+        np.array([0, 0, 1, 1]),
+        np.array([60.0, 60.0, 90.0, 60.0]),
+        np.array([420.0, 420.0, 700.0, 420.0]),
+        np.array([DEAD, INFECTIOUS, INFECTIOUS, SUSCEPTIBLE]),
+        np.array([False, False, True, False]),
+        np.array([False, False, False, True]),
+        np.array([False, False, True, False]),
+        np.zeros(4),
+        0.5,
+        0.0,
+        0.2,
+    )
+
+    assert list(out_time) == [0.0, 30.0, 0.0, 0.0]
+    assert list(loc_inf_minutes) == [30.0, 700.0 / 7 * 0.2]
+
+
+@pytest.mark.parametrize("name", ["location_infection", "household_infection"])
+@pytest.mark.parametrize("version", [0, 1])
+def test_infection_kernels_reject_chances_above_one(name, version):
+    """Test that both versions raise, as utils.probability does, for chance > 1."""
+
+    args = get_step_kernel_args(name, np.random.default_rng(0))
+    args[2 if name == "location_infection" else 4] *= 100
+
+    with pytest.raises(ValueError, match="prob must be between 0 and 1"):
+        STEP_KERNELS[name][version](*args)
+
+
+def test_numpy_kernels_without_numba(monkeypatch):
+    """Test that the NumPy step kernels are used when Numba is missing."""
+
+    monkeypatch.setitem(sys.modules, "numba", None)
+
+    with pytest.warns(UserWarning):
+        assert kernels.use_numba() is False
+    assert kernels.get_step_kernel("progression") is STEP_KERNELS["progression"][0]
+
+
+@pytest.mark.parametrize("name", STEP_KERNELS)
+def test_numba_kernels_match_numpy(name):
+    """Test that the compiled step kernels agree with the NumPy ones."""
+
+    pytest.importorskip("numba")
+    try:
+        assert kernels.use_numba() is True
+        numpy_args = get_step_kernel_args(name, np.random.default_rng(1))
+        numba_args = get_step_kernel_args(name, np.random.default_rng(1))
+
+        STEP_KERNELS[name][0](*numpy_args)
+        kernels.get_step_kernel(name)(*numba_args)
+    finally:
+        kernels.use_numba(False)
+
+    assert np.array_equal(numpy_args[0], numba_args[0])
+    assert np.array_equal(numpy_args[1], numba_args[1])
+
+
+def test_threaded_household_infection(monkeypatch):
+    """Test that splitting the households over threads infects the same agents."""
+
+    def get_infected(num_threads):
+        set_streams(RandomStreams(5))
+        try:
+            e = Ecosystem(10, mode="serial")
+            e.step_kernels = True
+            e.num_threads = num_threads
+            e.disease = SimpleNamespace(infection_rate=0.5)
+            ages = [1.0 / 91] * 91
+            for _ in range(1000):
+                e.houses.append(House(0.0, 0.0))
+                e.houses[-1].add_households(2.5, ages, 1)
+            for a in e.get_agents():
+                a.status_code = INFECTIOUS if a.age % 3 == 0 else SUSCEPTIBLE
+            e.evolve_households()
+            return [a.status_code for a in e.get_agents()]
+        finally:
+            set_streams(None)
+
+    def infect(self, e):
+        self.status_code = EXPOSED
+
+    monkeypatch.setattr(Person, "infect", infect)
+    serial = get_infected(1)
+
+    assert EXPOSED in serial
+    assert get_infected(4) == serial
@@ -0,0 +1,71 @@
+"""Tests for the Location class and the registration of visits."""
+
+import pickle
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from facs.base.config import get_config
+from facs.base.house import House
+from facs.base.household import Household
+from facs.base.location import Location
+
+
+def get_ecosystem():
+    """Return the parts of an Ecosystem that planning visits uses."""
+
+    return SimpleNamespace(
+        config=get_config(),
+        visit_minutes=0,
+        loc_inf_minutes=np.zeros(1),
+        self_isolation_multiplier=1.0,
+        household_isolation_multiplier=1.0,
+        hospital_protection_factor=1.0,
+    )
+
+
+def test_planned_visits_are_registered():
+    """Test that plan_visits records the visit at the chosen location."""
+
+    park = Location(1, "park", 0.0, 0.0, 10)
+    park.loc_inf_minutes_id = 0
+    park.avg_visit_time = 10  # a weekly need of 120 minutes makes a daily visit.
+
+    house = House(0.0, 0.0)
+    house.nearest_locations = [[] for _ in get_config().building_types]
+    house.nearest_locations[get_config().building_types_dict["park"]] = park
+    agent = Household(house, [1.0] + [0.0] * 90, size=1).agents[0]
+    agent.status = "susceptible"
+    agent.job = 0
+
+    agent.plan_visits(get_ecosystem())
+
+    assert park.visits == [[agent, 10]]
+
+
+def test_visit_probability_is_clamped():
+    """Test that a need above one visit per day always registers the visit."""
+
+    park = Location(1, "park", 0.0, 0.0, 10)
+    park.loc_inf_minutes_id = 0
+    house = House(0.0, 0.0)
+    agent = Household(house, [1.0] + [0.0] * 90, size=1).agents[0]
+    agent.status = "susceptible"
+
+    park.register_visit(get_ecosystem(), agent, 7 * 10 * park.avg_visit_time, False)
+
+    assert len(park.visits) == 1
+
+
+def test_pickled_location_drops_visits():
+    """Test that pickling keeps the location, but not the visits of the day."""
+
+    park = Location(1, "park", 0.0, 0.0, 10)
+    park.visits.append([None, 10])
+
+    restored = pickle.loads(pickle.dumps(park))
+
+    assert park.visits == [[None, 10]]
+    assert restored.visits == []
+    assert (restored.name, restored.sqm, restored.type_code) == (1, 100, park.type_code)
@@ -0,0 +1,66 @@
+"""Tests for the memory module."""
+
+import sys
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from facs.base.location import Location
+from facs.base.memory import MemoryReport, get_deep_size
+
+
+def test_deep_size_counts_shared_objects_once():
+    """Test that objects in seen and of stop types are not counted."""
+
+    array = np.zeros(100)
+    location = Location(1, "park", 0.0, 0.0, 10)
+    seen = {}
+
+    first = get_deep_size([array, location], seen, (Location,))
+    second = get_deep_size([array], seen)
+
+    assert first >= array.nbytes
+    assert second == sys.getsizeof([array])
+    assert id(location) not in seen
+
+
+def test_memory_report_tracks_the_peak_of_the_buffers():
+    """Test that the peak follows the step with the most visits."""
+
+    location = Location(1, "park", 0.0, 0.0, 10)
+    e = SimpleNamespace(
+        houses=[],
+        house_names=[],
+        locations={"park": [location]},
+        location_list=[location],
+        loc_inf_minutes=np.zeros(1),
+        loc_base_rates=np.zeros(1),
+        time=0,
+    )
+    report = MemoryReport()
+    report.measure_step(e)
+
+    e.time = 1
+    location.visits = [[None, 60.0] for _ in range(100)]
+    report.measure_step(e)
+
+    e.time = 2
+    location.visits = []
+    report.measure_step(e)
+
+    assert report.peak_time == 1
+    assert report.peak["visit_buffers"] > report.setup["visit_buffers"]
+    assert report.peak["locations"] == report.setup["locations"]
+    assert report.get_lines(0)[0].startswith("rank 0 setup [MB]:")
+
+
+def test_deep_size_follows_slots():
+    """Test that the attributes of objects with __slots__ are counted."""
+
+    location = Location(1, "park", 0.0, 0.0, 10)
+    empty = get_deep_size(location, {})
+    location.visits = [[None, 60.0] for _ in range(100)]
+
+    assert not hasattr(location, "__dict__")
+    assert get_deep_size(location, {}) > empty + sys.getsizeof(location.visits)
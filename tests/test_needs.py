@@ -159,3 +159,16 @@ def test_scale_needs():
 
     with pytest.raises(ValueError):
         needs.scale_needs("office", -0.5)
+
+
+def test_scale_needs_updates_get_needs():
+    """Test that get_needs returns the scaled needs."""
+
+    needs = needs_instance()  # pylint: disable=no-value-for-parameter
+    person = Mock(
+        age=1, hospitalised=False, work_from_home=False, school_from_home=False
+    )
+
+    needs.scale_needs("office", 0.5)
+
+    assert needs.get_needs(person) == [15, 26, 45]
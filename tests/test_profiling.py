@@ -0,0 +1,84 @@
+"""Tests for the profiling module."""
+
+from facs.base.profiling import (
+    CommStats,
+    PhaseTimer,
+    TimedComm,
+    get_comm_summary,
+    write_phase_stats,
+)
+from facs.base.shared import SerialManager
+from facs.base.utils import OutputFiles
+
+
+def test_phase_timer_accumulates_laps():
+    """Test that repeated phases add up, and that start() forgets them."""
+
+    timer = PhaseTimer()
+    timer.lap("a")
+    timer.lap("b")
+    first = timer.times["a"]
+    timer.lap("a")
+
+    assert list(timer.times) == ["a", "b"]
+    assert timer.times["a"] >= first
+
+    timer.start()
+    assert timer.times == {}
+
+
+def test_get_stats_of_a_single_rank():
+    """Test that min, mean and max equal the local time with one rank."""
+
+    timer = PhaseTimer()
+    timer.times = {"visits": 2.0}
+
+    assert timer.get_stats(SerialManager().comm) == {"visits": (2.0, 2.0, 2.0)}
+
+
+def test_write_phase_stats(tmp_path, monkeypatch):
+    """Test that the header is only written once per file."""
+
+    files = OutputFiles()
+    monkeypatch.setattr("facs.base.profiling.out_files", files)
+    file_name = str(tmp_path / "profile.csv")
+
+    write_phase_stats(file_name, {"visits": (1, 2, 3)}, 0)
+    write_phase_stats(file_name, {"visits": (4, 5, 6)}, 1)
+    files.close()
+
+    with open(file_name, encoding="utf-8") as f:
+        assert f.read().splitlines() == [
+            "#time,phase,min,mean,max",
+            "0,visits,1,2,3",
+            "1,visits,4,5,6",
+        ]
+
+
+def test_timed_comm_records_collectives():
+    """Test that object collectives are counted and forwarded."""
+
+    stats = CommStats()
+    comm = TimedComm(SerialManager().comm, stats)
+
+    assert comm.bcast("a") == "a"
+    assert comm.allgather(1) == [1]
+    assert comm.Get_size() == 1
+    assert stats.calls == {"bcast": 1, "allgather": 1}
+    assert stats.total_time == sum(stats.time.values())
+
+
+def test_comm_summary_of_a_single_rank():
+    """Test the summary of the collectives and the load imbalance."""
+
+    mpi = SerialManager()
+    mpi.stats.record("allreduce", 0.5, 16)
+    mpi.stats.end_step(2.0, 0.5)
+    mpi.stats.end_step(1.0, 0.0)
+
+    lines = get_comm_summary(mpi)
+
+    assert lines[0] == "Communication summary of 1 ranks over 2 steps:"
+    assert "allreduce,1,0.500,0.500,0.500,16" in lines
+    assert "compute time [s]: min 3.000, mean 3.000, max 3.000" in lines
+    assert lines[-2].startswith("load imbalance (max / mean compute time): 1.00")
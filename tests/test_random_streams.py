@@ -0,0 +1,91 @@
+"""Tests for the random_streams module."""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from facs.base import utils
+from facs.base.random_streams import RandomStreams, draw, get_rng, set_streams
+
+
+def test_streams_are_reproducible():
+    """Test that the same seed and rank give the same draws."""
+
+    a = RandomStreams(42, rank=1)
+    b = RandomStreams(42, rank=1)
+
+    assert a["visits"].random() == b["visits"].random()
+    assert RandomStreams(42, 0)["visits"].random() != b["visits"].random()
+    assert a["population"].random() != a["infections"].random()
+
+
+def test_fallback_to_global_random():
+    """Test that np.random is used when no streams are active."""
+
+    set_streams(None)
+    assert get_rng("infections") is np.random
+
+
+def test_draws_use_the_active_stream():
+    """Test that probability and get_random_int draw from their stream."""
+
+    set_streams(RandomStreams(3))
+    try:
+        draws = [utils.get_random_int(100, "population") for _ in range(5)]
+        hits = [utils.probability(0.5, "visits") for _ in range(5)]
+    finally:
+        set_streams(None)
+
+    reference = RandomStreams(3)
+    assert draws == [reference["population"].integers(0, 100) for _ in range(5)]
+    assert hits == [reference["visits"].random() < 0.5 for _ in range(5)]
+
+
+def test_pools_hand_out_blocks_in_order():
+    """Test that pooled draws follow the draws of blocks of the generator."""
+
+    pooled = RandomStreams(3, pool_size=4)
+    uniforms = [pooled.uniform("visits") for _ in range(6)]
+    durations = [pooled.draw("infections", "poisson", 5.0) for _ in range(6)]
+
+    reference = RandomStreams(3)
+    expected = [reference["visits"].random() for _ in range(8)]
+    assert uniforms == expected[:6]
+    expected = reference["infections"].poisson(5.0, 8).tolist()
+    assert durations == expected[:6]
+
+
+def test_pooled_draws_are_reproducible():
+    """Test that pooled runs repeat, also after pickling the streams."""
+
+    def draws(streams):
+        set_streams(streams)
+        try:
+            return [
+                utils.probability(0.5, "visits"),
+                utils.get_random_int(10, "visits"),
+                utils.get_weighted_index([1.0, 0.0, 3.0], "visits"),
+                draw("infections", "gamma", 2.0, 20.0),
+            ]
+        finally:
+            set_streams(None)
+
+    a = RandomStreams(7, pool_size=16)
+    b = RandomStreams(7, pool_size=16)
+    assert [draws(a) for _ in range(10)] == [draws(b) for _ in range(10)]
+
+    c = pickle.loads(pickle.dumps(a))
+    assert draws(a) == draws(c)
+    assert all(draws(a)[2] in (0, 2) for _ in range(20))  # weight 0 is never drawn.
+
+
+def test_pooled_get_random_int_rejects_empty_range():
+    """Test that a pooled draw from an empty range raises, as without pools."""
+
+    set_streams(RandomStreams(7, pool_size=16))
+    try:
+        with pytest.raises(ValueError):
+            utils.get_random_int(0, "visits")
+    finally:
+        set_streams(None)
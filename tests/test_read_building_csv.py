@@ -0,0 +1,50 @@
+"""Tests for the building CSV reader."""
+
+import pytest
+
+from facs.readers.read_building_csv import read_byte_range, parse_building_rows
+
+MAPPING = {
+    "park": {"labels": ["park"]},
+    "office": {"labels": ["office"]},
+    "school": {"labels": ["school"]},
+}
+
+
+@pytest.fixture
+def buildings_file(tmp_path):
+    """Return a small buildings file."""
+
+    lines = ["#type,x,y,sqm\n"]
+    for i in range(50):
+        building = ["house", "park", "school", "office"][i % 4]
+        lines.append(f"{building},{i}.5,{-i}.25,{10 * i}\n")
+    path = tmp_path / "test_buildings.csv"
+    path.write_text("".join(lines))
+    return path
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_read_byte_range_reads_every_line_once(buildings_file, size):
+    """Test that the byte ranges of all ranks cover the file exactly."""
+
+    lines = []
+    for rank in range(size):
+        lines += read_byte_range(buildings_file, rank, size)
+
+    assert "".join(lines) == buildings_file.read_text()
+
+
+def test_parse_building_rows(buildings_file):
+    """Test the parsing of houses and other locations."""
+
+    local = parse_building_rows(read_byte_range(buildings_file, 0, 1), MAPPING)
+    types, xs, _, sqms = local["locations"]
+
+    assert local["row_number"] == 50
+    assert len(local["house_x"]) == 13
+    assert list(types[:2]) == [0, 2]  # park, school; offices are skipped.
+    assert xs[0] == 1.5
+    assert sqms[1] == 20
+    assert local["bounds"] == [0.5, 49.5, -49.25, 0.25]
+    assert local["building_types"]["office"] == 12
@@ -0,0 +1,104 @@
+"""Tests for the rebalance module."""
+
+import pickle
+
+from types import SimpleNamespace
+
+from facs.base.house import House
+from facs.base.location import Location
+from facs.base.rebalance import get_imbalance, get_destinations, migrate_houses
+
+
+class PairComm:
+    """Returns the given houses from alltoall, and keeps the ones sent."""
+
+    def __init__(self, incoming):
+        self.incoming = incoming
+        self.sent = None
+
+    def alltoall(self, objs):
+        """Record the outgoing objects, and return the incoming ones."""
+        self.sent = objs
+        return self.incoming
+
+
+def get_ecosystem(rank, names, incoming):
+    """Return the parts of an Ecosystem of two ranks that migration uses."""
+
+    ages = [1.0] + [0.0] * 90
+    location_list = [Location(i, "park", 0.0, 0.0, 10) for i in range(2)]
+    for i, l in enumerate(location_list):
+        l.loc_inf_minutes_id = i
+
+    houses = []
+    for _ in names:
+        house = House(0.0, 0.0)
+        house.add_households(2, ages, 2)
+        house.nearest_locations = [None, location_list[1:]]
+        houses.append(house)
+
+    return SimpleNamespace(
+        rank=rank,
+        size=2,
+        houses=houses,
+        house_names=list(names),
+        num_agents=sum(h.total_size for h in houses),
+        num_hospitalised=0,
+        location_list=location_list,
+        ages=ages,
+        mpi=SimpleNamespace(comm=PairComm(incoming)),
+    )
+
+
+def test_get_imbalance():
+    """Test the imbalance ratio."""
+
+    assert get_imbalance([1.0, 1.0, 1.0]) == 1.0
+    assert get_imbalance([3.0, 1.0, 2.0]) == 1.5
+    assert get_imbalance([0.0, 0.0]) == 1.0
+
+
+def test_get_destinations_balanced():
+    """Test that a balanced load keeps all houses in place."""
+
+    for rank in range(3):
+        destinations = get_destinations([1.0, 1.0, 1.0], [4, 4, 4], rank)
+        assert list(destinations) == [rank] * 4
+
+
+def test_get_destinations_overloaded():
+    """Test that an overloaded rank sends houses to its neighbour."""
+
+    costs = [3.0, 1.0]
+    counts = [4, 4]
+
+    assert list(get_destinations(costs, counts, 0)) == [0, 0, 0, 1]
+    assert list(get_destinations(costs, counts, 1)) == [1, 1, 1, 1]
+
+
+def test_migrate_houses():
+    """Test that a migrated house keeps its households, agents and locations."""
+
+    e0 = get_ecosystem(0, ["a", "b"], [[], []])
+    moved = e0.houses[1]
+    households = [[a.age for a in hh.agents] for hh in moved.households]
+
+    assert migrate_houses(e0, [0, 1]) == 1
+    assert e0.house_names == ["a"]
+    assert e0.num_agents == e0.houses[0].total_size
+
+    # the houses are pickled on their way to the other rank.
+    sent = pickle.loads(pickle.dumps(e0.mpi.comm.sent))
+    e1 = get_ecosystem(1, ["c"], [sent[1], []])
+
+    assert migrate_houses(e1, [1]) == 0
+    assert e1.house_names == ["b", "c"]
+    house = e1.houses[0]
+    assert [[a.age for a in hh.agents] for hh in house.households] == households
+    assert e1.num_agents == house.total_size + e1.houses[1].total_size
+    assert house.nearest_locations == [None, [e1.location_list[1]]]
+    assert house.nearest_locations[1][0] is e1.location_list[1]
+    for hh in house.households:
+        assert hh.ages is e1.ages
+        for a in hh.agents:
+            assert a.household is hh and a.location is house
@@ -0,0 +1,60 @@
+"""Tests for the shared memory backend."""
+
+import numpy as np
+import pytest
+
+from facs.base.shared import SerialManager, launch
+
+
+def check_collectives(num_locations, mpi=None):
+    """Worker target that fails when a collective returns a wrong result."""
+
+    rank, size = mpi.rank, mpi.size
+
+    local = np.full(num_locations, rank + 1.0)
+    total = mpi.CalcCommWorldTotalDouble(local)
+    assert np.all(total == size * (size + 1) / 2)
+
+    assert mpi.CalcCommWorldTotal(np.array([1, rank]))[0] == size
+    assert mpi.comm.bcast(rank, root=0) == 0
+    assert mpi.comm.allgather(rank) == list(range(size))
+    assert mpi.comm.alltoall([rank] * size) == list(range(size))
+
+
+def fail(mpi=None):
+    """Worker target that fails on one worker only."""
+
+    if mpi.rank == 1:
+        raise RuntimeError("worker failure")
+    mpi.comm.Barrier()
+
+
+def test_launch_collectives():
+    """Test the collectives across forked workers."""
+
+    launch(check_collectives, 3, 5)
+
+
+def test_launch_failing_worker():
+    """Test that a failing worker does not leave the others waiting."""
+
+    with pytest.raises(RuntimeError):
+        launch(fail, 2)
+
+
+def test_launch_bad_num_workers():
+    """Test that at least one worker is needed."""
+
+    with pytest.raises(ValueError):
+        launch(fail, 0)
+
+
+def test_serial_manager():
+    """Test that serial collectives return the local values."""
+
+    mpi = SerialManager()
+
+    assert mpi.CalcCommWorldTotalSingle(3) == 3.0
+    assert list(mpi.CalcCommWorldTotal(np.array([1, 2]))) == [1, 2]
+    assert mpi.comm.bcast("a") == "a"
+    assert mpi.comm.allgather(1) == [1]
@@ -0,0 +1,49 @@
+"""Tests for the sweep script."""
+
+import sys
+
+import sweep
+
+
+def test_grid_points():
+    """Test that the grid gives every combination of values."""
+
+    points = sweep.get_grid_points({"a": [1, 2], "b": ["x", "y", "z"]})
+
+    assert len(points) == 6
+    assert points[0] == {"a": 1, "b": "x"}
+    assert points[-1] == {"a": 2, "b": "z"}
+
+
+def test_point_key():
+    """Test that the key only depends on arguments that change the results."""
+
+    base = ["--location", "test", "-t", "10"]
+    args = sweep.get_point_arguments(base, {"measures_yml": "measures_uk_1"})
+    key = sweep.get_point_key(args)
+
+    args.output_dir = "elsewhere"
+    assert sweep.get_point_key(args) == key
+
+    other = sweep.get_point_arguments(base, {"measures_yml": "measures_uk_2"})
+    assert sweep.get_point_key(other) != key
+
+
+def test_failed_points_are_reported(monkeypatch, tmp_path):
+    """Test that a point that calls sys.exit is reported, not waited for."""
+
+    monkeypatch.setattr(sweep.run, "run_simulation", lambda args: sys.exit(1))
+    results = sweep.run_sweep(
+        {"starting_infections": [10, 20]},
+        ["--location", "test", "-t", "1"],
+        str(tmp_path),
+        num_workers=2,
+    )
+
+    assert [r["failed"] for r in results] == [True, True]
+
+    # failed points are not cached, so the next sweep runs them again.
+    results = sweep.run_sweep(
+        {"starting_infections": [10]}, ["--location", "test", "-t", "1"], str(tmp_path)
+    )
+    assert results[0]["cached"] is False
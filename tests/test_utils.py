@@ -5,6 +5,8 @@ from unittest import mock
 import pytest
 
 from facs.base import utils
+from facs.base.shared import SerialManager
+from facs.base.status import INFECTIOUS, SUSCEPTIBLE
 
 
 def test_probability_general():
@@ -233,7 +235,9 @@ def test_write_headers(mock_print, mock_file):
 def test_check_vac_eligibility_eligible():
     """Test the check_vac_eligibility function when eligible."""
 
-    person = mock.Mock(status="susceptible", antivax=False, symptoms_suppressed=False)
+    person = mock.Mock(
+        status_code=SUSCEPTIBLE, antivax=False, symptoms_suppressed=False
+    )
 
     assert utils.check_vac_eligibility(person) is True
 
@@ -241,7 +245,7 @@ def test_check_vac_eligibility_eligible():
 def test_check_vac_eligibility_not_eligible_status():
     """Test the check_vac_eligibility function when infected."""
 
-    person = mock.Mock(status="infected", antivax=False, symptoms_suppressed=False)
+    person = mock.Mock(status_code=INFECTIOUS, antivax=False, symptoms_suppressed=False)
 
     assert utils.check_vac_eligibility(person) is False
 
@@ -249,7 +253,7 @@ def test_check_vac_eligibility_not_eligible_status():
 def test_check_vac_eligibility_not_eligible_antivax():
     """Test the check_vac_eligibility function when antivax."""
 
-    person = mock.Mock(status="susceptible", antivax=True, symptoms_suppressed=False)
+    person = mock.Mock(status_code=SUSCEPTIBLE, antivax=True, symptoms_suppressed=False)
 
     assert utils.check_vac_eligibility(person) is False
 
@@ -257,7 +261,7 @@ def test_check_vac_eligibility_not_eligible_antivax():
 def test_check_vac_eligibility_not_eligible_suppressed():
     """Test the check_vac_eligibility function when symptoms suppressed."""
 
-    person = mock.Mock(status="susceptible", antivax=False, symptoms_suppressed=True)
+    person = mock.Mock(status_code=SUSCEPTIBLE, antivax=False, symptoms_suppressed=True)
 
     assert utils.check_vac_eligibility(person) is False
 
@@ -320,3 +324,85 @@ def test_invalid_data():
 
     with pytest.raises(IndexError):
         _ = utils.get_interpolated_lists(interpolated_size, data)
+
+
+def test_event_logger_buffers_until_flush(tmp_path, monkeypatch):
+    """Test that buffered events are only written on flush."""
+
+    monkeypatch.setattr(utils, "LOG_PREFIX", str(tmp_path))
+    logger = utils.EventLogger()
+    logger.enable(max_events=100)
+
+    logger.log("test", 0, [1, 2.5, "house"])
+    logger.log("test", 0, [2, 3.5, "park"])
+    file_name = f"{tmp_path}/covid_out_test_0.csv"
+    utils.out_files.open(file_name).flush()
+
+    out_file = tmp_path / "covid_out_test_0.csv"
+    assert out_file.read_text() == ""
+
+    logger.flush()
+    assert out_file.read_text() == "1,2.5,house\n2,3.5,park\n"
+
+
+def test_event_logger_flushes_at_threshold(tmp_path, monkeypatch):
+    """Test that the buffer is written once max_events is reached."""
+
+    monkeypatch.setattr(utils, "LOG_PREFIX", str(tmp_path))
+    logger = utils.EventLogger()
+    logger.enable(max_events=2)
+
+    logger.log("threshold", 1, [1, 2])
+    logger.log("threshold", 1, [3, 4])
+
+    assert logger.num_events == 0
+    assert (tmp_path / "covid_out_threshold_1.csv").read_text() == "1,2\n3,4\n"
+
+
+def test_event_logger_bad_threshold():
+    """Test that the buffer must hold at least one event."""
+
+    with pytest.raises(ValueError):
+        utils.EventLogger().enable(max_events=0)
+
+
+def test_event_logger_merged_sorted_by_time(tmp_path, monkeypatch):
+    """Test that merged logs are written as one file, sorted by time."""
+
+    monkeypatch.setattr(utils, "LOG_PREFIX", str(tmp_path))
+    logger = utils.EventLogger()
+    logger.enable(max_events=1, comm=SerialManager().comm)
+
+    logger.write_header("merged", 0, ["#time", "x"])
+    logger.log("merged", 0, [2, 0.5])
+    logger.log("merged", 0, [1, 1.5])
+    assert logger.num_events == 2  # merged logs are not flushed at the threshold.
+
+    logger.close()
+    assert (tmp_path / "covid_out_merged.csv").read_text() == "#time,x\n1,1.5\n2,0.5\n"
+
+
+def test_event_logger_binned_counts(tmp_path, monkeypatch):
+    """Test that binned logs count the events per day and grid cell."""
+
+    monkeypatch.setattr(utils, "LOG_PREFIX", str(tmp_path))
+    logger = utils.EventLogger()
+    logger.enable(level="binned", bin_size=1.0)
+
+    logger.log("infections", 0, [1, 0.2, 0.3, "house", 0, 5])
+    logger.log("infections", 0, [1, 0.7, 0.1, "house", 0, 3])
+    logger.log("hospitalisations", 0, [1, 2.5, 0.1, 80])
+    logger.flush()
+
+    assert (tmp_path / "covid_out_binned_0.csv").read_text() == (
+        "1,hospitalisations,2,0,none,1\n1,infections,0,0,house,2\n"
+    )
+
+
+def test_event_logger_bad_level():
+    """Test that only the known logging levels are accepted."""
+
+    with pytest.raises(ValueError):
+        utils.EventLogger().enable(level="everything")
+    with pytest.raises(ValueError):
+        utils.EventLogger().enable(level="sample", sample_fraction=0.0)